@@ -0,0 +1,180 @@
+"""
+Shared Alpha Vantage fetch layer.
+
+All calls go through one pooled requests.Session and a per-API-key token
+bucket, so concurrent callers queue for their turn instead of tripping the
+"API call frequency" note. The bucket lives in the shared cache backend, so
+the budget holds across worker processes. Independent calls can be issued
+concurrently with submit().
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from av_parser import loads
+from cache import backend_lock, shared_backend
+
+BASE_URL = os.environ.get('ALPHAVANTAGE_BASE_URL', 'https://www.alphavantage.co/query')
+
+# Free-tier limits by default; raise them for premium keys (0 per day = unlimited).
+CALLS_PER_MINUTE = float(os.environ.get('ALPHAVANTAGE_CALLS_PER_MINUTE', 5))
+CALLS_PER_DAY = int(os.environ.get('ALPHAVANTAGE_CALLS_PER_DAY', 25))
+
+# Longest a call may queue for a rate-limit slot before giving up (seconds).
+MAX_QUEUE_WAIT = float(os.environ.get('ALPHAVANTAGE_MAX_QUEUE_WAIT', 90))
+# HTTP timeout of one call (seconds).
+REQUEST_TIMEOUT = 30
+# Longest one query() may take: queueing and the request, then the same again
+# for its retry after a rate-limit rejection. Locks held around a fetch last this long.
+QUERY_DEADLINE = 2 * (MAX_QUEUE_WAIT + REQUEST_TIMEOUT)
+
+# Phrases Alpha Vantage uses when it rejects a call for exceeding the limits.
+RATE_LIMIT_MARKERS = ('call frequency', 'rate limit', 'requests per')
+
+
+class TokenBucket:
+    """
+    Token bucket with FIFO reservations. Each caller reserves the next slot
+    under the lock and then sleeps until it is due, so callers are served in
+    arrival order.
+    """
+
+    def __init__(self, per_minute, per_day=None):
+        self.capacity = max(per_minute, 1)
+        self.rate = per_minute / 60.0
+        self.per_day = per_day
+        self.state = {'tokens': self.capacity, 'updated': time.time(),
+                      'day': date.today().isoformat(), 'day_count': 0}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _locked_state(self):
+        with self.lock:
+            yield self.state
+
+    def _reserve(self, state, timeout):
+        """Take one slot from `state`. Returns seconds to wait, or None if refused."""
+        today = date.today().isoformat()
+        if today != state['day']:
+            state['day'], state['day_count'] = today, 0
+        if self.per_day and state['day_count'] >= self.per_day:
+            return None
+        now = time.time()
+        state['tokens'] = min(self.capacity, state['tokens'] + (now - state['updated']) * self.rate)
+        state['updated'] = now
+        wait = 0.0 if state['tokens'] >= 1 else (1 - state['tokens']) / self.rate
+        if timeout is not None and wait > timeout:
+            return None
+        state['tokens'] -= 1
+        state['day_count'] += 1
+        return wait
+
+    def acquire(self, timeout=None):
+        """Block until a call may be made. Returns False if that would exceed `timeout` or the daily quota."""
+        with self._locked_state() as state:
+            wait = self._reserve(state, timeout) if state is not None else None
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    The same bucket with its state kept in the shared cache backend, so every
+    worker process draws from one per-key budget.
+    """
+
+    def __init__(self, backend, name, per_minute, per_day=None):
+        super().__init__(per_minute, per_day)
+        self.backend = backend
+        self.name = name
+
+    @contextmanager
+    def _locked_state(self):
+        with backend_lock(self.backend, f'{self.name}:lock', ttl=10, timeout=10, poll=0.01) as acquired:
+            if not acquired:
+                yield None
+                return
+            entry = self.backend.get('ratelimit', self.name)
+            state = json.loads(entry[0]) if entry else dict(self.state)
+            yield state
+            self.backend.set('ratelimit', self.name, json.dumps(state).encode('utf-8'), ttl=2 * 24 * 3600)
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='av-fetch')
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def key_id(api_key):
+    """A stable stand-in for an API key, for cache and lock names that must not contain the key."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+
+def limiter_for(api_key):
+    """The token bucket for one API key, shared by all worker processes."""
+    with _limiters_lock:
+        if api_key not in _limiters:
+            # Keys are stored hashed so they never appear in the cache backend
+            name = key_id(api_key)
+            _limiters[api_key] = SharedTokenBucket(shared_backend(), name, CALLS_PER_MINUTE, CALLS_PER_DAY)
+        return _limiters[api_key]
+
+def is_rate_limited(data):
+    """True if an Alpha Vantage payload is a rate-limit rejection rather than data."""
+    message = str(data.get('Note') or data.get('Information') or '').lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+def query(function, api_key, verify=True, retries=1, **params):
+    """
+    Calls one Alpha Vantage function. Returns (parsed JSON dict, error_message).
+    Network errors are returned as messages; rate-limit rejections are retried
+    after queueing for another slot.
+    """
+    params = dict(params, function=function, apikey=api_key)
+    bucket = limiter_for(api_key)
+    for attempt in range(retries + 1):
+        with metrics.span('rate_limit_wait'):
+            acquired = bucket.acquire(timeout=MAX_QUEUE_WAIT)
+        if not acquired:
+            metrics.inc('stockview_api_rejections_total', function=function, source='local_limiter')
+            return None, "Alpha Vantage rate limit reached for this API key. Please try again later."
+        try:
+            with metrics.span('http_fetch'):
+                response = _session.get(BASE_URL, params=params, verify=verify, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+            with metrics.span('json_parse'):
+                data = loads(response.content)
+        except requests.exceptions.RequestException as e:
+            metrics.inc('stockview_api_requests_total', function=function, outcome='network_error')
+            return None, f"Network error calling {function}: {e}"
+        except ValueError as e:
+            metrics.inc('stockview_api_requests_total', function=function, outcome='invalid_json')
+            return None, f"Invalid JSON from {function}: {e}"
+        rate_limited = is_rate_limited(data)
+        metrics.inc('stockview_api_requests_total', function=function,
+                    outcome='rate_limited' if rate_limited else 'ok')
+        if rate_limited:
+            metrics.inc('stockview_api_rejections_total', function=function, source='api')
+        if not rate_limited or attempt == retries:
+            return data, None
+
+def submit(fn, *args, **kwargs):
+    """Runs `fn` on the shared fetch pool and returns its Future."""
+    return _executor.submit(fn, *args, **kwargs)
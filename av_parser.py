@@ -0,0 +1,75 @@
+"""
+Columnar parser for Alpha Vantage time-series responses.
+
+Builds typed NumPy columns straight from the decoded JSON, keeping only the
+OHLCV fields the pipeline uses and producing ascending order without copying
+a reversed frame. orjson is used for decoding when it is installed.
+NumPy and pandas are imported on the first parse, so clients that only
+decode JSON (quotes, the watchlist) never load them.
+"""
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Output column -> Alpha Vantage field
+DAILY_FIELDS = {
+    'Open': '1. open',
+    'High': '2. high',
+    'Low': '3. low',
+    'Close': '4. close',
+    'Volume': '6. volume',
+}
+
+# Intraday and plain daily series number volume as field 5
+BASIC_FIELDS = dict(DAILY_FIELDS, Volume='5. volume')
+
+
+def loads(payload):
+    """Decode a JSON payload (bytes or str), using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def parse_series(payload, series_key='Time Series (Daily)', fields=DAILY_FIELDS, float32=False):
+    """
+    Turn an Alpha Vantage time-series payload (raw bytes/str or decoded dict)
+    into an ascending DataFrame with only `fields`. Raises KeyError if the
+    series is missing.
+
+    With float32=True prices are stored as float32; volume stays float64 so
+    large share counts remain exact.
+    """
+    import numpy as np
+    import pandas as pd
+
+    data = loads(payload) if isinstance(payload, (bytes, bytearray, str)) else payload
+    series = data[series_key]
+    dates = list(series)
+    bars = list(series.values())
+    # Alpha Vantage lists newest first; flipping the key lists is cheap and
+    # avoids reversing (and copying) the finished frame.
+    if len(dates) > 1 and dates[0] > dates[-1]:
+        dates.reverse()
+        bars.reverse()
+
+    price_dtype = np.float32 if float32 else np.float64
+    columns = {}
+    for name, key in fields.items():
+        dtype = np.float64 if name == 'Volume' else price_dtype
+        columns[name] = np.array([bar[key] for bar in bars], dtype=dtype)
+
+    unit = 'datetime64[s]' if dates and len(dates[0]) > 10 else 'datetime64[D]'
+    index = pd.DatetimeIndex(np.array(dates, dtype=unit).astype('datetime64[ns]'))
+    return pd.DataFrame(columns, index=index, copy=False)
+
+def parse_daily_series(payload, float32=False):
+    """Parse a TIME_SERIES_DAILY_ADJUSTED payload into an ascending OHLCV DataFrame."""
+    return parse_series(payload, 'Time Series (Daily)', DAILY_FIELDS, float32)
+
+def parse_intraday_series(payload, interval='1min', float32=False):
+    """Parse a TIME_SERIES_INTRADAY payload into an ascending OHLCV DataFrame (exchange-local timestamps)."""
+    return parse_series(payload, f'Time Series ({interval})', BASIC_FIELDS, float32)
@@ -0,0 +1,307 @@
+"""
+Backtests of the chart's technical signals on stored daily history.
+
+Each strategy turns a whole parameter grid into one (configurations x bars)
+array of positions, computed with array operations rather than one pandas
+pass per configuration. Symbols are spread over a process pool. Positions
+are long or flat, taken at a bar's close and held over the next bar.
+
+    python backtest.py AAPL MSFT --strategy sma_cross --fast 10,20,50 --slow 100,150,200
+    python backtest.py --universe --strategy rsi --source yfinance --top 3
+
+Strategies and their grid parameters:
+- sma_cross (fast, slow): long while the fast SMA is above the slow SMA.
+- bollinger (window, num_std): enter below the lower band, exit above the middle band.
+- rsi (window, lower, upper): enter when RSI falls below `lower`, exit above `upper`.
+- macd (fast, slow, signal): long while MACD is above its signal line.
+"""
+import argparse
+import itertools
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from parallel import map_tasks
+
+TRADING_DAYS = 252
+
+# Default grid per strategy; each value list can be overridden on the command line.
+STRATEGIES = {
+    'sma_cross': {'fast': [10, 20, 50], 'slow': [100, 150, 200]},
+    'bollinger': {'window': [10, 20, 30], 'num_std': [1.5, 2.0, 2.5]},
+    'rsi': {'window': [7, 14, 21], 'lower': [25, 30, 35], 'upper': [65, 70, 75]},
+    'macd': {'fast': [8, 12], 'slow': [21, 26], 'signal': [5, 9]},
+}
+
+# Backtest processes; 0 or 1 runs every symbol in this process.
+BACKTEST_WORKERS = int(os.environ.get('STOCKVIEW_BACKTEST_WORKERS', os.cpu_count() or 1))
+
+# Report columns after the grid parameters; a symbol without enough bars gets an empty report with the same columns.
+REPORT_COLUMNS = ['Buy & Hold %', 'Total Return %', 'CAGR %', 'Max Drawdown %', 'Sharpe', 'Trades', 'Exposure %']
+
+
+# ==============================================================================
+# BATCHED INDICATORS (one row per window or span)
+# ==============================================================================
+def rolling_means(values, windows):
+    """(len(windows), bars) trailing means from one cumulative sum; NaN until each window fills."""
+    windows = np.asarray(windows, dtype=np.int64)
+    n = len(values)
+    total = np.concatenate([[0.0], np.cumsum(values)])
+    end = np.arange(1, n + 1)
+    start = end[None, :] - windows[:, None]
+    out = (total[end][None, :] - total[np.maximum(start, 0)]) / windows[:, None]
+    out[start < 0] = np.nan
+    return out
+
+def rolling_stds(values, windows):
+    """(len(windows), bars) trailing sample standard deviations (ddof=1), like pandas rolling().std()."""
+    means = rolling_means(values, windows)
+    squares = rolling_means(values * values, windows)
+    w = np.asarray(windows, dtype=np.float64)[:, None]
+    variance = (squares - means * means) * w / (w - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+def ema_rows(values, alphas):
+    """
+    ewm(adjust=False) along each row of `values` ((rows, bars)) with that
+    row's alpha, seeded at its first value. Each block of bars is solved in
+    closed form, y[t0+j] = d^(j+1)*y[t0-1] + a*d^j * sum(d^-k * x[t0+k]) with
+    d = 1 - a. Blocks are kept short enough that d^-k stays far from overflow.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1.0 - np.asarray(alphas, dtype=np.float64)[:, None]
+    with np.errstate(divide='ignore'):
+        fastest = float(-np.log(decay.min()))
+    block = max(1, int(300 / fastest)) if fastest > 0 else values.shape[1]
+    out = np.empty_like(values)
+    previous = values[:, :1].copy()
+    for start in range(0, values.shape[1], block):
+        x = values[:, start:start + block]
+        j = np.arange(x.shape[1])
+        with np.errstate(divide='ignore'):
+            growth = decay ** j
+            sums = np.cumsum(x * decay ** -j, axis=1)
+        out[:, start:start + block] = growth * (decay * previous + (1 - decay) * sums)
+        previous = out[:, start + x.shape[1] - 1:start + x.shape[1]]
+    return out
+
+def emas(values, spans):
+    """(len(spans), bars) ewm(span, adjust=False) means of one series."""
+    alphas = 2.0 / (np.asarray(spans, dtype=np.float64) + 1)
+    return ema_rows(np.broadcast_to(values, (len(alphas), len(values))), alphas)
+
+def rsis(values, windows):
+    """(len(windows), bars) simple-average RSI, as run_technical_analysis computes it."""
+    delta = np.diff(values, prepend=values[0])
+    gain = rolling_means(np.where(delta > 0, delta, 0.0), windows)
+    loss = rolling_means(np.where(delta < 0, -delta, 0.0), windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + gain / loss)
+
+
+# ==============================================================================
+# STRATEGIES: (configurations, positions)
+# ==============================================================================
+def _hold(entries, exits):
+    """Positions that switch on at an entry and off at an exit, holding in between."""
+    state = np.where(entries, 1, np.where(exits, 0, -1))
+    bars = np.arange(state.shape[1])
+    last_signal = np.maximum.accumulate(np.where(state >= 0, bars, 0), axis=1)
+    held = np.take_along_axis(state, last_signal, axis=1)
+    return np.where(held > 0, 1.0, 0.0)
+
+def sma_cross(closes, fast, slow):
+    pairs = [(f, s) for f, s in itertools.product(fast, slow) if f < s]
+    windows = sorted({w for pair in pairs for w in pair})
+    row = {w: i for i, w in enumerate(windows)}
+    means = rolling_means(closes, windows)
+    with np.errstate(invalid='ignore'):
+        positions = means[[row[f] for f, _ in pairs]] > means[[row[s] for _, s in pairs]]
+    return [{'fast': f, 'slow': s} for f, s in pairs], positions.astype(np.float64)
+
+def bollinger(closes, window, num_std):
+    configs = list(itertools.product(window, num_std))
+    row = {w: i for i, w in enumerate(window)}
+    rows = [row[w] for w, _ in configs]
+    mid = rolling_means(closes, window)[rows]
+    std = rolling_stds(closes, window)[rows]
+    lower = mid - std * np.array([k for _, k in configs])[:, None]
+    with np.errstate(invalid='ignore'):
+        positions = _hold(closes < lower, closes > mid)
+    return [{'window': w, 'num_std': k} for w, k in configs], positions
+
+def rsi(closes, window, lower, upper):
+    configs = [(w, lo, hi) for w, lo, hi in itertools.product(window, lower, upper) if lo < hi]
+    row = {w: i for i, w in enumerate(window)}
+    values = rsis(closes, window)[[row[w] for w, _, _ in configs]]
+    lows = np.array([lo for _, lo, _ in configs], dtype=np.float64)[:, None]
+    highs = np.array([hi for _, _, hi in configs], dtype=np.float64)[:, None]
+    with np.errstate(invalid='ignore'):
+        positions = _hold(values < lows, values > highs)
+    return [{'window': w, 'lower': lo, 'upper': hi} for w, lo, hi in configs], positions
+
+def macd(closes, fast, slow, signal):
+    configs = [(f, s, g) for f, s, g in itertools.product(fast, slow, signal) if f < s]
+    spans = sorted({f for f, _, _ in configs} | {s for _, s, _ in configs})
+    row = {s: i for i, s in enumerate(spans)}
+    averages = emas(closes, spans)
+    lines = averages[[row[f] for f, _, _ in configs]] - averages[[row[s] for _, s, _ in configs]]
+    # Each configuration's signal line is an EMA of its own MACD line
+    signals = ema_rows(lines, 2.0 / (np.array([g for _, _, g in configs], dtype=np.float64) + 1))
+    return [{'fast': f, 'slow': s, 'signal': g} for f, s, g in configs], (lines > signals).astype(np.float64)
+
+STRATEGY_FUNCTIONS = {'sma_cross': sma_cross, 'bollinger': bollinger, 'rsi': rsi, 'macd': macd}
+
+
+# ==============================================================================
+# PERFORMANCE
+# ==============================================================================
+def performance(closes, positions, cost_bps=0.0):
+    """
+    Report columns for each row of `positions` ((configurations, bars), held
+    from a bar's close to the next). `cost_bps` is charged on every change
+    of position.
+    """
+    returns = closes[1:] / closes[:-1] - 1
+    held = positions[:, :-1]
+    strategy = held * returns
+    if cost_bps:
+        changes = np.abs(np.diff(positions, axis=1, prepend=0.0))[:, :-1]
+        strategy = strategy - changes * cost_bps / 10_000
+    equity = np.cumprod(1 + strategy, axis=1)
+    total = equity[:, -1] - 1
+    years = strategy.shape[1] / TRADING_DAYS
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cagr = np.power(np.maximum(1 + total, 0), 1 / years) - 1
+        std = strategy.std(axis=1, ddof=1)
+        sharpe = np.where(std > 0, strategy.mean(axis=1) / std * math.sqrt(TRADING_DAYS), np.nan)
+    # Drawdowns are measured from the starting capital too, not only from later peaks
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    drawdown = (equity / peaks - 1).min(axis=1)
+    trades = (np.diff(positions, axis=1, prepend=0.0) > 0).sum(axis=1)
+    return pd.DataFrame({
+        'Total Return %': total * 100,
+        'CAGR %': cagr * 100,
+        'Max Drawdown %': drawdown * 100,
+        'Sharpe': sharpe,
+        'Trades': trades,
+        'Exposure %': held.mean(axis=1) * 100,
+    })
+
+def backtest_closes(closes, strategy, grid, cost_bps=0.0):
+    """Backtest every configuration of `grid` on one symbol's closes; one report row per configuration."""
+    columns = list(grid) + REPORT_COLUMNS
+    closes = np.asarray(closes, dtype=np.float64)
+    closes = closes[~np.isnan(closes)]
+    if len(closes) < 2:
+        return pd.DataFrame(columns=columns)
+    configs, positions = STRATEGY_FUNCTIONS[strategy](closes, **grid)
+    if not configs:
+        return pd.DataFrame(columns=columns)
+    report = performance(closes, positions, cost_bps)
+    report.insert(0, 'Buy & Hold %', (closes[-1] / closes[0] - 1) * 100)
+    return pd.concat([pd.DataFrame(configs), report], axis=1)[columns]
+
+
+# ==============================================================================
+# SYMBOLS AND PROCESSES
+# ==============================================================================
+# This process's open panels by path; a worker maps the files once for all its tasks.
+_panels = {}
+
+
+def _panel(path):
+    from price_panel import PricePanel
+    panel = _panels.get(path)
+    if panel is None:
+        panel = _panels[path] = PricePanel(path)
+    return panel
+
+def _backtest_symbol(panel_path, symbol, strategy, grid, bars, cost_bps):
+    """Worker task: read the symbol's closes from the panel files and backtest the grid."""
+    frame = _panel(panel_path).frame(symbol, bars)
+    if frame is None or len(frame) < 2:
+        return symbol, None
+    report = backtest_closes(frame['Close'].to_numpy(), strategy, grid, cost_bps)
+    report.insert(0, 'Symbol', symbol)
+    report.insert(1, 'First', frame.index[0].strftime('%Y-%m-%d'))
+    report.insert(2, 'Last', frame.index[-1].strftime('%Y-%m-%d'))
+    return symbol, report
+
+def run_backtest(panel_path, symbols, strategy, grid=None, bars=None, cost_bps=0.0, workers=BACKTEST_WORKERS):
+    """
+    Backtest `strategy` over `grid` (its STRATEGIES default when None) for
+    each symbol stored in the price panel at `panel_path`. Returns (report
+    DataFrame, symbols without stored history).
+    """
+    grid = {**STRATEGIES[strategy], **(grid or {})}
+    tasks = [(panel_path, symbol, strategy, grid, bars, cost_bps) for symbol in symbols]
+    # Workers map the panel files themselves, so no price data is pickled
+    results = map_tasks(_backtest_symbol, tasks, workers)
+    reports = [report for _, report in results if report is not None]
+    missing = [symbol for symbol, report in results if report is None]
+    if not reports:
+        return pd.DataFrame(), missing
+    return pd.concat(reports, ignore_index=True), missing
+
+def best_by_symbol(report, top=1, column='Sharpe'):
+    """The `top` configurations of each symbol by `column`."""
+    if report.empty:
+        return report
+    ranked = report.sort_values(['Symbol', column], ascending=[True, False], na_position='last')
+    return ranked.groupby('Symbol', sort=False).head(top).reset_index(drop=True)
+
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+def _number_list(text):
+    return [float(v) if '.' in v else int(v) for v in text.split(',') if v.strip()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('symbols', nargs='*', help="symbols to backtest (default: every symbol in the panel)")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='sma_cross')
+    parser.add_argument('--source', choices=['alphavantage', 'yfinance'], default='alphavantage',
+                        help="price panel to read: the web app's or the stockview command's")
+    parser.add_argument('--universe', action='store_true', help="every symbol stored in the panel")
+    parser.add_argument('--bars', type=int, default=None, help="only the newest BARS bars of each symbol")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="cost per position change, in basis points")
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS)
+    parser.add_argument('--top', type=int, default=0, help="show only the best TOP configurations per symbol")
+    parser.add_argument('--output', default=None, help="also write the full report to this CSV file")
+    for name in sorted({p for grid in STRATEGIES.values() for p in grid}):
+        parser.add_argument(f'--{name.replace("_", "-")}', dest=name, type=_number_list, default=None,
+                            help=f"comma-separated values for the {name} parameter")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from price_panel import DEFAULT_DIR, PricePanel
+    args = parse_args(argv)
+    panel_path = os.path.join(DEFAULT_DIR, args.source)
+    symbols = [s.upper() for s in args.symbols] or (PricePanel(panel_path).symbols if args.universe else [])
+    if not symbols:
+        print("Name the symbols to backtest, or pass --universe for every stored symbol.")
+        return
+    grid = {name: getattr(args, name) for name in STRATEGIES[args.strategy] if getattr(args, name) is not None}
+    report, missing = run_backtest(panel_path, symbols, args.strategy, grid, args.bars, args.cost_bps, args.workers)
+    if missing:
+        print(f"  [!] No stored history for: {', '.join(missing)}")
+    if report.empty:
+        print("Nothing to report.")
+        return
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Report written to {args.output}")
+    shown = best_by_symbol(report, args.top) if args.top else report
+    try:
+        from tabulate import tabulate
+        print(tabulate(shown, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".2f"))
+    except ImportError:
+        print(shown.to_string(index=False, float_format="%.2f"))
+
+if __name__ == '__main__':
+    main()
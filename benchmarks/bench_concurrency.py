@@ -0,0 +1,119 @@
+"""
+/analyze throughput under N concurrent users: the blocking in-request
+pipeline vs background jobs with process-pool rendering.
+
+Alpha Vantage is replayed in-process, and each run uses its own symbols and
+a fresh cache directory, so every request pays for fetching, indicators and
+rendering. Home-page latency is sampled during the run to show how much the
+rendering load stalls unrelated requests.
+
+    python -m benchmarks.bench_concurrency [--users 8]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Configure before the app modules read their settings at import time
+_CACHE = tempfile.mkdtemp(prefix='stockview-bench-')
+os.environ['STOCKVIEW_CACHE_DIR'] = _CACHE
+os.environ['STOCKVIEW_HISTORY_DB'] = os.path.join(_CACHE, 'history.sqlite')
+os.environ.setdefault('ALPHAVANTAGE_CALLS_PER_MINUTE', '100000')
+os.environ.setdefault('ALPHAVANTAGE_CALLS_PER_DAY', '0')
+
+import av_client
+import charts
+import stockviewer
+from benchmarks import fixtures
+
+
+def _blocking_request(client, symbol):
+    """The pre-job behaviour: the whole pipeline inside the request."""
+    result, error = stockviewer.analyze_symbol(symbol, 'bench')
+    assert error is None, error
+
+def _async_request(client, symbol):
+    response = client.post('/analyze', data={'symbol': symbol, 'api_key': 'bench'})
+    status_url = response.headers['Location'].replace('/results/', '/jobs/')
+    while True:
+        state = client.get(status_url).get_json()['state']
+        if state != 'running':
+            assert state == 'done', state
+            return
+        time.sleep(0.05)
+
+def run(mode, users, prefix):
+    request = _blocking_request if mode == 'blocking' else _async_request
+    latencies = []
+    probe_latencies = []
+    done = threading.Event()
+
+    def user(i):
+        client = stockviewer.app.test_client()
+        start = time.perf_counter()
+        request(client, f'{prefix}{i:03d}')
+        latencies.append(time.perf_counter() - start)
+
+    def probe():
+        client = stockviewer.app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/')
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.02)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    return {
+        'elapsed': elapsed,
+        'throughput': users / elapsed,
+        'p50': statistics.median(latencies),
+        'max': max(latencies),
+        'probe_p50': statistics.median(probe_latencies) if probe_latencies else float('nan'),
+        'probe_max': max(probe_latencies) if probe_latencies else float('nan'),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='replayed Alpha Vantage latency (s)')
+    args = parser.parse_args()
+
+    av_client._session = fixtures.AlphaVantageReplay(latency=args.latency)
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        # Blocking path renders on the request thread, like the original app
+        pooled_render = stockviewer.render_chart
+        stockviewer.render_chart = lambda df, symbol, name: charts.render_chart(df, symbol, name)
+        charts.warm_up()
+        blocking = run('blocking', args.users, 'B')
+        stockviewer.render_chart = pooled_render
+        # Start the pool (and its warm-up) outside the timed run
+        from jobs import RENDER_WORKERS, render_pool
+        if RENDER_WORKERS:
+            list(render_pool().map(abs, range(RENDER_WORKERS)))
+        pooled = run('async', args.users, 'A')
+    finally:
+        sys.stdout = stdout
+
+    print(f"{args.users} concurrent users, distinct symbols, cold caches, {os.cpu_count()} CPUs")
+    print(f"{'':10} {'total s':>9} {'req/s':>7} {'p50 s':>7} {'max s':>7} {'home p50 ms':>12} {'home max ms':>12}")
+    for name, r in (('blocking', blocking), ('jobs+pool', pooled)):
+        print(f"{name:10} {r['elapsed']:9.2f} {r['throughput']:7.2f} {r['p50']:7.2f} {r['max']:7.2f} "
+              f"{r['probe_p50'] * 1000:12.1f} {r['probe_max'] * 1000:12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Rolling one-minute bars up to coarser intraday and daily bars: bucket offsets
+with ufunc.reduceat (intraday.py) vs DataFrame.resample per session.
+
+    python -m benchmarks.bench_intraday [--days 252] [--repeat 5]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from intraday import RESOLUTIONS, SESSIONS, IntradayStore, Resampler, bucket_offsets, resample, rollup
+
+AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def _timed(func, *args, repeat=1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def pandas_resample(df, interval, session='regular'):
+    """The same bars with pandas: keep the session's minutes, resample anchored on the open, drop empty bins."""
+    open_, close = SESSIONS[session]
+    minute = df.index.hour * 60 + df.index.minute
+    df = df[(minute >= open_) & (minute < close)]
+    resolution = RESOLUTIONS[interval]
+    if resolution is None:
+        return df.resample('1D').agg(AGG).dropna(subset=['Open'])
+    offset = pd.Timedelta(minutes=open_ % resolution)
+    return df.resample(f'{resolution}min', offset=offset).agg(AGG).dropna(subset=['Open'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=252)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = fixtures.synthetic_minute_bars('BENCH', args.days)
+    store = IntradayStore(tempfile.mkdtemp(prefix='stockview-intraday-'))
+    store_time, _ = _timed(store.append, 'BENCH', df)
+    _, bars = store.load('BENCH')
+    resampler = Resampler(store)
+
+    print(f"{len(df)} one-minute bars over {args.days} sessions (stored in {store_time * 1000:.1f} ms)")
+    print(f"{'':18} {'pandas ms':>10} {'numpy ms':>9} {'offsets ms':>11} {'speedup':>8}")
+    for interval in ('5min', '15min', '1h', 'daily'):
+        for session in SESSIONS:
+            old_time, expected = _timed(pandas_resample, df, interval, session, repeat=args.repeat)
+            new_time, result = _timed(resample, bars, interval, session, repeat=args.repeat)
+            # With the bucket offsets already computed, as the Resampler keeps them
+            starts, _, keep = bucket_offsets(bars['t'], RESOLUTIONS[interval], session)
+            rollup_time, _ = _timed(rollup, bars, starts, keep, repeat=args.repeat)
+            print(f"  {interval + ' ' + session:16} {old_time * 1000:10.2f} {new_time * 1000:9.2f} "
+                  f"{rollup_time * 1000:11.2f} {old_time / rollup_time:7.1f}x")
+
+            # Same bars as pandas
+            assert (result.index == expected.index).all(), (interval, session)
+            assert np.allclose(result.to_numpy(), expected.to_numpy()), (interval, session)
+            assert resampler.bars('BENCH', interval, session).equals(result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Reading daily bars from the memory-mapped price panel vs the SQLite history
+store and the in-memory wide frame.
+
+    python -m benchmarks.bench_panel [--tickers 2000] [--days 1260] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import yfinance
+
+import stockview
+from benchmarks import fixtures
+from history_store import HistoryStore
+from price_panel import PricePanel
+
+
+def _timed(func, *args, repeat=1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=1260)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='stockview-panel-')
+    sectors = sorted(set(stockview.TICKERS.values()))
+    universe = {f'U{i:05d}': sectors[i % len(sectors)] for i in range(args.tickers)}
+    frames = fixtures.synthetic_yfinance_frames(universe, args.days)
+    symbols = list(universe)[:50]
+
+    store = HistoryStore(os.path.join(directory, 'history.sqlite'))
+    panel = PricePanel(os.path.join(directory, 'panel'))
+    for symbol in symbols:
+        store.append(symbol, frames[symbol])
+
+    original = yfinance.download
+    yfinance.download = fixtures.ReplayDownload(frames, {}, latency=False)
+    try:
+        engine = stockview.ReturnEngine(universe)
+        with contextlib.redirect_stdout(io.StringIO()):
+            wide = engine.history()
+        write_time, _ = _timed(panel.write_wide, wide)
+        append_time, _ = _timed(panel.write_wide, wide.iloc[-1:])
+        panel_engine = stockview.ReturnEngine(universe, panel=panel)
+    finally:
+        yfinance.download = original
+
+    def returns_wide():
+        engine._returns.clear()
+        return engine.returns('1y')
+
+    def returns_panel():
+        panel_engine._returns.clear()
+        return panel_engine.returns('1y')
+
+    def load_sqlite(bars):
+        return [store.load(s, bars) for s in symbols]
+
+    def load_panel(bars):
+        return [panel.frame(s, bars) for s in symbols]
+
+    print(f"Universe: {args.tickers} tickers x {args.days} days, panel at {panel.path}")
+    print(f"  write_wide (initial)  : {write_time * 1000:9.2f} ms")
+    print(f"  write_wide (one day)  : {append_time * 1000:9.2f} ms")
+    print(f"{'':26} {'before ms':>10} {'panel ms':>10} {'speedup':>8}")
+    cases = [
+        ('1y returns, all tickers', (returns_wide,), (returns_panel,)),
+        (f'{len(symbols)} symbols, 252 bars', (load_sqlite, 252), (load_panel, 252)),
+        (f'{len(symbols)} symbols, all bars', (load_sqlite, None), (load_panel, None)),
+    ]
+    for name, (old_fn, *old_args), (new_fn, *new_args) in cases:
+        old_time, _ = _timed(old_fn, *old_args, repeat=args.repeat)
+        new_time, _ = _timed(new_fn, *new_args, repeat=args.repeat)
+        print(f"  {name:24} {old_time * 1000:10.3f} {new_time * 1000:10.3f} {old_time / new_time:7.1f}x")
+
+    # Same answers as the sources they replace
+    a, b = returns_wide(), returns_panel()
+    assert a['Ticker'].tolist() == b['Ticker'].tolist()
+    assert np.allclose(a['Return'].to_numpy(), b['Return'].to_numpy())
+    for old, new in zip(load_sqlite(None), load_panel(None)):
+        assert (old.index == new.index).all() and np.allclose(old.to_numpy(), new.to_numpy())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Alpha Vantage daily-series parsing: the original DataFrame.from_dict path vs
+av_parser's columnar parser, on a recorded full-history response.
+
+    python -m benchmarks.bench_parser [--symbol AAPL] [--synthetic]
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+import av_parser
+from benchmarks import fixtures
+
+FUNCTION = 'TIME_SERIES_DAILY_ADJUSTED'
+
+
+def legacy_parse(raw):
+    """The parsing steps get_stock_data used before av_parser."""
+    price_data = json.loads(raw)
+    df = pd.DataFrame.from_dict(price_data['Time Series (Daily)'], orient='index')
+    df = df.astype(float)
+    df.rename(columns={'1. open': 'Open', '2. high': 'High', '3. low': 'Low', '4. close': 'Close', '6. volume': 'Volume'}, inplace=True)
+    df.index = pd.to_datetime(df.index)
+    return df.iloc[::-1]
+
+def _best(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbol', default='AAPL')
+    parser.add_argument('--record', action='store_true', help='record the response first (needs --api-key)')
+    parser.add_argument('--api-key')
+    parser.add_argument('--synthetic', action='store_true', help='write a synthetic 6000-bar response first')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.record:
+        fixtures.record_alpha_vantage(FUNCTION, args.symbol, args.api_key, variant='full', outputsize='full')
+    elif args.synthetic:
+        fixtures.synthesize_daily_adjusted(args.symbol)
+    raw = fixtures.load_alpha_vantage(FUNCTION, args.symbol, 'full')
+
+    legacy_time, legacy = _best(lambda: legacy_parse(raw), args.repeat)
+    stdlib_time, parsed = _best(lambda: av_parser.parse_daily_series(json.loads(raw)), args.repeat)
+    fast_time, _ = _best(lambda: av_parser.parse_daily_series(raw), args.repeat)
+    f32_time, parsed32 = _best(lambda: av_parser.parse_daily_series(raw, float32=True), args.repeat)
+
+    json_decode, _ = _best(lambda: json.loads(raw), args.repeat)
+    fast_decode, _ = _best(lambda: av_parser.loads(raw), args.repeat)
+
+    columns = list(av_parser.DAILY_FIELDS)
+    assert parsed.index.equals(legacy.index)
+    max_diff = (parsed[columns] - legacy[columns]).abs().max().max()
+
+    print(f"Response: {len(raw) / 1e6:.1f} MB, {len(parsed)} bars ({args.symbol})")
+    print(f"  legacy from_dict      : {legacy_time * 1000:8.1f} ms  {legacy.memory_usage(deep=True).sum() / 1e3:8.0f} kB")
+    print(f"  columnar (json)       : {stdlib_time * 1000:8.1f} ms  {parsed.memory_usage(deep=True).sum() / 1e3:8.0f} kB")
+    decoder = 'orjson' if av_parser.ORJSON_AVAILABLE else 'json*'
+    print(f"  columnar ({decoder:<6})     : {fast_time * 1000:8.1f} ms   decode only: json {json_decode * 1000:.1f} ms, "
+          f"av_parser.loads {fast_decode * 1000:.1f} ms")
+    print(f"  columnar float32      : {f32_time * 1000:8.1f} ms  {parsed32.memory_usage(deep=True).sum() / 1e3:8.0f} kB")
+    print(f"  max |diff| vs legacy  : {max_diff:.2e}")
+    if not av_parser.ORJSON_AVAILABLE:
+        print("  * orjson is not installed; av_parser falls back to the json module")
+
+if __name__ == '__main__':
+    main()
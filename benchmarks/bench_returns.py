@@ -0,0 +1,66 @@
+"""
+Timing comparison: per-ticker get_returns loop vs batched get_all_returns.
+
+    python -m benchmarks.bench_returns [--period 7d] [--no-latency]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import yfinance
+
+import stockview
+from benchmarks import fixtures
+
+
+def _timed(func, *args, repeat=1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--period', default='7d')
+    parser.add_argument('--record', action='store_true', help='record fixtures from yfinance first')
+    parser.add_argument('--synthetic', action='store_true', help='write synthetic fixtures first')
+    parser.add_argument('--no-latency', action='store_true', help='skip replaying recorded network latency')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.record:
+        fixtures.record_yfinance(stockview.TICKERS, args.period)
+    elif args.synthetic:
+        fixtures.synthesize_yfinance(stockview.TICKERS, args.period)
+    frames, meta = fixtures.load_yfinance(args.period)
+
+    replay = fixtures.ReplayDownload(frames, meta, latency=not args.no_latency)
+    original = yfinance.download
+    yfinance.download = replay
+    try:
+        replay.calls = 0
+        serial_time, serial_df = _timed(stockview.get_all_returns_serial, stockview.TICKERS, args.period, repeat=args.repeat)
+        serial_calls = replay.calls // args.repeat
+        replay.calls = 0
+        batch_time, batch_df = _timed(stockview.get_all_returns, stockview.TICKERS, args.period, repeat=args.repeat)
+        batch_calls = replay.calls // args.repeat
+    finally:
+        yfinance.download = original
+
+    merged = serial_df.merge(batch_df, on='Ticker', suffixes=('_serial', '_batch'))
+    max_diff = (merged['Return_serial'] - merged['Return_batch']).abs().max()
+
+    print(f"Fixture: {meta['source']}, period={args.period}, tickers={len(stockview.TICKERS)}, "
+          f"latency={'replayed' if not args.no_latency else 'off'}")
+    print(f"  per-ticker loop : {serial_time * 1000:9.1f} ms  ({serial_calls} download calls)")
+    print(f"  batched         : {batch_time * 1000:9.1f} ms  ({batch_calls} download calls)")
+    print(f"  speedup         : {serial_time / batch_time:9.1f}x")
+    print(f"  max |diff|      : {max_diff:.2e} (over {len(merged)} tickers)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Rolling correlation, volatility and beta: DataFrame.corr/cov and a
+Series.cov per ticker for every window vs risk.py's incremental pairwise
+sums over the whole universe.
+
+    python -m benchmarks.bench_risk [--tickers 100,500,1000] [--days 253] [--window 63]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import stockview
+from benchmarks import fixtures
+from risk import RISK_STEP, TRADING_DAYS, risk_analytics, window_ends
+
+
+def legacy_risk(closes, symbols, window, step):
+    """The per-window pandas formulation: corr and cov of each window, then a beta per ticker."""
+    returns = pd.DataFrame(closes, columns=symbols).pct_change(fill_method=None).iloc[1:]
+    min_periods = max(window // 2, 2)
+    corr = cov = None
+    betas, vols, avg_corr = [], [], []
+    for end in window_ends(len(returns), window, step):
+        frame = returns.iloc[end - window:end]
+        corr = frame.corr(min_periods=min_periods)
+        cov = frame.cov(min_periods=min_periods)
+        bench = frame.mean(axis=1)
+        values = corr.to_numpy()
+        avg_corr.append(np.nanmean(values[~np.eye(len(values), dtype=bool)]))
+        vols.append(frame.std() * np.sqrt(TRADING_DAYS) * 100)
+        betas.append([frame[s].cov(bench, min_periods=min_periods) / bench[frame[s].notna()].var()
+                      for s in symbols])
+    return corr.to_numpy(), cov.to_numpy(), np.array(avg_corr), np.array(betas)
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', default='100,500,1000')
+    parser.add_argument('--days', type=int, default=TRADING_DAYS + 1)
+    parser.add_argument('--window', type=int, default=63)
+    args = parser.parse_args()
+
+    sectors = sorted(set(stockview.TICKERS.values()))
+    print(f"{args.window}-day windows every {RISK_STEP} days over {args.days} days")
+    print(f"{'tickers':>8} {'pandas s':>10} {'blocked s':>10} {'speedup':>8}")
+    for n in (int(x) for x in args.tickers.split(',')):
+        universe = {f'U{i:05d}': sectors[i % len(sectors)] for i in range(n)}
+        frames = fixtures.synthetic_yfinance_frames(universe, args.days)
+        closes = np.column_stack([frames[s]['Close'].to_numpy() for s in universe])
+        # Late listings and a trading halt, so pairs see different days
+        closes[:args.days // 3, ::17] = np.nan
+        closes[100:105, ::29] = np.nan
+        symbols = list(universe)
+
+        old_time, (corr, cov, avg_corr, betas) = _timed(legacy_risk, closes, symbols, args.window, RISK_STEP)
+        new_time, report = _timed(risk_analytics, closes, symbols, universe, args.window)
+        print(f"{n:8d} {old_time:10.3f} {new_time:10.3f} {old_time / new_time:7.1f}x")
+
+        # Same numbers as pandas
+        assert np.allclose(report['corr'], corr, equal_nan=True, atol=1e-9)
+        assert np.allclose(report['cov'], cov, equal_nan=True, atol=1e-12)
+        assert np.allclose(report['avg_corr'], avg_corr, equal_nan=True, atol=1e-9)
+        assert np.allclose(report['rolling_beta'], betas, equal_nan=True, atol=1e-9)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Start-up cost: importing each entry point in a fresh interpreter, and a new
+server process's first /analyze request with and without the warm-up step,
+in both chart modes.
+
+Every measurement runs in its own child process, so nothing is imported or
+cached beforehand. Alpha Vantage is replayed in-process.
+
+    python -m benchmarks.bench_startup [--repeat 3]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ENTRY_POINTS = ('data_fetcher', 'watchlist', 'stockview', 'stockviewer', 'backtest')
+HEAVY = ('pandas', 'matplotlib', 'mplfinance', 'plotly', 'yfinance')
+
+
+def _child_env(cache):
+    env = dict(os.environ)
+    env.update({
+        'STOCKVIEW_CACHE_DIR': cache,
+        'STOCKVIEW_HISTORY_DB': os.path.join(cache, 'history.sqlite'),
+        'STOCKVIEW_PANEL_DIR': os.path.join(cache, 'panel'),
+        'STOCKVIEW_INTRADAY_DIR': os.path.join(cache, 'intraday'),
+        'ALPHAVANTAGE_CALLS_PER_MINUTE': '1000000',
+        'ALPHAVANTAGE_CALLS_PER_DAY': '0',
+    })
+    return env
+
+def _run_child(args, env):
+    """Run this module in a child process and return the JSON it prints last."""
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', *args],
+                         capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ==============================================================================
+# CHILD PROCESSES
+# ==============================================================================
+def child_import(module):
+    start = time.perf_counter()
+    __import__(module)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'loaded': [name for name in HEAVY if name in sys.modules]}
+
+def _analyze(client, symbol):
+    """POST /analyze, poll the job, then fetch the results page and its chart, like a browser."""
+    response = client.post('/analyze', data={'symbol': symbol, 'api_key': 'bench'})
+    results_url = response.headers['Location']
+    status_url = results_url.replace('/results/', '/jobs/')
+    while client.get(status_url).get_json()['state'] == 'running':
+        time.sleep(0.005)
+    page = client.get(results_url).get_data(as_text=True)
+    image = re.search(r'/chart/[0-9a-f]{40}\.png', page)
+    chart = client.get(image.group(0) if image else f'/chart-data/{symbol}?range=1y&width=1200')
+    assert chart.status_code == 200, chart.status_code
+
+def child_server(chart_mode, warm):
+    os.environ['STOCKVIEW_CHART_MODE'] = chart_mode
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        start = time.perf_counter()
+        import av_client
+        import stockviewer
+        from benchmarks import fixtures
+        imported = time.perf_counter() - start
+        av_client._session = fixtures.AlphaVantageReplay()
+        warm_up = stockviewer.warm_up() if warm else 0.0
+        client = stockviewer.app.test_client()
+        latencies = []
+        for symbol in ('STARTA', 'STARTB'):
+            start = time.perf_counter()
+            _analyze(client, symbol)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        sys.stdout = stdout
+    return {'import': imported, 'warm_up': warm_up, 'first': latencies[0], 'second': latencies[1]}
+
+
+# ==============================================================================
+# REPORT
+# ==============================================================================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        kind, *rest = args.child
+        result = child_import(rest[0]) if kind == 'import' else child_server(rest[0], rest[1] == 'warm')
+        print(json.dumps(result))
+        return
+
+    cache = tempfile.mkdtemp(prefix='stockview-startup-')
+    env = _child_env(cache)
+    print("Import in a fresh interpreter (best of %d)" % args.repeat)
+    print(f"  {'module':14} {'ms':>8}  heavy libraries loaded")
+    for module in ENTRY_POINTS:
+        runs = [_run_child(['import', module], env) for _ in range(args.repeat)]
+        best = min(r['seconds'] for r in runs)
+        print(f"  {module:14} {best * 1000:8.1f}  {', '.join(runs[0]['loaded']) or '-'}")
+
+    print("\nNew server process, first and second /analyze request (seconds, best of %d)" % args.repeat)
+    print(f"  {'chart mode':12} {'warm-up':8} {'import':>7} {'warm-up':>8} {'first':>7} {'second':>7}")
+    for chart_mode in ('interactive', 'png'):
+        for warm in ('cold', 'warm'):
+            runs = []
+            for i in range(args.repeat):
+                # A fresh cache each run, so the first request really downloads and renders
+                runs.append(_run_child(['server', chart_mode, warm], _child_env(tempfile.mkdtemp(dir=cache))))
+            best = {k: min(r[k] for r in runs) for k in runs[0]}
+            print(f"  {chart_mode:12} {warm:8} {best['import']:7.2f} {best['warm_up']:8.2f} "
+                  f"{best['first']:7.2f} {best['second']:7.2f}")
+
+if __name__ == '__main__':
+    main()
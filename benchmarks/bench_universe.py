@@ -0,0 +1,99 @@
+"""
+Ranking, sector filtering and sector aggregates on a large universe:
+full sorts and string matching vs partial selection and categorical sectors.
+
+    python -m benchmarks.bench_universe [--tickers 5000] [--repeat 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+import yfinance
+
+import stockview
+from benchmarks import fixtures
+
+
+def _timed(func, *args, repeat=1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+# The previous implementations, kept here as the baseline
+def legacy_winners_losers(df, top_n=3):
+    df = df.copy()
+    df['Return'] = pd.to_numeric(df['Return'], errors='coerce')
+    df = df.dropna(subset=['Return'])
+    return df.sort_values('Return', ascending=False).head(top_n), df.sort_values('Return').head(top_n)
+
+def legacy_filter(df, sector):
+    return df[df['Sector'].astype(str).str.lower() == sector.lower()]
+
+def legacy_summary(df):
+    rows = []
+    for sector in sorted(df['Sector'].astype(str).unique()):
+        subset = legacy_filter(df, sector)['Return']
+        rows.append({'Sector': sector, 'Tickers': len(subset), 'Mean': subset.mean(),
+                     'Median': subset.median(), 'Breadth': (subset > 0).mean() * 100})
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    sectors = sorted(set(stockview.TICKERS.values()))
+    universe = {f'U{i:05d}': sectors[i % len(sectors)] for i in range(args.tickers)}
+    path = os.path.join(tempfile.mkdtemp(prefix='stockview-universe-'), 'universe.csv')
+    pd.DataFrame({'Ticker': list(universe), 'Sector': list(universe.values())}).to_csv(path, index=False)
+
+    frames = fixtures.synthetic_yfinance_frames(universe, fixtures.PERIOD_DAYS['1mo'])
+    original = yfinance.download
+    yfinance.download = fixtures.ReplayDownload(frames, {}, latency=False)
+    try:
+        load_time, loaded = _timed(stockview.load_universe, path, repeat=3)
+        returns_time, df = _timed(stockview.get_all_returns, loaded, '1mo', repeat=3)
+    finally:
+        yfinance.download = original
+
+    legacy_df = df.assign(Sector=df['Sector'].astype(str))
+    sector = sectors[0].upper()
+    index_time, index = _timed(stockview.sector_index, df, repeat=args.repeat)
+
+    cases = [
+        ('top/bottom 3', (legacy_winners_losers, legacy_df), (stockview.top_bottom, df)),
+        ('filter by sector', (legacy_filter, legacy_df, sector), (stockview.filter_by_sector, df, sectors[0].lower())),
+        ('sector rows (index)', (legacy_filter, legacy_df, sector), (lambda rows: df.iloc[rows], index[sectors[0]])),
+        ('sector summary', (legacy_summary, legacy_df), (stockview.sector_summary, df)),
+    ]
+
+    print(f"Universe: {len(loaded)} tickers, {len(sectors)} sectors")
+    print(f"  load_universe (CSV)   : {load_time * 1000:9.2f} ms")
+    print(f"  get_all_returns       : {returns_time * 1000:9.2f} ms  (replayed, no latency)")
+    print(f"  sector_index (once)   : {index_time * 1000:9.2f} ms")
+    print(f"{'':22} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (old_fn, *old_args), (new_fn, *new_args) in cases:
+        old_time, _ = _timed(old_fn, *old_args, repeat=args.repeat)
+        new_time, _ = _timed(new_fn, *new_args, repeat=args.repeat)
+        print(f"  {name:20} {old_time * 1000:10.3f} {new_time * 1000:10.3f} {old_time / new_time:7.1f}x")
+
+    # Same answers as the baseline
+    winners, losers = stockview.top_bottom(df)
+    old_winners, old_losers = legacy_winners_losers(legacy_df)
+    assert winners['Ticker'].tolist() == old_winners['Ticker'].tolist()
+    assert losers['Ticker'].tolist() == old_losers['Ticker'].tolist()
+    summary = stockview.sector_summary(df)
+    assert (summary['Tickers'].to_numpy() == legacy_summary(legacy_df)['Tickers'].to_numpy()).all()
+
+if __name__ == '__main__':
+    main()
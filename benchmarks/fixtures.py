@@ -0,0 +1,360 @@
+"""
+Recorded market-data fixtures for the offline benchmarks.
+
+Fixtures live under benchmarks/data/ (not committed). Record them once with
+network access, or synthesize a deterministic stand-in when offline:
+
+    python -m benchmarks.bench_returns --record
+    python -m benchmarks.bench_returns --synthetic
+    python -m benchmarks.bench_parser --record AAPL --api-key YOUR_KEY
+
+AlphaVantageServer serves the same bodies over real HTTP on localhost, so
+the app's whole request path (session, rate limiter, decoding) is exercised.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+YF_DIR = os.path.join(DATA_DIR, 'yfinance')
+AV_DIR = os.path.join(DATA_DIR, 'alphavantage')
+
+YF_FIELDS = ['Adj Close', 'Close', 'High', 'Low', 'Open', 'Volume']
+
+# Trading days covered by each yfinance period string
+PERIOD_DAYS = {'1d': 1, '5d': 5, '7d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260}
+
+
+# ==============================================================================
+# YFINANCE FIXTURES
+# ==============================================================================
+def _yf_dir(period):
+    return os.path.join(YF_DIR, period)
+
+def record_yfinance(tickers, period, batch_size=100):
+    """Download real bars per ticker and per batch, recording call latencies."""
+    import yfinance as yf
+    path = _yf_dir(period)
+    os.makedirs(path, exist_ok=True)
+    single_latency = {}
+    for ticker in tickers:
+        start = time.perf_counter()
+        data = yf.download(ticker, period=period, interval='1d', progress=False, auto_adjust=False)
+        single_latency[ticker] = time.perf_counter() - start
+        if isinstance(data.columns, pd.MultiIndex):
+            data = data.xs(ticker, axis=1, level=1)
+        if not data.empty:
+            data.to_csv(os.path.join(path, f"{ticker}.csv"))
+    symbols = list(tickers)
+    batch_latency = []
+    for i in range(0, len(symbols), batch_size):
+        chunk = symbols[i:i + batch_size]
+        start = time.perf_counter()
+        yf.download(chunk, period=period, interval='1d', group_by='column', progress=False, auto_adjust=False)
+        batch_latency.append([len(chunk), time.perf_counter() - start])
+    _write_meta(path, {'source': 'recorded', 'period': period,
+                       'single_latency': single_latency, 'batch_latency': batch_latency})
+
+def synthetic_yfinance_frames(tickers, days, seed=0):
+    """Deterministic random-walk daily frames in yfinance's layout, keyed by ticker."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp('2024-12-31'), periods=days, name='Date')
+    frames = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))
+        open_ = close * (1 + rng.normal(0, 0.005, days))
+        frames[ticker] = pd.DataFrame({
+            'Adj Close': close,
+            'Close': close,
+            'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, days)),
+            'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, days)),
+            'Open': open_,
+            'Volume': rng.integers(1_000_000, 50_000_000, days)
+        }, index=index)
+    return frames
+
+def synthesize_yfinance(tickers, period, seed=0, single_latency=0.25, batch_latency=1.5):
+    """Write a deterministic random-walk fixture in the recorded layout."""
+    path = _yf_dir(period)
+    os.makedirs(path, exist_ok=True)
+    frames = synthetic_yfinance_frames(tickers, PERIOD_DAYS.get(period, 252), seed)
+    for ticker, frame in frames.items():
+        frame.to_csv(os.path.join(path, f"{ticker}.csv"))
+    _write_meta(path, {'source': 'synthetic', 'period': period,
+                       'single_latency': {t: single_latency for t in tickers},
+                       'batch_latency': [[len(tickers), batch_latency]]})
+
+def load_yfinance(period):
+    """Load a recorded period. Returns (dict of ticker -> DataFrame, meta dict)."""
+    path = _yf_dir(period)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    frames = {}
+    for name in os.listdir(path):
+        if name.endswith('.csv'):
+            frames[name[:-4]] = pd.read_csv(os.path.join(path, name), index_col=0, parse_dates=True)
+    return frames, meta
+
+def _write_meta(path, meta):
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+class ReplayDownload:
+    """
+    Drop-in replacement for yf.download that serves recorded frames.
+    With latency=True each call sleeps for the recorded wall time, so the
+    per-ticker loop and the batched path pay their real round-trip cost.
+    """
+
+    def __init__(self, frames, meta, latency=True):
+        self.frames = frames
+        # One wide (field, ticker) frame, so each reply is a column selection
+        self.wide = None
+        if frames:
+            self.wide = pd.concat([frame[YF_FIELDS] for frame in frames.values()], axis=1, keys=list(frames),
+                                  names=['Ticker', 'Price']).swaplevel(axis=1)
+        self.latency = latency
+        self.single_latency = meta.get('single_latency', {})
+        batches = meta.get('batch_latency') or [[1, 0.0]]
+        self.batch_latency_per_ticker = sum(s for _, s in batches) / max(sum(n for n, _ in batches), 1)
+        self.calls = 0
+
+    def __call__(self, tickers, period=None, **kwargs):
+        self.calls += 1
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        if self.latency:
+            if isinstance(tickers, str):
+                time.sleep(self.single_latency.get(tickers, 0.0))
+            else:
+                time.sleep(self.batch_latency_per_ticker * len(symbols))
+        full = pd.MultiIndex.from_product([YF_FIELDS, symbols], names=['Price', 'Ticker'])
+        if not any(symbol in self.frames for symbol in symbols):
+            return pd.DataFrame(columns=full)
+        # Unknown tickers come back as all-NaN columns, as yfinance does
+        return self.wide.reindex(columns=full).dropna(how='all').sort_index()
+
+
+# ==============================================================================
+# ALPHA VANTAGE FIXTURES
+# ==============================================================================
+def av_fixture_path(function, symbol, variant=''):
+    name = f"{function}_{symbol}{'_' + variant if variant else ''}.json"
+    return os.path.join(AV_DIR, name)
+
+def record_alpha_vantage(function, symbol, api_key, variant='', **params):
+    """Save one raw Alpha Vantage response body, byte for byte."""
+    import requests
+    os.makedirs(AV_DIR, exist_ok=True)
+    response = requests.get('https://www.alphavantage.co/query',
+                            params=dict(params, function=function, symbol=symbol, apikey=api_key), timeout=60)
+    response.raise_for_status()
+    path = av_fixture_path(function, symbol, variant)
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return path
+
+def synthesize_daily_adjusted(symbol, bars=6000, seed=0, variant='full'):
+    """Write a TIME_SERIES_DAILY_ADJUSTED body in Alpha Vantage's layout (newest first)."""
+    os.makedirs(AV_DIR, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp('2024-12-31'), periods=bars)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, bars)))
+    open_ = close * (1 + rng.normal(0, 0.005, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, bars))
+    volume = rng.integers(1_000_000, 90_000_000, bars)
+    series = {}
+    for i in range(bars - 1, -1, -1):
+        series[index[i].strftime('%Y-%m-%d')] = {
+            '1. open': f'{open_[i]:.4f}', '2. high': f'{high[i]:.4f}',
+            '3. low': f'{low[i]:.4f}', '4. close': f'{close[i]:.4f}',
+            '5. adjusted close': f'{close[i]:.4f}', '6. volume': str(volume[i]),
+            '7. dividend amount': '0.0000', '8. split coefficient': '1.0',
+        }
+    body = {
+        'Meta Data': {'1. Information': 'Daily Time Series with Splits and Dividend Events',
+                      '2. Symbol': symbol, '3. Last Refreshed': index[-1].strftime('%Y-%m-%d'),
+                      '4. Output Size': 'Full size', '5. Time Zone': 'US/Eastern'},
+        'Time Series (Daily)': series,
+    }
+    path = av_fixture_path('TIME_SERIES_DAILY_ADJUSTED', symbol, variant)
+    with open(path, 'w') as f:
+        json.dump(body, f, indent=4)
+    return path
+
+def load_alpha_vantage(function, symbol, variant=''):
+    """Raw bytes of a recorded response."""
+    with open(av_fixture_path(function, symbol, variant), 'rb') as f:
+        return f.read()
+
+
+class _ReplayResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} from replay")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AlphaVantageReplay:
+    """
+    Stand-in for av_client's requests.Session: answers Alpha Vantage queries
+    from recorded bodies under data/alphavantage/, synthesizing a
+    deterministic body for any symbol that was not recorded.
+    """
+
+    def __init__(self, latency=0.0, bars=1500):
+        self.latency = latency
+        self.bars = bars
+        self.calls = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def body(self, params):
+        function = params['function']
+        symbol = params.get('symbol', '')
+        variant = params.get('outputsize', '')
+        key = (function, symbol, variant, self.bars)
+        with self._lock:
+            if key not in self._cache:
+                path = av_fixture_path(function, symbol, variant)
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        self._cache[key] = f.read()
+                else:
+                    self._cache[key] = json.dumps(synthetic_body(function, symbol, variant, self.bars)).encode()
+            return self._cache[key]
+
+    def get(self, url, params=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return _ReplayResponse(self.body(params or {}))
+
+
+class AlphaVantageServer:
+    """
+    A local HTTP stand-in for the Alpha Vantage query endpoint, answering
+    from an AlphaVantageReplay. Point av_client.BASE_URL at `url`.
+    """
+
+    def __init__(self, replay=None, host='127.0.0.1', port=0):
+        self.replay = replay or AlphaVantageReplay()
+        replay = self.replay
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the app's pooled session reuses its connections
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                if 'function' not in params:
+                    self.send_error(400, 'missing function')
+                    return
+                body = replay.get(self.path, params).content
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_port}/query'
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='av-stand-in', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def synthetic_minute_bars(symbol, days=20, end='2024-12-31'):
+    """
+    One-minute OHLCV bars over `days` business days, ascending: every minute of
+    the regular session plus a thinner pre- and post-market, as traded.
+    """
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    minutes = np.arange(4 * 60, 20 * 60)
+    regular = (minutes >= 9 * 60 + 30) & (minutes < 16 * 60)
+    # Roughly one extended-hours minute in four has a trade
+    traded = regular[None, :] | (rng.random((days, len(minutes))) < 0.25)
+    dates = pd.bdate_range(end=pd.Timestamp(end), periods=days).values.astype('datetime64[m]')
+    index = pd.DatetimeIndex((dates[:, None] + minutes[None, :])[traded].astype('datetime64[ns]'))
+    n = len(index)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.0002, n))
+    spread = np.abs(rng.normal(0, 0.0005, n))
+    return pd.DataFrame({
+        'Open': open_, 'High': np.maximum(open_, close) * (1 + spread),
+        'Low': np.minimum(open_, close) * (1 - spread), 'Close': close,
+        'Volume': rng.integers(100, 50000, n).astype(np.float64),
+    }, index=index)
+
+
+def synthetic_body(function, symbol, variant='', bars=1500):
+    """A deterministic Alpha Vantage-shaped body for `function`."""
+    seed = sum(map(ord, symbol))
+    rng = np.random.default_rng(seed)
+    if function == 'OVERVIEW':
+        return {'Symbol': symbol, 'Name': f'{symbol} Corp', 'Exchange': 'NYSE',
+                'Description': 'Synthetic benchmark company.', 'EPS': f'{rng.uniform(1, 10):.2f}',
+                'PERatio': f'{rng.uniform(5, 40):.2f}', 'DebtToEquityRatio': f'{rng.uniform(0, 2):.2f}',
+                'ReturnOnEquityTTM': f'{rng.uniform(0, 0.4):.3f}'}
+    if function == 'GLOBAL_QUOTE':
+        price = rng.uniform(20, 500) * (1 + rng.normal(0, 0.001))
+        return {'Global Quote': {'01. symbol': symbol, '02. open': f'{price:.4f}', '03. high': f'{price * 1.01:.4f}',
+                                 '04. low': f'{price * 0.99:.4f}', '05. price': f'{price:.4f}',
+                                 '06. volume': str(int(rng.integers(1e6, 5e7))), '07. latest trading day': '2024-12-31',
+                                 '08. previous close': f'{price * 0.995:.4f}', '09. change': f'{price * 0.005:.4f}',
+                                 '10. change percent': '0.5025%'}}
+    if function.startswith('TIME_SERIES_DAILY'):
+        n = 100 if variant == 'compact' else bars
+        index = pd.bdate_range(end=pd.Timestamp('2024-12-31'), periods=n)
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        series = {}
+        for i in range(n - 1, -1, -1):
+            series[index[i].strftime('%Y-%m-%d')] = {
+                '1. open': f'{open_[i]:.4f}', '2. high': f'{max(open_[i], close[i]) * 1.005:.4f}',
+                '3. low': f'{min(open_[i], close[i]) * 0.995:.4f}', '4. close': f'{close[i]:.4f}',
+                '5. adjusted close': f'{close[i]:.4f}', '6. volume': str(int(rng.integers(1e6, 5e7))),
+                '7. dividend amount': '0.0000', '8. split coefficient': '1.0'}
+        return {'Meta Data': {'2. Symbol': symbol}, 'Time Series (Daily)': series}
+    if function == 'TIME_SERIES_INTRADAY':
+        df = synthetic_minute_bars(symbol)
+        if variant == 'compact':
+            df = df.iloc[-100:]
+        series = {}
+        for stamp, row in zip(df.index.strftime('%Y-%m-%d %H:%M:%S')[::-1], df.to_numpy()[::-1]):
+            series[stamp] = {'1. open': f'{row[0]:.4f}', '2. high': f'{row[1]:.4f}', '3. low': f'{row[2]:.4f}',
+                             '4. close': f'{row[3]:.4f}', '5. volume': str(int(row[4]))}
+        return {'Meta Data': {'2. Symbol': symbol, '4. Interval': '1min'}, 'Time Series (1min)': series}
+    return {'Error Message': f'Unsupported function in replay: {function}'}
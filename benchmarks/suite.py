@@ -0,0 +1,325 @@
+"""
+Offline benchmark suite: latency and throughput of each pipeline stage and
+of the whole /analyze request, at several history lengths, chart ranges and
+universe sizes, written as JSON so versions can be compared.
+
+Alpha Vantage is served by a local HTTP stand-in (fixtures.AlphaVantageServer)
+so the app's real request path is exercised; recorded bodies under
+benchmarks/data/alphavantage/ are used when present. yfinance has no
+configurable endpoint, so its downloads are replayed in-process.
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+    python -m benchmarks.suite --quick
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Configure before the app modules read their settings at import time
+_CACHE = tempfile.mkdtemp(prefix='stockview-suite-')
+os.environ['STOCKVIEW_CACHE_DIR'] = _CACHE
+os.environ['STOCKVIEW_HISTORY_DB'] = os.path.join(_CACHE, 'history.sqlite')
+os.environ['STOCKVIEW_PANEL_DIR'] = os.path.join(_CACHE, 'panel')
+os.environ['ALPHAVANTAGE_CALLS_PER_MINUTE'] = '1000000'
+os.environ['ALPHAVANTAGE_CALLS_PER_DAY'] = '0'
+
+import yfinance
+
+import av_client
+import metrics
+import stockview
+import stockviewer
+from benchmarks import fixtures
+from price_panel import PricePanel
+
+HISTORY_LENGTHS = (100, 1000, 5000)
+CHART_DATA_RANGES = ('1y', '5y', 'max')
+UNIVERSE_SIZES = (10, 100, 500, 2000)
+SECTORS = sorted(set(stockview.TICKERS.values()))
+
+# Slowdown of a case's median, relative to the baseline, reported as a regression.
+REGRESSION_THRESHOLD = 0.20
+
+
+class Suite:
+    """Runs cases and collects one result record per case."""
+
+    def __init__(self, repeat, out=None):
+        self.repeat = repeat
+        self.out = out or sys.stdout
+        self.results = []
+        self._symbols = 0
+
+    def log(self, message):
+        # The app prints progress lines; the suite's own output goes to `out`
+        print(message, file=self.out, flush=True)
+
+    def fresh_symbol(self, prefix='S'):
+        """A symbol never seen before, so history, fundamentals and charts are all cold."""
+        self._symbols += 1
+        return f'{prefix}{self._symbols:05d}'
+
+    def measure(self, name, params, fn, setup=None, items=None):
+        """
+        Time `fn(state)` `repeat` times, calling `setup()` untimed before each
+        run to produce `state`. `items` is the work per run (bars, tickers)
+        used to report an item rate alongside calls per second.
+        """
+        samples = []
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            fn(state)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        mean = statistics.fmean(samples)
+        record = {
+            'name': name,
+            'params': params,
+            'runs': len(samples),
+            'mean_s': mean,
+            'p50_s': statistics.median(samples),
+            'p95_s': samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+            'min_s': samples[0],
+            'max_s': samples[-1],
+            'per_second': 1 / mean if mean else None,
+        }
+        if items:
+            record['items_per_second'] = items / mean if mean else None
+        self.results.append(record)
+        label = case_id(record)
+        self.log(f"  {label:<58} p50 {record['p50_s'] * 1000:10.2f} ms   p95 {record['p95_s'] * 1000:10.2f} ms")
+        return record
+
+
+def case_id(record):
+    params = ','.join(f'{k}={v}' for k, v in sorted(record['params'].items()))
+    return f"{record['name']}[{params}]"
+
+
+# ==============================================================================
+# CASES
+# ==============================================================================
+def bench_analysis(suite, server, lengths):
+    """get_stock_data, run_technical_analysis, create_chart and /analyze per history length."""
+    client = stockviewer.app.test_client()
+    for bars in lengths:
+        server.replay.bars = bars
+        suite.log(f"History length {bars} bars")
+
+        def cold_symbol():
+            symbol = suite.fresh_symbol()
+            # Build the stand-in's bodies outside the timed region
+            for function, variant in (('TIME_SERIES_DAILY_ADJUSTED', 'full'), ('OVERVIEW', '')):
+                server.replay.body({'function': function, 'symbol': symbol, 'outputsize': variant})
+            return symbol
+
+        suite.measure('get_stock_data', {'bars': bars, 'cache': 'cold'},
+                      lambda symbol: stockviewer.get_stock_data(symbol, 'bench'),
+                      setup=cold_symbol, items=bars)
+        warm = cold_symbol()
+        stockviewer.get_stock_data(warm, 'bench')
+        suite.measure('get_stock_data', {'bars': bars, 'cache': 'warm'},
+                      lambda _: stockviewer.get_stock_data(warm, 'bench'), items=bars)
+
+        df, overview, error = stockviewer.get_stock_data(warm, 'bench')
+        assert error is None, error
+        suite.measure('run_technical_analysis', {'bars': bars, 'state': 'full'},
+                      lambda frame: stockviewer.run_technical_analysis(frame),
+                      setup=lambda: df.copy(), items=bars)
+        stockviewer.run_technical_analysis(df.copy(), warm)
+        suite.measure('run_technical_analysis', {'bars': bars, 'state': 'incremental'},
+                      lambda frame: stockviewer.run_technical_analysis(frame, warm),
+                      setup=lambda: df.copy(), items=bars)
+
+        analyzed = stockviewer.run_technical_analysis(df.copy())
+        suite.measure('create_chart', {'bars': bars, 'cache': 'cold'},
+                      lambda name: stockviewer.create_chart(analyzed, warm, {'Name': name}),
+                      setup=lambda: suite.fresh_symbol('Chart '))
+        stockviewer.create_chart(analyzed, warm, overview)
+        suite.measure('create_chart', {'bars': bars, 'cache': 'warm'},
+                      lambda _: stockviewer.create_chart(analyzed, warm, overview))
+
+        suite.measure('analyze_request', {'bars': bars, 'cache': 'cold'},
+                      lambda symbol: _analyze_request(client, symbol), setup=cold_symbol)
+        suite.measure('analyze_request', {'bars': bars, 'cache': 'warm'},
+                      lambda _: _analyze_request(client, warm))
+
+def _analyze_request(client, symbol):
+    """POST /analyze, poll the job and fetch the results page and chart, like a browser."""
+    response = client.post('/analyze', data={'symbol': symbol, 'api_key': 'bench'})
+    results_url = response.headers['Location']
+    status_url = results_url.replace('/results/', '/jobs/')
+    while True:
+        job = client.get(status_url).get_json()
+        if job['state'] != 'running':
+            break
+        time.sleep(0.005)
+    assert job['state'] == 'done', job.get('error')
+    page = client.get(results_url)
+    assert page.status_code == 200
+    # Server-rendered PNG in 'png' chart mode, otherwise the interactive chart's data
+    image = re.search(r'/chart/[0-9a-f]{40}\.png', page.get_data(as_text=True))
+    chart_url = image.group(0) if image else f'/chart-data/{symbol}?range=1y&width=1200'
+    assert client.get(chart_url).status_code == 200
+
+def bench_chart_data(suite, server, ranges):
+    """/chart-data per range: payload size should follow the client width, not the history length."""
+    client = stockviewer.app.test_client()
+    with client.session_transaction() as session:
+        session['api_key'] = 'bench'
+    server.replay.bars = 6000
+    symbol = suite.fresh_symbol()
+    client.get(f'/chart-data/{symbol}?range=max')
+    for range_name in ranges:
+        suite.log(f"Chart data for range {range_name}")
+        widths = iter(range(1000, 1000 + suite.repeat))
+        # A new width each run misses the cache; the history itself is already stored
+        suite.measure('chart_data', {'range': range_name, 'cache': 'cold'},
+                      lambda width: client.get(f'/chart-data/{symbol}?range={range_name}&width={width}'),
+                      setup=lambda: next(widths))
+        response = client.get(f'/chart-data/{symbol}?range={range_name}&width=1200')
+        record = suite.measure('chart_data', {'range': range_name, 'cache': 'warm'},
+                               lambda _: client.get(f'/chart-data/{symbol}?range={range_name}&width=1200'))
+        record['payload_bytes'] = len(response.data)
+
+def bench_returns(suite, sizes, latency):
+    """stockview.get_all_returns and show_winners_losers per universe size."""
+    for size in sizes:
+        suite.log(f"Universe of {size} tickers")
+        tickers = {f'U{i:05d}': SECTORS[i % len(SECTORS)] for i in range(size)}
+        frames = fixtures.synthetic_yfinance_frames(tickers, fixtures.PERIOD_DAYS['1mo'])
+        meta = {'single_latency': {t: 0.25 for t in tickers}, 'batch_latency': [[100, 1.5]]}
+        replay = fixtures.ReplayDownload(frames, meta, latency=latency)
+        original = yfinance.download
+        yfinance.download = replay
+        try:
+            suite.measure('get_all_returns', {'tickers': size, 'latency': latency},
+                          lambda _: stockview.get_all_returns(tickers, '1mo'), items=size)
+            replay.latency = False
+            table = stockview.get_all_returns(tickers, '1mo')
+        finally:
+            yfinance.download = original
+        suite.measure('show_winners_losers', {'tickers': size},
+                      lambda _: stockview.show_winners_losers(table), items=size)
+
+def bench_screen(suite, sizes):
+    """stockview.screen_universe on a cached year of history per universe size."""
+    query = 'RSI < 30 and close above SMA_200'
+    for size in sizes:
+        tickers = {f'U{i:05d}': SECTORS[i % len(SECTORS)] for i in range(size)}
+        frames = fixtures.synthetic_yfinance_frames(tickers, fixtures.PERIOD_DAYS['1y'])
+        original = yfinance.download
+        yfinance.download = fixtures.ReplayDownload(frames, {}, latency=False)
+        try:
+            panel = PricePanel(os.path.join(_CACHE, 'panel', f'screen-{size}'))
+            engine = stockview.ReturnEngine(tickers, panel=panel)
+            engine.history()
+        finally:
+            yfinance.download = original
+        suite.measure('screen', {'tickers': size},
+                      lambda _: stockview.screen_universe(engine, query), items=size)
+
+
+# ==============================================================================
+# OUTPUT
+# ==============================================================================
+def environment():
+    try:
+        revision = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        revision = ''
+    return {
+        'revision': revision,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def stage_summary():
+    """Mean and count per pipeline stage, from the app's own timing spans."""
+    summary = {}
+    for stage, hist in metrics.registry.snapshot()['histograms'].items():
+        summary[stage] = {'count': hist['count'], 'mean_s': hist['sum'] / hist['count'] if hist['count'] else None}
+    return summary
+
+def compare(results, baseline_path, threshold):
+    """Print each case's median against the baseline. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {case_id(r): r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression: p50 more than {threshold:.0%} slower)")
+    for record in results:
+        label = case_id(record)
+        old = baseline.get(label)
+        if old is None:
+            print(f"  {label:<58} new")
+            continue
+        ratio = record['p50_s'] / old['p50_s'] if old['p50_s'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"  {label:<58} {ratio:6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=None, help='write results as JSON to this file')
+    parser.add_argument('--compare', default=None, help='baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='stand-in Alpha Vantage latency (s)')
+    parser.add_argument('--yf-latency', action='store_true', help='replay recorded yfinance latency')
+    parser.add_argument('--quick', action='store_true', help='smallest sizes only, 2 runs per case')
+    args = parser.parse_args()
+
+    lengths, ranges, sizes, repeat = HISTORY_LENGTHS, CHART_DATA_RANGES, UNIVERSE_SIZES, args.repeat
+    if args.quick:
+        lengths, ranges, sizes, repeat = HISTORY_LENGTHS[:2], CHART_DATA_RANGES[:2], UNIVERSE_SIZES[:2], 2
+
+    suite = Suite(repeat)
+    devnull = open(os.devnull, 'w')
+    sys.stdout = devnull
+    try:
+        with fixtures.AlphaVantageServer(fixtures.AlphaVantageReplay(latency=args.latency)) as server:
+            av_client.BASE_URL = server.url
+            suite.log(f"Alpha Vantage stand-in at {server.url}, {repeat} runs per case")
+            bench_analysis(suite, server, lengths)
+            bench_chart_data(suite, server, ranges)
+            bench_returns(suite, sizes, args.yf_latency)
+            bench_screen(suite, sizes)
+            requests_served = server.replay.calls
+    finally:
+        sys.stdout = suite.out
+        devnull.close()
+
+    report = {
+        'environment': environment(),
+        'settings': {'repeat': repeat, 'latency': args.latency, 'yf_latency': args.yf_latency,
+                     'history_lengths': list(lengths), 'chart_data_ranges': list(ranges),
+                     'universe_sizes': list(sizes)},
+        'results': suite.results,
+        'stages': stage_summary(),
+        'stand_in_requests': requests_served,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare and compare(suite.results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+"""
+Persistent caches for StockView.
+
+Everything is stored through a backend shared by all worker processes:
+SQLiteBackend (a local file, the default) or RedisBackend (set
+STOCKVIEW_CACHE_URL=redis://...; falls back to SQLite when Redis is not
+installed or unreachable). Backends also provide named cross-process locks.
+
+TTLCache keeps JSON-serialisable values with stale-while-revalidate reads: a
+stale entry is returned immediately while a background thread refreshes it.
+
+ChartCache keeps rendered chart images in a bounded in-memory LRU in front of
+the shared backend.
+"""
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+CACHE_DIR = os.environ.get(
+    'STOCKVIEW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+
+CACHE_URL = os.environ.get('STOCKVIEW_CACHE_URL', '')
+
+
+# ==============================================================================
+# BACKENDS
+# ==============================================================================
+class SQLiteBackend:
+    """Namespaced blobs and leases in one SQLite file, shared by local processes."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'shared.sqlite')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS entries (namespace TEXT NOT NULL, key TEXT NOT NULL, '
+                'value BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL, '
+                'PRIMARY KEY (namespace, key)) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, token TEXT NOT NULL, '
+                'expires_at REAL NOT NULL) WITHOUT ROWID;'
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def get(self, namespace, key):
+        """Return (bytes, stored_at) or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value, stored_at, expires_at FROM entries WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+        if row is None or (row[2] is not None and row[2] < time.time()):
+            return None
+        return bytes(row[0]), row[1]
+
+    def set(self, namespace, key, value, ttl=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                (namespace, key, sqlite3.Binary(value), now, now + ttl if ttl else None)
+            )
+
+    def delete(self, namespace, key):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def items(self, namespace):
+        """All unexpired (key, bytes) pairs of a namespace."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT key, value FROM entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)',
+                (namespace, time.time())
+            ).fetchall()
+        return [(key, bytes(value)) for key, value in rows]
+
+    def prune(self, namespace, max_entries):
+        """Drop expired entries and keep only the `max_entries` most recent of a namespace."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries WHERE namespace = ? AND expires_at < ?', (namespace, time.time()))
+            conn.execute(
+                'DELETE FROM entries WHERE namespace = ? AND key IN ('
+                ' SELECT key FROM entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                (namespace, namespace, max_entries)
+            )
+
+    def try_lock(self, name, ttl):
+        """Take a lease on `name`; returns a release token or None if it is held."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM locks WHERE name = ? AND expires_at < ?', (name, now))
+            cursor = conn.execute('INSERT OR IGNORE INTO locks VALUES (?, ?, ?)', (name, token, now + ttl))
+        return token if cursor.rowcount == 1 else None
+
+    def unlock(self, name, token):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM locks WHERE name = ? AND token = ?', (name, token))
+
+
+class RedisBackend:
+    """The same interface on Redis, for workers spread over several hosts."""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.client.ping()
+
+    def _key(self, namespace, key):
+        return f'stockview:{namespace}:{key}'
+
+    def get(self, namespace, key):
+        raw = self.client.get(self._key(namespace, key))
+        if raw is None:
+            return None
+        return raw[8:], struct.unpack('d', raw[:8])[0]
+
+    def set(self, namespace, key, value, ttl=None):
+        self.client.set(self._key(namespace, key), struct.pack('d', time.time()) + value,
+                        ex=int(ttl) if ttl else None)
+
+    def delete(self, namespace, key):
+        self.client.delete(self._key(namespace, key))
+
+    def items(self, namespace):
+        prefix = self._key(namespace, '')
+        pairs = []
+        for name in self.client.scan_iter(match=prefix + '*'):
+            raw = self.client.get(name)
+            if raw is not None:
+                pairs.append((name.decode()[len(prefix):], raw[8:]))
+        return pairs
+
+    def prune(self, namespace, max_entries):
+        pass  # Bounded by Redis' own maxmemory eviction policy
+
+    def try_lock(self, name, ttl):
+        token = uuid.uuid4().hex
+        if self.client.set(f'stockview:lock:{name}', token, nx=True, ex=max(int(ttl), 1)):
+            return token
+        return None
+
+    def unlock(self, name, token):
+        key = f'stockview:lock:{name}'
+        if self.client.get(key) == token.encode():
+            self.client.delete(key)
+
+
+@contextmanager
+def backend_lock(backend, name, ttl=60, timeout=30, poll=0.05):
+    """
+    Hold a cross-process lock on `name` for the duration of the block.
+    Yields True once acquired, or False if `timeout` passed first (timeout=0
+    just tries once).
+    """
+    deadline = time.time() + timeout
+    token = backend.try_lock(name, ttl)
+    while token is None and time.time() < deadline:
+        time.sleep(poll)
+        token = backend.try_lock(name, ttl)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            backend.unlock(name, token)
+
+
+def backend_from_url(url):
+    """Build a backend from 'redis://...', 'sqlite:///path' or '' (default SQLite file)."""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            return RedisBackend(url)
+        except Exception as e:
+            # Local stand-in so a missing Redis doesn't take the app down
+            print(f"Redis cache unavailable ({e}); using the local SQLite cache instead.")
+            return SQLiteBackend()
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    return SQLiteBackend()
+
+
+_shared_backend = None
+_shared_lock = threading.Lock()
+
+
+def shared_backend():
+    """The process-wide backend configured by STOCKVIEW_CACHE_URL."""
+    global _shared_backend
+    with _shared_lock:
+        if _shared_backend is None:
+            _shared_backend = backend_from_url(CACHE_URL)
+        return _shared_backend
+
+
+# ==============================================================================
+# CACHES
+# ==============================================================================
+class TTLCache:
+    """
+    Key/value cache with a TTL and stale-while-revalidate reads.
+
+    Loaders follow the app's (value, error_message) convention; only values
+    returned without an error are stored. On a miss, workers take a shared
+    lock so only one of them calls the loader for a key; `lock_ttl` must cover
+    the slowest load, or a second worker calls the loader alongside it.
+    """
+
+    def __init__(self, name, ttl, backend=None, lock_ttl=60):
+        self.name = name
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.backend = backend or shared_backend()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0}
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+        metrics.inc('stockview_cache_events_total', cache=self.name, event=counter)
+
+    def peek(self, key):
+        """Return (value, age_in_seconds) or (None, None) without touching counters."""
+        entry = self.backend.get(self.name, key)
+        if entry is None:
+            return None, None
+        return json.loads(entry[0]), time.time() - entry[1]
+
+    def set(self, key, value):
+        self.backend.set(self.name, key, json.dumps(value).encode('utf-8'))
+
+    def get(self, key, loader):
+        """
+        Return (value, error_message) for `key`.
+        Fresh entries are returned as-is, stale ones are returned immediately and
+        refreshed in the background, and misses call `loader()` inline.
+        """
+        value, age = self.peek(key)
+        if age is not None and age <= self.ttl:
+            self._count('hits')
+            return value, None
+        if age is not None:
+            self._count('stale_hits')
+            self._refresh_in_background(key, loader)
+            return value, None
+
+        self._count('misses')
+        with backend_lock(self.backend, f'{self.name}:{key}', ttl=self.lock_ttl,
+                          timeout=self.lock_ttl) as acquired:
+            # Another worker may have loaded it while we waited, or, if the lock
+            # was never freed, before its holder died
+            value, age = self.peek(key)
+            if age is not None:
+                return value, None
+            if not acquired:
+                print(f"Cache lock {self.name}:{key} is still held; loading it here too.")
+            value, error = loader()
+            if error is None:
+                self.set(key, value)
+        return value, error
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def _refresh(self, key, loader):
+        try:
+            with backend_lock(self.backend, f'{self.name}:refresh:{key}', ttl=self.lock_ttl,
+                              timeout=0) as acquired:
+                if not acquired:
+                    return  # Another worker is already refreshing it
+                value, error = loader()
+            if error is None:
+                self.set(key, value)
+                self._count('refreshes')
+            else:
+                self._count('refresh_errors')
+        except Exception:
+            self._count('refresh_errors')
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, ttl=self.ttl)
+
+
+class ChartCache:
+    """Rendered chart images: a bounded in-memory LRU in front of the shared backend."""
+
+    def __init__(self, max_items=64, backend=None, namespace='charts', max_stored=2000):
+        self.max_items = max_items
+        self.backend = backend or shared_backend()
+        self.namespace = namespace
+        self.max_stored = max_stored
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0}
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached bytes for `key`, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+        if data is not None:
+            self._count_event('memory_hits')
+            return data
+        entry = self.backend.get(self.namespace, key)
+        if entry is None:
+            with self._lock:
+                self.counters['misses'] += 1
+            self._count_event('misses')
+            return None
+        self._remember(key, entry[0])
+        with self._lock:
+            self.counters['shared_hits'] += 1
+        self._count_event('shared_hits')
+        return entry[0]
+
+    def _count_event(self, event):
+        metrics.inc('stockview_cache_events_total', cache=self.namespace, event=event)
+
+    def put(self, key, data):
+        self._remember(key, data)
+        self.backend.set(self.namespace, key, data)
+        with self._lock:
+            self.counters['stores'] += 1
+            stores = self.counters['stores']
+        self._count_event('stores')
+        if stores % 50 == 0:
+            self.backend.prune(self.namespace, self.max_stored)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, memory_items=len(self._memory))
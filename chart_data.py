@@ -0,0 +1,127 @@
+"""
+Chart data for the interactive client chart.
+
+Instead of rendering an image on the server, the browser receives columnar
+OHLCV and indicator series decimated to its pixel width, so the payload size
+depends on the screen rather than on how many years of history are shown:
+
+- price and volume are aggregated into per-bucket OHLC candles (first open,
+  highest high, lowest low, last close, summed volume);
+- indicator lines are thinned with Largest-Triangle-Three-Buckets, which
+  keeps the points that carry the visual shape of the line.
+"""
+import numpy as np
+import pandas as pd
+
+# Named ranges the client can request, in trading days (None = all history).
+CHART_RANGES = {'3m': 63, '6m': 126, '1y': 252, '2y': 504, '5y': 1260, '10y': 2520, '20y': 5040, 'max': None}
+DEFAULT_RANGE = '1y'
+
+# Screen pixels per candle and per indicator-line point, and the accepted client widths.
+CANDLE_PX = 4
+LINE_PX = 2
+MIN_WIDTH, MAX_WIDTH = 100, 4000
+
+# Decimals kept in the payload; prices and indicators need no more on screen.
+DECIMALS = 4
+
+# Indicator lines drawn by the client chart (the same overlays as the PNG chart).
+CHART_LINES = ('SMA_50', 'SMA_200', 'Upper_Band', 'Lower_Band', 'RSI', 'MACD', 'Signal_Line')
+
+
+def clamp_width(width):
+    return max(MIN_WIDTH, min(MAX_WIDTH, int(width)))
+
+def bucket_edges(n, buckets):
+    """Row offsets splitting `n` rows into at most `buckets` contiguous, non-empty buckets."""
+    buckets = max(1, min(buckets, n))
+    return np.unique(np.linspace(0, n, buckets + 1).astype(np.int64))
+
+def ohlc_buckets(df, buckets):
+    """
+    Aggregate OHLCV rows into at most `buckets` candles.
+    Returns a dict of numpy columns: t (first bar's day), open, high, low, close, volume.
+    """
+    n = len(df)
+    if n == 0:
+        return {k: np.empty(0) for k in ('t', 'open', 'high', 'low', 'close', 'volume')}
+    edges = bucket_edges(n, buckets)
+    starts, ends = edges[:-1], edges[1:] - 1
+    high = df['High'].to_numpy(dtype=np.float64)
+    low = df['Low'].to_numpy(dtype=np.float64)
+    return {
+        't': _days(df.index)[starts],
+        'open': df['Open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.fmax.reduceat(high, starts),
+        'low': np.fmin.reduceat(low, starts),
+        'close': df['Close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(np.nan_to_num(df['Volume'].to_numpy(dtype=np.float64)), starts),
+    }
+
+def _days(index):
+    """Dates as whole days since 1970-01-01, the payload's compact time axis."""
+    return pd.DatetimeIndex(index).values.astype('datetime64[D]').astype(np.int64)
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `threshold` points of
+    (x, y) that preserve the line's shape. The first and last points are kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries over the interior points, and every bucket's centroid
+    edges = np.floor(np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's centroid is the third triangle vertex
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def line_series(df, column, points):
+    """An indicator column thinned to `points` with LTTB, skipping its warm-up NaNs."""
+    values = df[column].to_numpy(dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return {'t': [], 'v': []}
+    days = _days(df.index)[valid]
+    keep = lttb(days, values[valid], points)
+    return {'t': days[keep].tolist(), 'v': np.round(values[valid][keep], DECIMALS).tolist()}
+
+def chart_payload(df, width, lines=CHART_LINES):
+    """
+    The JSON-ready chart data for `df` (OHLCV plus indicator columns) drawn
+    `width` pixels wide: a candle every CANDLE_PX pixels and a line point
+    every LINE_PX pixels. Times (`t`) are days since 1970-01-01.
+    """
+    width = clamp_width(width)
+    candles = ohlc_buckets(df, width // CANDLE_PX)
+    candles = {k: v if k in ('t', 'volume') else np.round(v, DECIMALS) for k, v in candles.items()}
+    return {
+        'bars': len(df),
+        'width': width,
+        'first': df.index[0].strftime('%Y-%m-%d') if len(df) else None,
+        'last': df.index[-1].strftime('%Y-%m-%d') if len(df) else None,
+        'candles': {k: v.tolist() for k, v in candles.items()},
+        'lines': {c: line_series(df, c, width // LINE_PX) for c in lines if c in df.columns},
+    }
+
+def select_range(df, range_name=DEFAULT_RANGE, start=None, end=None):
+    """Rows of `df` inside a named range, or between ISO `start`/`end` dates when given."""
+    if start or end:
+        return df.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+    bars = CHART_RANGES[range_name]
+    return df if bars is None else df.tail(bars)
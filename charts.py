@@ -0,0 +1,104 @@
+"""
+Chart rendering for StockView.
+
+Kept separate from the Flask app so render worker processes only import
+matplotlib/mplfinance and this module. mplfinance (and with it matplotlib)
+is imported on first use, so the web process can use chart_key and
+CHART_DAYS without loading it.
+"""
+import hashlib
+import io
+
+from indicators import INDICATOR_CONFIG
+
+# Trading days drawn on the chart.
+CHART_DAYS = 365
+
+# Everything about the chart's look that changes the rendered image.
+CHART_STYLE = {
+    'base': 'nightclouds',
+    'up': '#22c55e',
+    'down': '#ef4444',
+    'figratio': (12, 8),
+    'dpi': 100,
+}
+
+_style = None
+
+
+def chart_key(df, symbol, company_name):
+    """Cache key for a chart: symbol, latest bar, indicator config and style."""
+    last_bar = df[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-1]
+    parts = [
+        symbol, company_name, df.index[-1].strftime('%Y-%m-%d'), tuple(last_bar.round(6)),
+        sorted(INDICATOR_CONFIG.items()), sorted(CHART_STYLE.items()), CHART_DAYS,
+    ]
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def chart_style():
+    """The mplfinance style for the dark theme, built once per process."""
+    global _style
+    if _style is None:
+        import mplfinance as mpf
+        mc = mpf.make_marketcolors(up=CHART_STYLE['up'], down=CHART_STYLE['down'], inherit=True)
+        _style = mpf.make_mpf_style(base_mpf_style=CHART_STYLE['base'], marketcolors=mc)
+    return _style
+
+def warm_up():
+    """Process-pool initializer: select the Agg backend, load the font cache and build the style up front."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties())
+    chart_style()
+
+def sample_frame(bars=CHART_DAYS):
+    """Synthetic bars with every charted indicator column, for warm-up renders."""
+    import numpy as np
+    import pandas as pd
+    from indicators import compute_pandas
+
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, bars)))
+    df = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                       'Volume': np.full(bars, 1e6)}, index=pd.bdate_range(end='2024-12-31', periods=bars))
+    return df.join(compute_pandas(df))
+
+def warm_up_render():
+    """Render one throwaway chart, so the first real chart finds every code path loaded."""
+    warm_up()
+    return len(render_chart(sample_frame(), 'WARMUP', 'Warm-up'))
+
+def render_chart(df, symbol, company_name):
+    """Renders the candlestick chart with indicator panels and returns PNG bytes."""
+    import mplfinance as mpf
+    print("Generating chart...")
+    df_chart = df.tail(CHART_DAYS) # Chart last year of data
+
+    # Short histories have no long-window values yet, and mplfinance rejects all-NaN overlays
+    def plotted(columns):
+        return [c for c in columns if df_chart[c].notna().any()]
+
+    ap = []
+    if plotted(['SMA_50', 'SMA_200']):
+        ap.append(mpf.make_addplot(df_chart[plotted(['SMA_50', 'SMA_200'])]))
+    if plotted(['Upper_Band', 'Lower_Band']):
+        ap.append(mpf.make_addplot(df_chart[plotted(['Upper_Band', 'Lower_Band'])], color='grey', alpha=0.3))
+    ap += [
+        mpf.make_addplot(df_chart['RSI'], panel=2, color='orange', ylabel='RSI'),
+        mpf.make_addplot(df_chart[['MACD', 'Signal_Line']], panel=3, ylabel='MACD'),
+    ]
+
+    # Save chart to a memory buffer
+    buf = io.BytesIO()
+    mpf.plot(
+        df_chart, type='candle', style=chart_style(),
+        title=f'\nTechnical Analysis for {company_name} ({symbol})',
+        ylabel='Price ($)', volume=True, ylabel_lower='Volume',
+        addplot=ap, panel_ratios=(6, 2, 2, 2), figratio=CHART_STYLE['figratio'],
+        savefig=dict(fname=buf, dpi=CHART_STYLE['dpi'], format='png')
+    )
+    png = buf.getvalue()
+    buf.close()
+    
+    print("Chart generated.")
+    return png
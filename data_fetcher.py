@@ -1,33 +1,61 @@
-import requests
+from typing import NamedTuple, Optional
+
+import av_client
+
+
+class Quote(NamedTuple):
+    """A parsed GLOBAL_QUOTE record."""
+    symbol: str
+    price: float
+    change: float
+    change_percent: float
+    volume: int
+    latest_trading_day: str
+
+
+def parse_quote(raw: dict) -> Quote:
+    """
+    Converts the raw 'Global Quote' dict (keys like "05. price", all strings)
+    into a typed Quote. Raises ValueError/KeyError on malformed data.
+    """
+    return Quote(
+        symbol=raw['01. symbol'],
+        price=float(raw['05. price']),
+        change=float(raw.get('09. change') or 0),
+        change_percent=float(str(raw.get('10. change percent') or '0').rstrip('%')),
+        volume=int(float(raw.get('06. volume') or 0)),
+        latest_trading_day=raw.get('07. latest trading day', ''),
+    )
 
 def get_stock_quote(symbol: str, api_key: str) -> dict:
     """
     Fetches the latest stock quote for a given symbol from Alpha Vantage.
     """
-    # The API URL for the GLOBAL_QUOTE function
-    url = (
-        f'https://www.alphavantage.co/query'
-        f'?function=GLOBAL_QUOTE'
-        f'&symbol={symbol}'
-        f'&apikey={api_key}'
-    )
-    
+    # Goes through the shared session and per-key rate limiter
+    data, error = av_client.query('GLOBAL_QUOTE', api_key, symbol=symbol)
+    if error:
+        print(f"An error occurred: {error}")
+        return None
+
+    # The key 'Global Quote' contains the data we want
+    if 'Global Quote' in data and data['Global Quote']:
+        return data['Global Quote']
+    else:
+        # Handle cases where the API returns an empty or error message
+        print(f"Error fetching data for {symbol}: {data.get('Note', 'Unexpected API response.')}")
+        return None
+
+def get_quote(symbol: str, api_key: str) -> Optional[Quote]:
+    """
+    Fetches the latest quote for a symbol as a typed Quote, or None on error.
+    """
+    raw = get_stock_quote(symbol, api_key)
+    if raw is None:
+        return None
     try:
-        response = requests.get(url)
-        # Raise an exception for bad status codes (4xx or 5xx)
-        response.raise_for_status() 
-        data = response.json()
-        
-        # The key 'Global Quote' contains the data we want
-        if 'Global Quote' in data and data['Global Quote']:
-            return data['Global Quote']
-        else:
-            # Handle cases where the API returns an empty or error message
-            print(f"Error fetching data for {symbol}: {data.get('Note', 'Unexpected API response.')}")
-            return None
-
-    except requests.exceptions.RequestException as e:
-        print(f"An error occurred: {e}")
+        return parse_quote(raw)
+    except (KeyError, ValueError) as e:
+        print(f"Error parsing quote for {symbol}: {e}")
         return None
 
 # --- Main part of the script to test the function ---
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for StockView: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Workers share caches, job records, rate limits and watchlist quotes through
+the backend in cache.py (STOCKVIEW_CACHE_URL), so any number of workers can
+serve the same users.
+"""
+import os
+
+bind = os.environ.get('STOCKVIEW_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('STOCKVIEW_WORKERS', max(2, os.cpu_count() or 1)))
+# Threads keep /jobs polls and long-lived watchlist streams from tying up a worker
+worker_class = 'gthread'
+threads = int(os.environ.get('STOCKVIEW_THREADS', 8))
+# Watchlist streams stay open; keep-alive comments are sent every 15 seconds
+timeout = 120
+graceful_timeout = 30
+# Each worker starts its own thread and render pools after forking
+preload_app = False
+accesslog = '-'
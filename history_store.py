@@ -0,0 +1,118 @@
+"""
+Persistent daily OHLCV history for StockView.
+
+Bars are kept in a local SQLite database so that an analysis only has to
+download the bars it has not seen yet. Each symbol also records the trading
+day it was last refreshed on, which lets repeat requests on the same trading
+day skip the network entirely.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+try:
+    from zoneinfo import ZoneInfo
+    MARKET_TZ = ZoneInfo('America/New_York')
+except Exception:  # zoneinfo/tzdata unavailable (e.g. bare Windows installs)
+    MARKET_TZ = timezone(timedelta(hours=-5))
+
+DEFAULT_PATH = os.environ.get(
+    'STOCKVIEW_HISTORY_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'history.sqlite')
+)
+
+# Alpha Vantage's 'compact' output holds the latest 100 bars; beyond this many
+# calendar days since the last stored bar a 'full' download is needed.
+COMPACT_MAX_GAP_DAYS = 130
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    open   REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    symbol     TEXT PRIMARY KEY,
+    fetched_on TEXT NOT NULL
+);
+"""
+
+
+def trading_day(now=None):
+    """The market session a timestamp belongs to; weekends roll back to Friday."""
+    now = now or datetime.now(MARKET_TZ)
+    day = now.date()
+    if day.weekday() >= 5:
+        day -= timedelta(days=day.weekday() - 4)
+    return day
+
+
+class HistoryStore:
+    """SQLite-backed store of daily bars, one row per (symbol, date)."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def load(self, symbol, bars=None):
+        """Return the stored bars for `symbol` (only the newest `bars` if given) in ascending order, or None."""
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                'SELECT * FROM ('
+                ' SELECT date, open, high, low, close, volume FROM bars'
+                ' WHERE symbol = ? ORDER BY date DESC LIMIT ?'
+                ') ORDER BY date',
+                conn, params=(symbol, bars or -1)
+            )
+        if df.empty:
+            return None
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('date')))
+        df.index.name = None
+        df.columns = COLUMNS
+        return df
+
+    def last_bar_date(self, symbol):
+        """Date of the newest stored bar, or None."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT MAX(date) FROM bars WHERE symbol = ?', (symbol,)).fetchone()
+        return pd.Timestamp(row[0]).date() if row and row[0] else None
+
+    def append(self, symbol, df, fetched_on=None):
+        """Upsert bars from a DataFrame with Open/High/Low/Close/Volume columns."""
+        rows = [
+            (symbol, ts.strftime('%Y-%m-%d'), *map(float, values))
+            for ts, values in zip(df.index, df[COLUMNS].itertuples(index=False, name=None))
+        ]
+        fetched_on = fetched_on or trading_day()
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (symbol, fetched_on.isoformat()))
+        return len(rows)
+
+    def is_fresh(self, symbol, today=None):
+        """True if `symbol` was already refreshed during the current trading day."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT fetched_on FROM meta WHERE symbol = ?', (symbol,)).fetchone()
+        return bool(row) and row[0] == (today or trading_day()).isoformat()
+
+    def outputsize_for(self, symbol, today=None):
+        """'compact' when the stored history can be topped up from the latest 100 bars."""
+        last = self.last_bar_date(symbol)
+        if last is None:
+            return 'full'
+        gap = ((today or trading_day()) - last).days
+        return 'compact' if gap <= COMPACT_MAX_GAP_DAYS else 'full'
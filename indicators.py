@@ -0,0 +1,291 @@
+"""
+Streaming technical indicators for StockView.
+
+Every indicator keeps O(1)-per-bar state (running sums, windowed Welford
+variance, EMA state and gain/loss accumulators), so appending bars to a
+symbol's history only costs work for the new bars. Results match the
+pandas rolling/ewm formulation in compute_pandas() to floating-point
+tolerance; that vectorized formulation is the faster one for a single pass
+over a whole history, so one-off computations use it instead.
+"""
+import bisect
+import copy
+import math
+import threading
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+NAN = float('nan')
+
+# Indicator set used by run_technical_analysis and the chart.
+INDICATOR_CONFIG = {
+    'sma': (50, 200, 20),
+    'bollinger': (20, 2),   # (window, number of standard deviations)
+    'rsi': 14,
+    'macd': (12, 26, 9),    # (fast span, slow span, signal span)
+}
+
+
+# Relative error allowed in EMA-based values when older history is dropped.
+EMA_TOLERANCE = 1e-10
+
+
+def _ema_convergence_bars(span, tolerance=EMA_TOLERANCE):
+    """Bars after which an EMA's dependence on its seed falls below `tolerance`."""
+    alpha = 2.0 / (span + 1)
+    return math.ceil(math.log(tolerance) / math.log(1.0 - alpha))
+
+
+def warmup_bars(config=INDICATOR_CONFIG, tolerance=EMA_TOLERANCE):
+    """
+    Bars of history needed before the first displayed bar for every indicator
+    to equal its full-history value. Windowed indicators need their window
+    (RSI one more bar for the first difference); the EMAs need enough bars for
+    the seed's weight to decay below `tolerance`, and the MACD signal line
+    stacks on top of the slow EMA.
+    """
+    windowed = max(max(config['sma']), config['bollinger'][0], config['rsi'] + 1) - 1
+    fast, slow, signal = config['macd']
+    ema = _ema_convergence_bars(max(fast, slow), tolerance) + _ema_convergence_bars(signal, tolerance)
+    return max(windowed, ema)
+
+
+def history_bars(display_bars, config=INDICATOR_CONFIG):
+    """Bars to load so the last `display_bars` bars carry full-history indicator values."""
+    return display_bars + warmup_bars(config)
+
+
+def indicator_columns(config=INDICATOR_CONFIG):
+    """Output column names, in the order the engine produces them."""
+    window = config['bollinger'][0]
+    return ([f'SMA_{n}' for n in config['sma']]
+            + [f'StdDev_{window}', 'Upper_Band', 'Lower_Band', 'RSI', 'MACD', 'Signal_Line'])
+
+
+# ==============================================================================
+# O(1) ACCUMULATORS
+# ==============================================================================
+class RollingMean:
+    """Mean over the last `window` values; NaN until the window is full."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nonzero = 0
+
+    def update(self, x):
+        self.values.append(x)
+        self.total += x
+        self.nonzero += x != 0
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.nonzero -= old != 0
+        if len(self.values) < self.window:
+            return NAN
+        # An all-zero window is exactly zero, not running-sum residue
+        return self.total / self.window if self.nonzero else 0.0
+
+
+class RollingStd:
+    """Windowed Welford mean/variance (ddof=1); NaN until the window is full."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.same_run = 0   # length of the current run of identical values
+
+    def update(self, x):
+        self.same_run = self.same_run + 1 if self.values and x == self.values[-1] else 1
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+        if n > self.window:
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+        if n < self.window:
+            return NAN
+        if self.same_run >= n:
+            # A constant window has exactly zero spread, as in pandas
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / (n - 1))
+
+
+class EMA:
+    """Exponential moving average matching pandas ewm(span, adjust=False)."""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RSI:
+    """Simple-average RSI over `window` bars of gains and losses."""
+
+    def __init__(self, window):
+        self.gains = RollingMean(window)
+        self.losses = RollingMean(window)
+        self.previous = None
+
+    def update(self, close):
+        delta = 0.0 if self.previous is None else close - self.previous
+        self.previous = close
+        gain = self.gains.update(delta if delta > 0 else 0.0)
+        loss = self.losses.update(-delta if delta < 0 else 0.0)
+        if math.isnan(gain) or math.isnan(loss):
+            return NAN
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class IndicatorEngine:
+    """Updates the whole configured indicator set one bar at a time."""
+
+    def __init__(self, config=INDICATOR_CONFIG):
+        self.config = config
+        self.smas = [RollingMean(n) for n in config['sma']]
+        window, self.num_std = config['bollinger']
+        self.band_std = RollingStd(window)
+        self.band_mid = RollingMean(window)
+        self.rsi = RSI(config['rsi'])
+        fast, slow, signal = config['macd']
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, close):
+        """Consume one close and return the indicator row for that bar."""
+        smas = [sma.update(close) for sma in self.smas]
+        std = self.band_std.update(close)
+        mid = self.band_mid.update(close)
+        macd = self.fast.update(close) - self.slow.update(close)
+        return (*smas, std, mid + std * self.num_std, mid - std * self.num_std,
+                self.rsi.update(close), macd, self.signal.update(macd))
+
+
+def compute_streaming(df, config=INDICATOR_CONFIG):
+    """Run a fresh engine over every bar of `df` (no per-symbol state)."""
+    engine = IndicatorEngine(config)
+    rows = [engine.update(close) for close in df['Close'].tolist()]
+    return pd.DataFrame(rows, index=df.index, columns=indicator_columns(config))
+
+
+# ==============================================================================
+# PER-SYMBOL INCREMENTAL STATE
+# ==============================================================================
+class _SymbolState:
+    def __init__(self, config):
+        self.engine = IndicatorEngine(config)
+        self.dates = []     # index values of committed bars
+        self.closes = []
+        self.rows = []
+
+
+class IncrementalIndicators:
+    """
+    Keeps one engine per symbol so a history that only grew since the last
+    call is extended bar-by-bar instead of recomputed.
+
+    The newest bar is never committed to the engine: today's bar can still be
+    revised by a later download, so it is evaluated on a throwaway copy.
+    """
+
+    def __init__(self, config=INDICATOR_CONFIG, max_symbols=256):
+        self.config = config
+        self.columns = indicator_columns(config)
+        self.max_symbols = max_symbols
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state_for(self, key, index, closes):
+        """Reuse the symbol's state if `index` continues it, dropping bars that slid out of the window."""
+        with self._lock:
+            state = self._states.pop(key, None)
+        if state is None or not state.dates:
+            return _SymbolState(self.config)
+        # A bounded window may start later than the state did
+        offset = bisect.bisect_left(state.dates, index[0])
+        if offset == len(state.dates) or state.dates[offset] != index[0]:
+            return _SymbolState(self.config)
+        n = len(state.dates) - offset
+        if n > len(closes) - 1 or index[n - 1] != state.dates[-1] or closes[n - 1] != state.closes[-1]:
+            return _SymbolState(self.config)
+        del state.dates[:offset]
+        del state.closes[:offset]
+        del state.rows[:offset]
+        return state
+
+    def compute(self, key, df):
+        """Return a DataFrame of indicator columns aligned with `df`."""
+        index = df.index
+        closes = df['Close'].tolist()
+        if not closes:
+            return pd.DataFrame(columns=self.columns, index=index, dtype=float)
+        state = self._state_for(key, index, closes)
+
+        # Commit every bar except the newest
+        start = len(state.dates)
+        for i in range(start, len(closes) - 1):
+            state.rows.append(state.engine.update(closes[i]))
+        state.dates.extend(index[start:len(closes) - 1])
+        state.closes.extend(closes[start:len(closes) - 1])
+
+        last_row = copy.deepcopy(state.engine).update(closes[-1])
+        result = pd.DataFrame(state.rows + [last_row], index=index, columns=self.columns)
+
+        with self._lock:
+            self._states[key] = state
+            while len(self._states) > self.max_symbols:
+                self._states.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+# ==============================================================================
+# VECTORIZED REFERENCE
+# ==============================================================================
+def compute_pandas(df, config=INDICATOR_CONFIG):
+    """
+    Full-history pandas formulation the streaming engine is checked against;
+    also the quicker way to compute a history once, without keeping state.
+    """
+    close = df['Close']
+    out = pd.DataFrame(index=df.index)
+    for n in config['sma']:
+        out[f'SMA_{n}'] = close.rolling(window=n).mean()
+    window, num_std = config['bollinger']
+    mid = close.rolling(window=window).mean()
+    out[f'StdDev_{window}'] = close.rolling(window=window).std()
+    out['Upper_Band'] = mid + (out[f'StdDev_{window}'] * num_std)
+    out['Lower_Band'] = mid - (out[f'StdDev_{window}'] * num_std)
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=config['rsi']).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=config['rsi']).mean()
+    rs = gain / loss
+    out['RSI'] = 100 - (100 / (1 + rs))
+    fast, slow, signal = config['macd']
+    exp1 = close.ewm(span=fast, adjust=False).mean()
+    exp2 = close.ewm(span=slow, adjust=False).mean()
+    out['MACD'] = exp1 - exp2
+    out['Signal_Line'] = out['MACD'].ewm(span=signal, adjust=False).mean()
+    return out
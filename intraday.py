@@ -0,0 +1,272 @@
+"""
+Intraday bars for StockView.
+
+One-minute TIME_SERIES_INTRADAY bars are stored once, at that base
+resolution, in one .npy file per symbol and month. Coarser bars (5min,
+15min, 1h, daily) are rolled up from them on demand:
+
+- every minute is mapped to a bucket (a session slot, or the whole session
+  for daily bars), anchored on the session open so that buckets never
+  straddle two sessions or the overnight gap;
+- the row offsets where buckets start are computed once per symbol, stored
+  data version and resolution, and kept;
+- each roll-up is then a handful of ufunc.reduceat calls over the minute
+  columns: first open, highest high, lowest low, last close, summed volume.
+
+Timestamps are the exchange's local wall-clock time (US/Eastern), as Alpha
+Vantage returns them, stored as whole minutes since 1970-01-01.
+"""
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import av_client
+import metrics
+from av_parser import parse_intraday_series
+from cache import CACHE_DIR
+
+DEFAULT_DIR = os.environ.get('STOCKVIEW_INTRADAY_DIR', os.path.join(CACHE_DIR, 'intraday'))
+
+# Bar sizes served from the minute bars, in minutes (None = one bar per session).
+RESOLUTIONS = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '1h': 60, 'daily': None}
+
+# Session hours in minutes after midnight: the regular session and the
+# extended session including pre- and post-market trading.
+SESSIONS = {'regular': (9 * 60 + 30, 16 * 60), 'extended': (4 * 60, 20 * 60)}
+
+# Seconds before stored minute bars are refreshed from Alpha Vantage.
+INTRADAY_TTL = int(os.environ.get('STOCKVIEW_INTRADAY_TTL', 300))
+
+# Alpha Vantage's 'compact' intraday output holds the latest 100 minutes.
+COMPACT_MINUTES = 100
+
+BAR_DTYPE = np.dtype([('t', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_MINUTES_PER_DAY = 1440
+# Slots for minutes outside the session; they are bucketed but never reported
+_BEFORE, _AFTER = -2, -1
+
+
+def to_minutes(index):
+    """Timestamps as whole minutes since 1970-01-01."""
+    return pd.DatetimeIndex(index).values.astype('datetime64[m]').astype(np.int64)
+
+
+# ==============================================================================
+# STORAGE (one .npy file of minute bars per symbol and month)
+# ==============================================================================
+class IntradayStore:
+    """Minute bars under `path`/<SYMBOL>/<YYYY-MM>.npy, loaded with a small per-symbol cache."""
+
+    def __init__(self, path=DEFAULT_DIR, max_symbols=32):
+        self.path = path
+        self.max_symbols = max_symbols
+        self._loaded = OrderedDict()   # symbol -> (version, bars)
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol):
+        return os.path.join(self.path, symbol.upper())
+
+    def _months(self, symbol):
+        return sorted(glob.glob(os.path.join(self._dir(symbol), '*.npy')))
+
+    def version(self, symbol):
+        """Changes whenever any of the symbol's month files is rewritten."""
+        return tuple((os.path.basename(p), os.stat(p).st_mtime_ns) for p in self._months(symbol))
+
+    def load(self, symbol):
+        """(version, structured array of minute bars in time order), or (version, None) if none are stored."""
+        version = self.version(symbol)
+        with self._lock:
+            cached = self._loaded.get(symbol)
+            if cached is not None and cached[0] == version:
+                self._loaded.move_to_end(symbol)
+                return cached
+        if not version:
+            return version, None
+        bars = np.concatenate([np.load(p, mmap_mode='r') for p in self._months(symbol)])
+        with self._lock:
+            self._loaded[symbol] = (version, bars)
+            while len(self._loaded) > self.max_symbols:
+                self._loaded.popitem(last=False)
+        return version, bars
+
+    def append(self, symbol, df):
+        """Merge minute bars (an Open/High/Low/Close/Volume DataFrame) into the month files they fall in."""
+        if df is None or df.empty:
+            return 0
+        new = np.empty(len(df), dtype=BAR_DTYPE)
+        new['t'] = to_minutes(df.index)
+        for name, column in zip(BAR_DTYPE.names[1:], COLUMNS):
+            new[name] = df[column].to_numpy(dtype=np.float64)
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        months = new['t'].astype('datetime64[m]').astype('datetime64[M]')
+        for month in np.unique(months):
+            path = os.path.join(directory, f'{month}.npy')
+            rows = new[months == month]
+            if os.path.exists(path):
+                # Newly downloaded bars replace stored bars with the same timestamp
+                rows = np.concatenate([rows, np.load(path)])
+            _, first = np.unique(rows['t'], return_index=True)
+            rows = rows[first]
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, rows)
+            os.replace(tmp, path)
+        return len(new)
+
+    def last_minute(self, symbol):
+        """Timestamp (minutes) of the newest stored bar, or None."""
+        _, bars = self.load(symbol)
+        return int(bars['t'][-1]) if bars is not None and len(bars) else None
+
+    def fetched_at(self, symbol):
+        """Unix time of the last refresh from Alpha Vantage, or None."""
+        try:
+            return os.stat(os.path.join(self._dir(symbol), '.fetched')).st_mtime
+        except OSError:
+            return None
+
+    def mark_fetched(self, symbol):
+        os.makedirs(self._dir(symbol), exist_ok=True)
+        with open(os.path.join(self._dir(symbol), '.fetched'), 'w'):
+            pass
+
+    def is_fresh(self, symbol, ttl=INTRADAY_TTL):
+        fetched = self.fetched_at(symbol)
+        return fetched is not None and time.time() - fetched < ttl
+
+
+def fetch_intraday(symbol, api_key, outputsize='full', month=None):
+    """
+    Downloads one-minute bars from Alpha Vantage: the latest 100 ('compact'),
+    the last 30 days ('full'), or one whole `month` ('YYYY-MM').
+    Returns (DataFrame, error_message).
+    """
+    params = {'symbol': symbol, 'interval': '1min', 'outputsize': outputsize, 'extended_hours': 'true'}
+    if month:
+        params['month'] = month
+    data, error = av_client.query('TIME_SERIES_INTRADAY', api_key, verify=False, **params)
+    if error:
+        return None, error
+    if 'Time Series (1min)' not in data:
+        detail = data.get('Note') or data.get('Error Message') or data.get('Information') or str(data)
+        return None, f"Alpha Vantage did not return intraday data for '{symbol}'. API response: {detail}"
+    try:
+        with metrics.span('series_parse'):
+            return parse_intraday_series(data), None
+    except Exception as e:
+        return None, f"An unexpected error occurred while parsing intraday data for '{symbol}': {e}"
+
+
+# ==============================================================================
+# RESAMPLING FROM PRECOMPUTED BUCKET OFFSETS
+# ==============================================================================
+def bucket_offsets(minutes, resolution, session='regular'):
+    """
+    Split sorted minute timestamps into buckets of `resolution` minutes (None
+    for one bucket per session), anchored on each session's open.
+    Returns (starts, labels, keep): the row where each bucket starts, each
+    bucket's label in minutes, and which buckets lie inside the session.
+    """
+    open_, close = SESSIONS[session]
+    day, minute = np.divmod(np.asarray(minutes, dtype=np.int64), _MINUTES_PER_DAY)
+    inside = (minute >= open_) & (minute < close)
+    if resolution is None:
+        slot = np.zeros(len(minute), dtype=np.int64)
+    else:
+        slot = (minute - open_) // resolution
+    slot = np.where(inside, slot, np.where(minute < open_, _BEFORE, _AFTER))
+    # Rows are time-ordered, so every (day, slot) bucket is one contiguous run
+    changed = (day[1:] != day[:-1]) | (slot[1:] != slot[:-1])
+    starts = np.concatenate([[0], np.flatnonzero(changed) + 1]) if len(minute) else np.empty(0, dtype=np.int64)
+    step = resolution or 0
+    labels = day[starts] * _MINUTES_PER_DAY + (open_ + slot[starts] * step if step else 0)
+    return starts, labels, inside[starts] if len(starts) else np.empty(0, dtype=bool)
+
+def rollup(bars, starts, keep):
+    """OHLCV columns of every kept bucket, from bucket start offsets into the minute bars."""
+    if len(starts) == 0:
+        return {name: np.empty(0) for name in BAR_DTYPE.names[1:]}
+    ends = np.append(starts[1:], len(bars)) - 1
+    out = {
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+    return {name: column[keep] for name, column in out.items()}
+
+def resample(bars, interval, session='regular'):
+    """Minute bars rolled up to `interval` (a RESOLUTIONS key) as an OHLCV DataFrame."""
+    resolution = RESOLUTIONS[interval]
+    starts, labels, keep = bucket_offsets(bars['t'], resolution, session)
+    return _frame(rollup(bars, starts, keep), labels[keep], resolution)
+
+def _frame(columns, labels, resolution):
+    unit = 'datetime64[m]' if resolution else 'datetime64[D]'
+    stamps = labels if resolution else labels // _MINUTES_PER_DAY
+    index = pd.DatetimeIndex(stamps.astype(unit).astype('datetime64[ns]'))
+    return pd.DataFrame(dict(zip(COLUMNS, columns.values())), index=index, copy=False)
+
+
+class Resampler:
+    """
+    Serves resampled bars from an IntradayStore, keeping each symbol's bucket
+    offsets (per stored version, resolution and session) and its most
+    recently requested frames.
+    """
+
+    def __init__(self, store, max_items=128):
+        self.store = store
+        self.max_items = max_items
+        self._offsets = OrderedDict()   # (symbol, version, resolution, session) -> (starts, labels, keep)
+        self._frames = OrderedDict()    # (symbol, version, interval, session) -> DataFrame
+        self._lock = threading.Lock()
+
+    def _remember(self, table, key, value):
+        with self._lock:
+            table[key] = value
+            table.move_to_end(key)
+            while len(table) > self.max_items:
+                table.popitem(last=False)
+
+    def _lookup(self, table, key):
+        with self._lock:
+            value = table.get(key)
+            if value is not None:
+                table.move_to_end(key)
+            return value
+
+    def bars(self, symbol, interval='5min', session='regular'):
+        """OHLCV bars of `symbol` at `interval`, or None if no minute bars are stored."""
+        if interval not in RESOLUTIONS:
+            raise ValueError(f"Unsupported interval '{interval}'. Choose from: {', '.join(RESOLUTIONS)}")
+        if session not in SESSIONS:
+            raise ValueError(f"Unsupported session '{session}'. Choose from: {', '.join(SESSIONS)}")
+        version, minute_bars = self.store.load(symbol)
+        if minute_bars is None:
+            return None
+        key = (symbol, version, interval, session)
+        frame = self._lookup(self._frames, key)
+        if frame is None:
+            with metrics.span('resample'):
+                resolution = RESOLUTIONS[interval]
+                offsets_key = (symbol, version, resolution, session)
+                offsets = self._lookup(self._offsets, offsets_key)
+                if offsets is None:
+                    offsets = bucket_offsets(minute_bars['t'], resolution, session)
+                    self._remember(self._offsets, offsets_key, offsets)
+                starts, labels, keep = offsets
+                frame = _frame(rollup(minute_bars, starts, keep), labels[keep], resolution)
+            self._remember(self._frames, key, frame)
+        return frame
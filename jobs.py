@@ -0,0 +1,126 @@
+"""
+Background execution for /analyze.
+
+Analysis pipelines run on a thread pool so the request returns at once with
+a job id. Chart rendering is sent to a process pool whose workers load
+matplotlib at start-up, so CPU-heavy rendering never holds the web
+process's GIL.
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import charts
+import metrics
+from cache import shared_backend
+
+# Render processes; 0 renders inline on the pipeline thread instead.
+RENDER_WORKERS = int(os.environ.get('STOCKVIEW_RENDER_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+PIPELINE_WORKERS = int(os.environ.get('STOCKVIEW_PIPELINE_WORKERS', 8))
+
+# Job records are forgotten after this many seconds.
+JOB_TTL = 3600
+
+_render_pool = None
+_render_lock = threading.Lock()
+
+
+def render_pool():
+    """The shared render process pool, started on first use (None when disabled)."""
+    global _render_pool
+    with _render_lock:
+        if _render_pool is None and RENDER_WORKERS > 0:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=charts.warm_up
+            )
+        return _render_pool
+
+def render_chart(df, symbol, company_name):
+    """Renders a chart in the process pool and returns the PNG bytes."""
+    pool = render_pool()
+    # Only the charted rows cross the process boundary
+    df_chart = df.tail(charts.CHART_DAYS)
+    if pool is None:
+        return charts.render_chart(df_chart, symbol, company_name)
+    return pool.submit(charts.render_chart, df_chart, symbol, company_name).result()
+
+
+def warm_up_renderers():
+    """
+    Start every render process and have each draw a throwaway chart (or draw
+    one inline when rendering in-process), so no request waits for process
+    start-up, matplotlib imports or the font cache.
+    """
+    pool = render_pool()
+    if pool is None:
+        charts.warm_up_render()
+        return
+    # Each submission without an idle worker starts another process
+    futures = [pool.submit(charts.warm_up_render) for _ in range(RENDER_WORKERS)]
+    for future in futures:
+        future.result()
+
+
+class JobManager:
+    """
+    Runs (result, error_message) functions in the background and tracks their
+    state: 'running', then 'done' or 'error'. Job records live in the shared
+    cache backend, so any worker process can answer a status poll.
+    """
+
+    def __init__(self, workers=PIPELINE_WORKERS, ttl=JOB_TTL, backend=None):
+        self.ttl = ttl
+        self.backend = backend or shared_backend()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analyze')
+        self._running = {}  # coalescing key -> id of the job computing it
+        self._lock = threading.Lock()
+        self._submitted = 0
+
+    def _save(self, job):
+        self.backend.set('jobs', job['id'], json.dumps(job).encode('utf-8'), ttl=self.ttl)
+
+    def submit(self, fn, *args, key=None):
+        """
+        Start `fn(*args)` in the background and return its job id. If a job
+        with the same `key` is still running, its id is returned instead so
+        identical requests share one computation.
+        """
+        with self._lock:
+            if key is not None and key in self._running:
+                return self._running[key]
+            job_id = uuid.uuid4().hex
+            if key is not None:
+                self._running[key] = job_id
+            self._submitted += 1
+            prune = self._submitted % 100 == 0
+        self._save({'id': job_id, 'state': 'running', 'result': None,
+                    'error': None, 'created': time.time(), 'finished': None})
+        if prune:
+            self.backend.prune('jobs', 10000)
+        self._executor.submit(self._run, job_id, key, fn, args)
+        return job_id
+
+    def _run(self, job_id, key, fn, args):
+        try:
+            result, error = fn(*args)
+        except Exception as e:
+            result, error = None, f"An unexpected error occurred: {e}"
+        job = self.get(job_id) or {'id': job_id, 'created': None}
+        job.update(state='error' if error else 'done', result=result,
+                   error=error, finished=time.time())
+        self._save(job)
+        metrics.inc('stockview_jobs_total', state=job['state'])
+        if key is not None:
+            with self._lock:
+                self._running.pop(key, None)
+
+    def get(self, job_id):
+        """The job record, or None if it is unknown or expired."""
+        entry = self.backend.get('jobs', job_id)
+        return json.loads(entry[0]) if entry else None
@@ -0,0 +1,219 @@
+"""
+Latency and event metrics in the Prometheus text format.
+
+Pipeline stages are timed with `span('stage')`, which records into the
+stockview_stage_seconds histogram; `inc()` counts events such as cache hits
+and API-limit rejections. Each worker process publishes its totals to the
+shared cache backend, and `render()` merges the totals of every worker, so
+scraping /metrics on any worker reports the whole server. The totals of a
+worker that stopped (a restart, a scale-down) are folded into a retired
+entry rather than dropped, so the merged counters never go down.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds (seconds); rate-limited fetches can queue for a minute.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Seconds between publications of this worker's totals to the shared backend.
+PUBLISH_INTERVAL = 15
+# Totals of a worker that stopped publishing are retired after this many seconds.
+WORKER_TTL = 600
+RETIRED = 'retired'
+
+STAGE_HISTOGRAM = 'stockview_stage_seconds'
+HELP = {
+    STAGE_HISTOGRAM: 'Time spent in each pipeline stage.',
+    'stockview_api_requests_total': 'Alpha Vantage HTTP requests by function and outcome.',
+    'stockview_api_rejections_total': 'Alpha Vantage calls refused by the API limit or the local rate limiter.',
+    'stockview_cache_events_total': 'Cache lookups and refreshes by cache and event.',
+    'stockview_jobs_total': 'Background analysis jobs by final state.',
+}
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _series(name, labels):
+    """Prometheus series name, e.g. name{a="1",b="2"}."""
+    if not labels:
+        return name
+    body = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f'{name}{{{body}}}'
+
+
+class Registry:
+    """Counters and stage histograms for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}     # series -> value
+        self.histograms = {}   # stage -> {'buckets': [...], 'sum': s, 'count': n}
+
+    def inc(self, name, amount=1, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            self.counters[series] = self.counters.get(series, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist['buckets'][i] += 1
+                    break
+            hist['sum'] += seconds
+            hist['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {k: {'buckets': list(v['buckets']), 'sum': v['sum'], 'count': v['count']}
+                               for k, v in self.histograms.items()},
+            }
+
+
+registry = Registry()
+
+
+def inc(name, amount=1, **labels):
+    """Add `amount` to a counter."""
+    registry.inc(name, amount, **labels)
+    _ensure_publisher()
+
+def observe(stage, seconds):
+    """Record one duration for a pipeline stage."""
+    registry.observe(stage, seconds)
+    _ensure_publisher()
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as one observation of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+# ==============================================================================
+# CROSS-WORKER AGGREGATION
+# ==============================================================================
+_publisher = None
+_publisher_lock = threading.Lock()
+# This worker's totals when it last published, and the part of them already
+# folded into the retired entry (if it was once taken for a stopped worker)
+_published = None
+_baseline = None
+
+
+def _backend():
+    # Imported here: cache.py records its own hit counters through this module
+    from cache import shared_backend
+    return shared_backend()
+
+def _empty():
+    return {'counters': {}, 'histograms': {}}
+
+def _add(total, snap, sign=1):
+    """Add (or with sign=-1 subtract) the totals of `snap` into `total`."""
+    counters = total['counters']
+    for series, value in snap['counters'].items():
+        counters[series] = counters.get(series, 0) + sign * value
+    for stage, hist in snap['histograms'].items():
+        into = total['histograms'].setdefault(stage, {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0})
+        into['buckets'] = [a + sign * b for a, b in zip(into['buckets'], hist['buckets'])]
+        into['sum'] += sign * hist['sum']
+        into['count'] += sign * hist['count']
+    return total
+
+def _retire_stale(backend, now):
+    """Fold the totals of workers that stopped publishing into the retired entry."""
+    stale = []
+    for worker, raw in backend.items('metrics'):
+        snap = json.loads(raw)
+        if worker != RETIRED and now - snap.get('published', now) > WORKER_TTL:
+            stale.append((worker, snap))
+    if not stale:
+        return
+    entry = backend.get('metrics', RETIRED)
+    retired = json.loads(entry[0]) if entry else _empty()
+    for _, snap in stale:
+        _add(retired, snap)
+    backend.set('metrics', RETIRED, json.dumps(retired).encode('utf-8'))
+    for worker, _ in stale:
+        backend.delete('metrics', worker)
+
+def publish():
+    """Store this worker's totals in the shared backend; False if the metrics lock was busy."""
+    global _published, _baseline
+    from cache import backend_lock
+    backend = _backend()
+    with backend_lock(backend, 'metrics:publish', ttl=10, timeout=5) as acquired:
+        if not acquired:
+            return False
+        now = time.time()
+        _retire_stale(backend, now)
+        if _published is not None and backend.get('metrics', WORKER_ID) is None:
+            # This worker was retired while stalled: what it published then is already counted
+            _baseline = _published
+        snap = registry.snapshot()
+        _published = snap
+        if _baseline is not None:
+            snap = _add(_add(_empty(), snap), _baseline, -1)
+        snap['published'] = now
+        backend.set('metrics', WORKER_ID, json.dumps(snap).encode('utf-8'))
+    return True
+
+def _publish_loop():
+    while True:
+        time.sleep(PUBLISH_INTERVAL)
+        try:
+            publish()
+        except Exception as e:
+            print(f"Could not publish metrics: {e}")
+
+def _ensure_publisher():
+    global _publisher
+    if _publisher is not None:
+        return
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = threading.Thread(target=_publish_loop, name='metrics-publisher', daemon=True)
+            _publisher.start()
+
+def merged_snapshot():
+    """Totals summed over every worker, including this one and those already retired."""
+    publish()
+    total = _empty()
+    for _, raw in _backend().items('metrics'):
+        _add(total, json.loads(raw))
+    return total
+
+def render(snapshot=None):
+    """The Prometheus text exposition of `snapshot` (all workers by default)."""
+    snapshot = snapshot or merged_snapshot()
+    lines = [f'# HELP {STAGE_HISTOGRAM} {HELP[STAGE_HISTOGRAM]}', f'# TYPE {STAGE_HISTOGRAM} histogram']
+    for stage, hist in sorted(snapshot['histograms'].items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist['buckets']):
+            cumulative += count
+            lines.append(f'{_series(STAGE_HISTOGRAM + "_bucket", {"stage": stage, "le": bound})} {cumulative}')
+        lines.append(f'{_series(STAGE_HISTOGRAM + "_bucket", {"stage": stage, "le": "+Inf"})} {hist["count"]}')
+        lines.append(f'{_series(STAGE_HISTOGRAM + "_sum", {"stage": stage})} {hist["sum"]}')
+        lines.append(f'{_series(STAGE_HISTOGRAM + "_count", {"stage": stage})} {hist["count"]}')
+
+    by_name = {}
+    for series, value in snapshot['counters'].items():
+        by_name.setdefault(series.split('{', 1)[0], []).append((series, value))
+    for name, samples in sorted(by_name.items()):
+        lines.append(f'# HELP {name} {HELP.get(name, name)}')
+        lines.append(f'# TYPE {name} counter')
+        lines.extend(f'{series} {value}' for series, value in sorted(samples))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,23 @@
+"""
+Independent batch tasks over a process pool.
+
+The backtester and the report builder both fan many small, independent
+tasks out to fresh ('spawn') processes, which start without the parent's
+threads, locks or open files.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_tasks(fn, tasks, workers):
+    """
+    [fn(*task) for task in tasks], over up to `workers` processes when there
+    are several workers and tasks, in order. Tasks are sent in chunks of about
+    a quarter of each worker's share, so uneven tasks still balance.
+    """
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            chunk = max(1, len(tasks) // (workers * 4))
+            return list(pool.map(fn, *zip(*tasks), chunksize=chunk))
+    return [fn(*task) for task in tasks]
@@ -0,0 +1,374 @@
+"""
+Memory-mapped columnar daily prices for a whole ticker universe.
+
+Each field (open, high, low, close, volume) is one float64 file laid out as
+[symbol, trading day], alongside a symbol index and a shared trading-day
+calendar. Readers get zero-copy numpy views of these files, so slicing one
+symbol's history or one day across every symbol never builds a new frame.
+
+Files are preallocated with spare capacity:
+- new trading days fill unused columns, so existing data is not rewritten;
+- new symbols are added as rows at the end of each file.
+Only running out of day capacity, or inserting days before or between
+existing ones, rewrites the files. A rewrite goes to a new generation of
+files (close.<generation>.f8, ...) and meta.json, written last, switches
+readers over to it; views of the previous generation stay valid until they
+are dropped.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache import backend_lock, shared_backend
+from history_store import COLUMNS, trading_day
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+DEFAULT_DIR = os.environ.get(
+    'STOCKVIEW_PANEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'panel')
+)
+
+# Spare trading days (about ten years) and symbols reserved whenever a file grows.
+DAY_HEADROOM = 2520
+SYMBOL_HEADROOM = 256
+
+# Writers hold the panel lock for at most this long (a rebuild rewrites every
+# file), and wait this long for it before skipping the write.
+WRITE_LOCK_TTL = 300
+WRITE_LOCK_TIMEOUT = 30
+
+def _to_days(index):
+    """Dates as whole days since 1970-01-01, whatever the index's time unit."""
+    return pd.DatetimeIndex(index).values.astype('datetime64[D]').astype(np.int64)
+
+
+class PricePanel:
+    """A [symbol, day] price panel in memory-mapped files under `path`."""
+
+    def __init__(self, path=DEFAULT_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._meta_mtime = None
+        self._meta = None
+        self._views = {}
+        self._days = np.empty(0, dtype=np.int64)
+        self._calendar = pd.DatetimeIndex([])
+        self._rows = {}
+        if not os.path.exists(self._meta_path()):
+            self._write_meta({'version': 0, 'generation': 0, 'symbols': [], 'spans': {}, 'fetched_on': {},
+                              'n_days': 0, 'day_capacity': 0, 'symbol_capacity': 0})
+        self._refresh()
+
+    # --------------------------------------------------------------------------
+    # Files
+    # --------------------------------------------------------------------------
+    def _meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def _file(self, name, generation=0):
+        """A field's (or the calendar's) file in one generation of the panel."""
+        suffix = 'f8' if name in FIELDS else 'i8'
+        return os.path.join(self.path, f'{name}.{generation}.{suffix}' if generation else f'{name}.{suffix}')
+
+    def _remove_generation(self, generation):
+        for name in FIELDS + ('calendar',):
+            try:
+                os.remove(self._file(name, generation))
+            except OSError:
+                # Already gone, or still mapped on a platform that refuses to delete it
+                pass
+
+    def _write_meta(self, meta):
+        tmp = f'{self._meta_path()}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(meta))
+        os.replace(tmp, self._meta_path())
+
+    def _refresh(self, attempts=5):
+        """Re-open the views if another process (or thread) changed the panel."""
+        with self._lock:
+            mtime = os.stat(self._meta_path()).st_mtime_ns
+            if mtime == self._meta_mtime:
+                return
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            try:
+                views, days = self._open(meta)
+            except FileNotFoundError:
+                # A rebuild replaced this generation after meta.json was read: read it again
+                if attempts <= 1:
+                    raise
+                return self._refresh(attempts - 1)
+            self._views = views
+            self._days = days
+            self._calendar = pd.DatetimeIndex(self._days.astype('datetime64[D]').astype('datetime64[ns]'))
+            self._rows = {symbol: i for i, symbol in enumerate(meta['symbols'])}
+            self._meta = meta
+            self._meta_mtime = mtime
+
+    def _open(self, meta):
+        """Read-only views of every field and the stored days of the generation `meta` names."""
+        shape = (meta['symbol_capacity'], meta['day_capacity'])
+        if not (shape[0] and shape[1]):
+            return {}, np.empty(0, dtype=np.int64)
+        generation = meta.get('generation', 0)
+        views = {field: np.memmap(self._file(field, generation), dtype=np.float64, mode='r', shape=shape)
+                 for field in FIELDS}
+        days = np.memmap(self._file('calendar', generation), dtype=np.int64, mode='r', shape=(shape[1],))
+        return views, np.asarray(days[:meta['n_days']])
+
+    # --------------------------------------------------------------------------
+    # Reading (zero-copy)
+    # --------------------------------------------------------------------------
+    @property
+    def symbols(self):
+        self._refresh()
+        return list(self._meta['symbols'])
+
+    @property
+    def calendar(self):
+        """The panel's trading days as a DatetimeIndex."""
+        self._refresh()
+        return self._calendar
+
+    def __contains__(self, symbol):
+        self._refresh()
+        return symbol in self._rows
+
+    def field(self, name):
+        """A read-only [symbol, day] view of one field over every stored symbol and day."""
+        self._refresh()
+        if name not in self._views:
+            return np.empty((0, 0))
+        return self._views[name][:len(self._rows), :self._meta['n_days']]
+
+    def rows(self, symbols):
+        """
+        (present symbols, row selector) for `symbols`. The selector is a slice,
+        so views stay zero-copy, whenever those rows are contiguous and in order.
+        """
+        self._refresh()
+        present = [s for s in symbols if s in self._rows]
+        rows = np.fromiter((self._rows[s] for s in present), dtype=np.int64, count=len(present))
+        if len(rows) and (len(rows) == 1 or (np.diff(rows) == 1).all()):
+            return present, slice(int(rows[0]), int(rows[-1]) + 1)
+        return present, rows
+
+    def last_day(self, symbol):
+        """The newest day the symbol has a close on (a datetime.date), or None."""
+        self._refresh()
+        span = self._meta['spans'].get(symbol)
+        return None if span is None else self._calendar[span[1]].date()
+
+    def frame(self, symbol, bars=None):
+        """
+        The symbol's bars as an Open/High/Low/Close/Volume DataFrame (only the
+        newest `bars` if given), or None. Columns are views of the panel unless
+        the symbol skipped days of the shared calendar, which are dropped.
+        """
+        self._refresh()
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+        first, last = self._meta['spans'][symbol]
+        if bars:
+            first = max(first, last + 1 - bars)
+        columns = {column: self._views[field][row, first:last + 1] for field, column in zip(FIELDS, COLUMNS)}
+        index = self._calendar[first:last + 1]
+        missing = np.isnan(columns['Close'])
+        if missing.any():
+            keep = ~missing
+            return pd.DataFrame({c: v[keep] for c, v in columns.items()}, index=index[keep])
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def is_fresh(self, symbols, today=None):
+        """True if every symbol was written during the current trading day."""
+        self._refresh()
+        today = (today or trading_day()).isoformat()
+        fetched = self._meta['fetched_on']
+        return all(fetched.get(s) == today for s in symbols)
+
+    # --------------------------------------------------------------------------
+    # Writing
+    # --------------------------------------------------------------------------
+    def write(self, symbol, df, fetched_on=None):
+        """Store one symbol's bars (a DataFrame with Open/High/Low/Close/Volume columns)."""
+        values = {field: df[column].to_numpy(dtype=np.float64)[None, :] for field, column in zip(FIELDS, COLUMNS)}
+        return self._write([symbol], _to_days(df.index), values, fetched_on)
+
+    def write_wide(self, data, fetched_on=None, requested=()):
+        """
+        Store a wide (field, ticker) frame as returned by yf.download for many
+        tickers. Tickers in `requested` that the frame lacks (all of them if it
+        is empty) are recorded as fetched too, so a delisted ticker or a failed
+        download is not retried again the same day.
+        """
+        if data.empty:
+            # Nothing came back (every ticker failed): still record the attempt
+            return self.mark_fetched(requested, fetched_on)
+        # One array for the whole frame, then each field's columns in ticker order
+        array = data.to_numpy(dtype=np.float64)
+        fields = data.columns.get_level_values(0)
+        symbols = data.columns.get_level_values(-1)
+        tickers = list(dict.fromkeys(symbols))
+        values = {}
+        for field, column in zip(FIELDS, COLUMNS):
+            block = np.full((len(tickers), len(data)), np.nan)
+            mask = fields == column
+            if mask.any():
+                block[pd.Index(tickers).get_indexer(symbols[mask])] = array[:, mask].T
+            values[field] = block
+        return self._write(tickers, _to_days(data.index), values, fetched_on, requested)
+
+    def mark_fetched(self, symbols, fetched_on=None):
+        """Record `symbols` as fetched without storing bars, e.g. after a failed download."""
+        fetched_on = (fetched_on or trading_day()).isoformat()
+        with self._lock, self._writer_lock() as acquired:
+            if not acquired:
+                return False
+            self._meta_mtime = None
+            self._refresh()
+            meta = dict(self._meta)
+            meta['fetched_on'] = dict(meta['fetched_on'], **dict.fromkeys(symbols, fetched_on))
+            meta['version'] += 1
+            self._write_meta(meta)
+            self._meta_mtime = None
+            self._refresh()
+        return True
+
+    def _writer_lock(self):
+        return backend_lock(shared_backend(), f'price_panel:{os.path.abspath(self.path)}',
+                            ttl=WRITE_LOCK_TTL, timeout=WRITE_LOCK_TIMEOUT)
+
+    def _write(self, symbols, days, values, fetched_on, requested=()):
+        """
+        Write [len(symbols), len(days)] blocks per field under the cross-process
+        lock. Returns False, having written nothing, if another writer held the
+        lock throughout; callers then read the bars from their durable copy
+        and copy them in again later.
+        """
+        order = np.argsort(days, kind='stable')
+        days = days[order]
+        values = {field: block[:, order] for field, block in values.items()}
+        fetched_on = (fetched_on or trading_day()).isoformat()
+        with self._lock, self._writer_lock() as acquired:
+            if not acquired:
+                print(f"[!] Price panel {self.path} is locked by another writer; skipped writing {len(symbols)} symbol(s).")
+                return False
+            self._meta_mtime = None
+            self._refresh()
+            meta = dict(self._meta)
+            old_generation = meta.setdefault('generation', 0)
+            calendar = self._ensure_days(meta, days)
+            rows = self._ensure_symbols(meta, symbols)
+            cols = np.searchsorted(calendar, days)
+            shape = (meta['symbol_capacity'], meta['day_capacity'])
+            # No msync: other processes map the same page cache, and the history
+            # store rather than the panel is the durable copy of the bars
+            for field, block in values.items():
+                target = np.memmap(self._file(field, meta['generation']), dtype=np.float64, mode='r+', shape=shape)
+                target[np.ix_(rows, cols)] = block
+                del target
+            # First and last written day each symbol traded on, widening its stored span
+            traded = ~np.isnan(values['close'])
+            any_traded = traded.any(axis=1)
+            first = cols[traded.argmax(axis=1)]
+            last = cols[traded.shape[1] - 1 - traded[:, ::-1].argmax(axis=1)]
+            spans, fetched = dict(meta['spans']), dict(meta['fetched_on'])
+            for symbol, lo, hi, ok in zip(symbols, first.tolist(), last.tolist(), any_traded.tolist()):
+                if ok:
+                    if symbol in spans:
+                        lo, hi = min(lo, spans[symbol][0]), max(hi, spans[symbol][1])
+                    spans[symbol] = [lo, hi]
+                fetched[symbol] = fetched_on
+            fetched.update(dict.fromkeys(requested, fetched_on))
+            meta.update(spans=spans, fetched_on=fetched, version=meta['version'] + 1)
+            self._write_meta(meta)
+            self._meta_mtime = None
+            self._refresh()
+            if meta['generation'] != old_generation:
+                self._remove_generation(old_generation)
+        return True
+
+    def _ensure_days(self, meta, days):
+        """Add `days` to the calendar in `meta`; returns the new calendar (int days)."""
+        old = self._days
+        new = np.setdiff1d(days, old)
+        if len(new) == 0:
+            return old
+        if len(old) and new[0] <= old[-1]:
+            # Days before or between existing ones: rebuild the files on the merged calendar
+            calendar = np.union1d(old, new)
+            self._rebuild(meta, calendar, positions=np.searchsorted(calendar, old))
+            return calendar
+        calendar = np.concatenate([old, new])
+        if len(calendar) > meta['day_capacity']:
+            self._rebuild(meta, calendar, positions=np.arange(len(old)))
+            return calendar
+        days_file = np.memmap(self._file('calendar', meta['generation']), dtype=np.int64, mode='r+',
+                              shape=(meta['day_capacity'],))
+        days_file[len(old):len(calendar)] = new
+        del days_file
+        meta['n_days'] = len(calendar)
+        return calendar
+
+    def _rebuild(self, meta, calendar, positions):
+        """
+        Write the next generation of files with room for `calendar`; old day i
+        moves to positions[i]. Readers keep using the current generation until
+        the caller writes `meta`, which now names the new one.
+        """
+        n_symbols = len(meta['symbols'])
+        symbol_capacity = max(meta['symbol_capacity'], n_symbols + SYMBOL_HEADROOM)
+        day_capacity = len(calendar) + DAY_HEADROOM
+        old_shape = (meta['symbol_capacity'], meta['day_capacity'])
+        old_generation = meta['generation']
+        generation = old_generation + 1
+        for field in FIELDS:
+            target = np.memmap(self._file(field, generation), dtype=np.float64, mode='w+',
+                               shape=(symbol_capacity, day_capacity))
+            target[:] = np.nan
+            if old_shape[0] and old_shape[1] and meta['n_days']:
+                source = np.memmap(self._file(field, old_generation), dtype=np.float64, mode='r', shape=old_shape)
+                target[:n_symbols, positions] = source[:n_symbols, :meta['n_days']]
+                del source
+            target.flush()
+            del target
+        days_file = np.memmap(self._file('calendar', generation), dtype=np.int64, mode='w+', shape=(day_capacity,))
+        days_file[:len(calendar)] = calendar
+        days_file.flush()
+        del days_file
+        # Spans are day positions, which the merge may have shifted
+        remap = lambda i: int(positions[i]) if i < len(positions) else i
+        meta['spans'] = {s: [remap(a), remap(b)] for s, (a, b) in meta['spans'].items()}
+        meta.update(n_days=len(calendar), day_capacity=day_capacity, symbol_capacity=symbol_capacity,
+                    generation=generation)
+
+    def _ensure_symbols(self, meta, symbols):
+        """Row of each symbol, appending new rows (growing the files at their end if needed)."""
+        known = {s: i for i, s in enumerate(meta['symbols'])}
+        added = [s for s in dict.fromkeys(symbols) if s not in known]
+        if added:
+            known.update((s, len(meta['symbols']) + i) for i, s in enumerate(added))
+            meta['symbols'] = meta['symbols'] + added
+            if len(meta['symbols']) > meta['symbol_capacity']:
+                self._grow_symbols(meta, len(meta['symbols']) + SYMBOL_HEADROOM)
+        return np.array([known[s] for s in symbols], dtype=np.int64)
+
+    def _grow_symbols(self, meta, capacity):
+        """Extend each file with NaN rows; rows are contiguous, so nothing moves."""
+        if not meta['day_capacity']:
+            meta['symbol_capacity'] = capacity
+            return
+        row_bytes = meta['day_capacity'] * 8
+        for field in FIELDS:
+            path = self._file(field, meta['generation'])
+            with open(path, 'ab') as f:
+                f.write(np.full((capacity - meta['symbol_capacity']) * meta['day_capacity'], np.nan).tobytes())
+            assert os.path.getsize(path) == capacity * row_bytes
+        meta['symbol_capacity'] = capacity
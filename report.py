@@ -0,0 +1,196 @@
+"""
+Headless batch reports for StockView.
+
+Every period x sector combination is computed from one shared history load
+(a ReturnEngine), then written to a report directory:
+
+    index.html                      winners/losers tables and links to every chart
+    returns_<period>.csv|parquet    the full Ticker/Sector/Return table
+    winners_losers_<period>.*       top and bottom tickers of every sector and of all sectors
+    sectors_<period>.*              per-sector summary
+    figures/<period>_<sector>.html  returns bar charts, sharing one figures/plotly.min.js
+                                    (a counter is appended to names that would clash)
+
+The charts are rendered in a process pool; each worker only receives the
+rows it plots.
+"""
+import html
+import os
+import re
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        PARQUET_AVAILABLE = False
+
+import stockview
+from parallel import map_tasks
+
+REPORT_WORKERS = int(os.environ.get('STOCKVIEW_REPORT_WORKERS', os.cpu_count() or 1))
+REPORT_FORMATS = ('csv', 'parquet')
+ALL_SECTORS = 'All sectors'
+
+
+def slug(text):
+    """File-name form of a period or sector name."""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+def figure_name(period, scope, taken):
+    """
+    File name of a period and scope's chart, unique among `taken` (which it
+    joins). Names that slug to nothing or clash with an earlier one, e.g. a
+    sector called "All sectors", get a counter.
+    """
+    base = f"{slug(period) or 'period'}_{slug(scope) or 'sector'}"
+    name, n = base, 1
+    while name in taken:
+        n += 1
+        name = f'{base}-{n}'
+    taken.add(name)
+    return f'{name}.html'
+
+def write_table(df, path, fmt):
+    """Write `df` as `path`.csv or `path`.parquet; returns the file written."""
+    path = f'{path}.{fmt}'
+    if fmt == 'parquet':
+        # Parquet needs plain strings rather than categoricals mixed with objects
+        df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+# ==============================================================================
+# COMBINATIONS
+# ==============================================================================
+def scopes(engine, period):
+    """(sector name, rows) for all sectors and then each sector of the `period` table."""
+    df = engine.returns(period)
+    yield ALL_SECTORS, df
+    for sector, rows in engine.sector_index(period).items():
+        yield sector, df.iloc[rows]
+
+def winners_losers(df, scope, top_n):
+    """Top and bottom `top_n` rows of `df`, labelled with the scope, side and rank."""
+    winners, losers = stockview.top_bottom(df, top_n)
+    parts = []
+    for side, rows in (('Winner', winners), ('Loser', losers)):
+        rows = rows.copy()
+        rows.insert(0, 'Scope', scope)
+        rows.insert(1, 'Side', side)
+        rows.insert(2, 'Rank', range(1, len(rows) + 1))
+        parts.append(rows)
+    return pd.concat(parts, ignore_index=True)
+
+def plot_rows(df):
+    """The rows returns_figure draws: all of them, or the extremes of a large table."""
+    if len(df) <= stockview.PLOT_MAX_TICKERS:
+        return df
+    winners, losers = stockview.top_bottom(df, stockview.PLOT_MAX_TICKERS // 2)
+    return pd.concat([winners, losers])
+
+
+# ==============================================================================
+# RENDERING
+# ==============================================================================
+def _render_figure(path, df, title, total):
+    """Worker task: draw one returns chart and write it as HTML next to the shared plotly.min.js."""
+    import plotly.io as pio
+    fig = stockview.returns_figure(df, title)
+    if fig is None:
+        return None
+    if total > len(df):
+        fig.update_layout(title_text=f"{title} (top and bottom {len(df) // 2} of {total})")
+    pio.write_html(fig, path, include_plotlyjs='directory', full_html=True)
+    return path
+
+def render_figures(tasks, workers=REPORT_WORKERS):
+    """Render (path, rows, title, total) tasks, over a process pool when there are several workers."""
+    return map_tasks(_render_figure, tasks, workers)
+
+def write_plotlyjs(directory):
+    """Write the plotly.js bundle the figures in `directory` share."""
+    from plotly.offline import get_plotlyjs
+    path = os.path.join(directory, 'plotly.min.js')
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return path
+
+def write_index(out_dir, sections, generated):
+    """index.html: per period, the winners and losers of all sectors and links to every chart."""
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>StockView Report</title>"
+             "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+             "td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style></head><body>",
+             f"<h1>StockView Report</h1><p>Generated {html.escape(generated)}</p>"]
+    for label, table, files, charts in sections:
+        parts.append(f"<h2>{html.escape(label)}</h2>")
+        parts.append(table.to_html(index=False, float_format=lambda v: f'{v:.2f}', border=0))
+        parts.append('<p>Data: ' + ', '.join(f"<a href='{html.escape(os.path.basename(p))}'>"
+                                            f"{html.escape(os.path.basename(p))}</a>" for p in files) + '</p>')
+        parts.append('<p>Charts: ' + ', '.join(f"<a href='figures/{html.escape(os.path.basename(p))}'>"
+                                              f"{html.escape(name)}</a>" for name, p in charts) + '</p>')
+    parts.append("</body></html>")
+    path = os.path.join(out_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+    return path
+
+
+# ==============================================================================
+# REPORT
+# ==============================================================================
+def build_report(engine, out_dir, periods=None, fmt='csv', top_n=3, workers=REPORT_WORKERS):
+    """
+    Write tables and charts for every period x sector combination of the
+    engine's universe to `out_dir`. Returns the number of files written.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {', '.join(REPORT_FORMATS)}")
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ValueError("Parquet output needs pyarrow or fastparquet installed.")
+    periods = periods or list(stockview.PERIOD_LABELS)
+    figures_dir = os.path.join(out_dir, 'figures')
+    os.makedirs(figures_dir, exist_ok=True)
+    start = time.perf_counter()
+    engine.history()
+
+    sections, tasks, taken = [], [], set()
+    for period in periods:
+        label = f"{stockview.PERIOD_LABELS.get(period, period)} Returns"
+        df = engine.returns(period)
+        if df.empty:
+            print(f"  [!] No data for {label}; skipped.")
+            continue
+        extremes, charts = [], []
+        for i, (scope, rows) in enumerate(scopes(engine, period)):
+            extremes.append(winners_losers(rows, scope, top_n))
+            path = os.path.join(figures_dir, figure_name(period, scope, taken))
+            # The first scope is all sectors, even if a sector has the same name
+            title = label if i == 0 else f"{label} - {scope}"
+            tasks.append((path, plot_rows(rows), title, len(rows)))
+            charts.append((scope, path))
+        overall = extremes[0]
+        extremes = pd.concat(extremes, ignore_index=True)
+        files = [
+            write_table(df, os.path.join(out_dir, f'returns_{slug(period)}'), fmt),
+            write_table(extremes, os.path.join(out_dir, f'winners_losers_{slug(period)}'), fmt),
+            write_table(stockview.sector_summary(df), os.path.join(out_dir, f'sectors_{slug(period)}'), fmt),
+        ]
+        sections.append((label, overall, files, charts))
+    computed = time.perf_counter() - start
+
+    write_plotlyjs(figures_dir)
+    rendered = [path for path in render_figures(tasks, workers) if path]
+    write_index(out_dir, sections, pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'))
+    print(f"Report written to {out_dir}: {len(sections)} period(s), {len(rendered)} chart(s) "
+          f"(tables {computed:.2f}s, charts {time.perf_counter() - start - computed:.2f}s)")
+    return 1 + sum(len(files) for _, _, files, _ in sections) + len(rendered)
@@ -0,0 +1,282 @@
+"""
+Correlation and risk analytics over a whole ticker universe.
+
+Daily returns are held as one [day, symbol] array. Rolling covariance and
+correlation matrices come from pairwise sums (count, sum, sum of squares,
+cross products) over the window, kept up to date a block of days at a time:
+each step adds the products of the days entering the window and subtracts
+those of the days leaving it, as a few matrix products over every symbol
+pair at once. Missing returns (a symbol not trading yet, a gap in its
+history) only drop the pairs they affect, like DataFrame.corr.
+
+From the latest window come the symbol correlation matrix, average
+correlations between and within sectors, annualized volatility and beta
+against an equal-weighted universe or sector benchmark; every step also
+records the universe's average correlation, volatilities and betas.
+"""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# Rolling window (trading days) and the days between recorded windows.
+RISK_WINDOW = 63
+RISK_STEP = 5
+
+BENCHMARKS = ('universe', 'sector')
+
+
+def daily_returns(closes):
+    """Simple returns of a [day, symbol] array of closes; NaN where either close is missing."""
+    closes = np.asarray(closes, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return closes[1:] / closes[:-1] - 1.0
+
+def group_matrix(labels):
+    """(sorted distinct labels, [item, label] one-hot float matrix)."""
+    names, codes = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    groups = np.zeros((len(codes), len(names)))
+    groups[np.arange(len(codes)), codes] = 1.0
+    return list(names), groups
+
+def benchmark_returns(returns, groups):
+    """Equal-weighted mean of the valid returns of each group's members, per day ([day, group])."""
+    valid = ~np.isnan(returns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.where(valid, returns, 0.0) @ groups) / (valid @ groups)
+
+
+# ==============================================================================
+# ROLLING PAIRWISE MOMENTS
+# ==============================================================================
+class RollingMoments:
+    """
+    Sums over the rows currently in a window, for every pair of a column of x
+    and a column of y, using only rows where both values are present. Rows are
+    added and removed in blocks. Without y the pairs are x against itself and
+    the symmetric sums are derived instead of computed twice.
+    """
+
+    def __init__(self, nx, ny=None):
+        self.symmetric = ny is None
+        shape = (nx, nx if ny is None else ny)
+        self.n = np.zeros(shape)
+        self.sx = np.zeros(shape)
+        self.sxx = np.zeros(shape)
+        self.sxy = np.zeros(shape)
+        if not self.symmetric:
+            self.sy = np.zeros(shape)
+            self.syy = np.zeros(shape)
+
+    def _update(self, x, y, sign):
+        """Add the rows of x (and y) whose `sign` is +1 and subtract those whose sign is -1."""
+        mx = ~np.isnan(x)
+        x0 = np.where(mx, x, 0.0)
+        mx = mx.astype(np.float64)
+        if self.symmetric:
+            my, y0 = mx, x0
+        else:
+            my = ~np.isnan(y)
+            y0 = np.where(my, y, 0.0)
+            my = my.astype(np.float64)
+        # Every sum is one matrix product with the signed y side
+        my_signed, y0_signed = my * sign, y0 * sign
+        if not self.symmetric:
+            self.sy += mx.T @ y0_signed
+            self.syy += mx.T @ (y0 * y0_signed)
+        self.n += mx.T @ my_signed
+        self.sx += x0.T @ my_signed
+        self.sxx += (x0 * x0).T @ my_signed
+        self.sxy += x0.T @ y0_signed
+
+    def add(self, x, y=None):
+        self._update(x, y, np.ones((len(x), 1)))
+
+    def slide(self, entering, leaving, entering_y=None, leaving_y=None):
+        """Add the rows entering the window and remove those leaving it, in one pass."""
+        x = np.concatenate([entering, leaving])
+        y = None if self.symmetric else np.concatenate([entering_y, leaving_y])
+        sign = np.concatenate([np.ones(len(entering)), -np.ones(len(leaving))])[:, None]
+        self._update(x, y, sign)
+
+    def _y_sums(self):
+        if self.symmetric:
+            return self.sx.T, self.sxx.T
+        return self.sy, self.syy
+
+    def _too_few(self, out, min_periods):
+        out[self.n < max(min_periods, 2)] = np.nan
+        return out
+
+    def cov(self, min_periods=2):
+        """Sample covariance of every pair; NaN with fewer than `min_periods` shared rows."""
+        sy, _ = self._y_sums()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = self.sx * sy
+            out /= self.n
+            np.subtract(self.sxy, out, out=out)
+            out /= self.n - 1
+        return self._too_few(out, min_periods)
+
+    def variance(self, min_periods=2):
+        """Sample variance of each x column on its own (the diagonal of a symmetric cov)."""
+        n, s, ss = (np.diagonal(a) for a in (self.n, self.sx, self.sxx))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = (ss - s * s / n) / (n - 1)
+        out[n < max(min_periods, 2)] = np.nan
+        return out
+
+    def var_y(self, min_periods=2):
+        """Sample variance of each y column over the rows it shares with each x column."""
+        sy, syy = self._y_sums()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = (syy - sy * sy / self.n) / (self.n - 1)
+        return self._too_few(out, min_periods)
+
+    def corr(self, min_periods=2):
+        """Pearson correlation of every pair; NaN with too few shared rows or a constant column."""
+        sy, syy = self._y_sums()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # n * sum(x^2) - sum(x)^2, over the rows each pair shares; y's is its transpose when symmetric
+            spread_x = self.n * self.sxx
+            spread_x -= self.sx * self.sx
+            if self.symmetric:
+                den = spread_x * spread_x.T
+            else:
+                spread_y = self.n * syy
+                spread_y -= sy * sy
+                den = spread_x * spread_y
+            np.sqrt(den, out=den)
+            out = self.n * self.sxy
+            out -= self.sx * sy
+            out /= den
+            np.clip(out, -1.0, 1.0, out=out)
+        out[~(den > 0)] = np.nan
+        return self._too_few(out, min_periods)
+
+
+def group_average(matrix, groups, exclude_diagonal=True):
+    """
+    Mean of the valid entries of a [symbol, symbol] matrix between every pair
+    of groups ([group, group]); a symbol's entry with itself is left out.
+    """
+    valid = ~np.isnan(matrix)
+    if exclude_diagonal:
+        np.fill_diagonal(valid, False)
+    values = np.where(valid, matrix, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (groups.T @ values @ groups) / (groups.T @ valid.astype(np.float64) @ groups)
+
+
+# ==============================================================================
+# RISK REPORT
+# ==============================================================================
+def window_ends(n_rows, window, step):
+    """Row counts at which each recorded window ends, the last one at `n_rows`."""
+    if n_rows < window:
+        return np.empty(0, dtype=np.int64)
+    return np.arange(n_rows, window - 1, -step)[::-1]
+
+def _mean_off_diagonal(matrix):
+    """Mean of the valid entries of a square matrix, leaving out its diagonal."""
+    valid = ~np.isnan(matrix)
+    diagonal = np.diagonal(matrix)
+    count = np.count_nonzero(valid) - np.count_nonzero(~np.isnan(diagonal))
+    if count == 0:
+        return np.nan
+    return (np.sum(matrix, where=valid) - np.nansum(diagonal)) / count
+
+def risk_analytics(closes, symbols, sectors, window=RISK_WINDOW, step=RISK_STEP,
+                   benchmark='universe', min_periods=None):
+    """
+    Rolling risk of the columns of `closes` ([day, symbol], oldest first).
+    `sectors` maps each symbol to its sector; `benchmark` is 'universe' or
+    'sector'. Returns a dict:
+
+        symbols, sectors      the symbols and their sectors, in column order
+        sector_names          distinct sectors, in sector matrix order
+        corr, cov             [symbol, symbol] matrices of the latest window
+        sector_corr           [sector, sector] average correlations
+        volatility, beta      per symbol, latest window (volatility annualized, %)
+        ends                  row of `closes` each recorded window ends on
+        avg_corr              average pairwise correlation per recorded window
+        rolling_volatility, rolling_beta   [window, symbol]
+    """
+    if benchmark not in BENCHMARKS:
+        raise ValueError(f"Unsupported benchmark '{benchmark}'. Choose from: {', '.join(BENCHMARKS)}")
+    min_periods = min_periods or max(window // 2, 2)
+    returns = daily_returns(closes)
+    n_rows, n = returns.shape
+    symbol_sectors = [sectors.get(s, 'Unknown') for s in symbols]
+    sector_names, groups = group_matrix(symbol_sectors) if n else ([], np.zeros((0, 0)))
+    if benchmark == 'sector':
+        bench = benchmark_returns(returns, groups)
+        own = np.argmax(groups, axis=1) if n else np.empty(0, dtype=np.int64)
+    else:
+        bench = benchmark_returns(returns, np.ones((n, 1)))
+        own = np.zeros(n, dtype=np.int64)
+
+    ends = window_ends(n_rows, window, step)
+    pairs = versus = None
+    avg_corr = np.full(len(ends), np.nan)
+    rolling_vol = np.full((len(ends), n), np.nan)
+    rolling_beta = np.full((len(ends), n), np.nan)
+    columns = np.arange(n)
+    corr = np.full((n, n), np.nan)
+    previous = None
+    for k, end in enumerate(ends):
+        start = end - window
+        if previous is None or start >= previous:
+            # First window, or no overlap with the last one: sum it from scratch
+            pairs, versus = RollingMoments(n), RollingMoments(n, bench.shape[1])
+            pairs.add(returns[start:end])
+            versus.add(returns[start:end], bench[start:end])
+        else:
+            # Add the days entering the window and subtract the days leaving it
+            entering, leaving = slice(previous, end), slice(previous - window, start)
+            pairs.slide(returns[entering], returns[leaving])
+            versus.slide(returns[entering], returns[leaving], bench[entering], bench[leaving])
+        previous = end
+        corr = pairs.corr(min_periods)
+        avg_corr[k] = _mean_off_diagonal(corr)
+        rolling_vol[k] = np.sqrt(pairs.variance(min_periods) * TRADING_DAYS) * 100
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rolling_beta[k] = (versus.cov(min_periods) / versus.var_y(min_periods))[columns, own]
+
+    cov = pairs.cov(min_periods) if pairs is not None else np.full((n, n), np.nan)
+    return {
+        'symbols': list(symbols),
+        'sectors': symbol_sectors,
+        'sector_names': sector_names,
+        'corr': corr,
+        'cov': cov,
+        'sector_corr': group_average(corr, groups) if n else np.zeros((0, 0)),
+        'volatility': rolling_vol[-1] if len(ends) else np.full(n, np.nan),
+        'beta': rolling_beta[-1] if len(ends) else np.full(n, np.nan),
+        'ends': ends,
+        'avg_corr': avg_corr,
+        'rolling_volatility': rolling_vol,
+        'rolling_beta': rolling_beta,
+    }
+
+def risk_table(report):
+    """Ticker, Sector, Volatility, Beta and average correlation with the rest of the universe."""
+    corr = report['corr'].copy()
+    np.fill_diagonal(corr, np.nan)
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(corr)
+        mean_corr = np.where(valid, corr, 0.0).sum(axis=1) / valid.sum(axis=1)
+    return pd.DataFrame({'Ticker': report['symbols'], 'Sector': report['sectors'],
+                         'Volatility': report['volatility'], 'Beta': report['beta'], 'AvgCorr': mean_corr})
+
+def sector_risk(report):
+    """Per-sector ticker count, mean volatility and beta, and average correlation within the sector."""
+    table = risk_table(report)
+    summary = table.groupby('Sector', sort=True).agg(
+        Tickers=('Ticker', 'count'),
+        Volatility=('Volatility', 'mean'),
+        Beta=('Beta', 'mean'),
+    )
+    within = np.diagonal(report['sector_corr']) if len(report['sector_names']) else []
+    summary['IntraCorr'] = pd.Series(within, index=report['sector_names'])
+    return summary.reset_index()
@@ -0,0 +1,264 @@
+"""
+Technical screener over a whole ticker universe.
+
+The indicator set of run_technical_analysis (SMAs, Bollinger Bands and %B,
+RSI, MACD) is computed on a 2-D [day, symbol] array of closes, with numpy
+operating on every symbol at once. Only the last two bars are kept, which is
+enough to compare values and to detect crossovers. A query such as
+
+    RSI < 30 and close above SMA_200
+    SMA_50 crosses above SMA_200 or (pct_b < 0 and macd > signal)
+
+then selects the matching symbols.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_CONFIG, history_bars
+
+# Snapshot fields, in output order.
+FIELDS = ('Close', 'SMA_20', 'SMA_50', 'SMA_200', 'Upper_Band', 'Lower_Band', 'PctB',
+          'RSI', 'MACD', 'Signal_Line', 'MACD_Hist')
+
+# Query spellings of each field, compared lower-case with underscores removed.
+FIELD_ALIASES = {
+    'price': 'Close', 'upper': 'Upper_Band', 'lower': 'Lower_Band', '%b': 'PctB', 'percentb': 'PctB',
+    'signal': 'Signal_Line', 'hist': 'MACD_Hist', 'histogram': 'MACD_Hist',
+}
+FIELD_ALIASES.update({f.lower().replace('_', ''): f for f in FIELDS})
+
+# Bars of history used per symbol: enough for every indicator on the last two bars.
+SCREEN_BARS = history_bars(2)
+
+
+# ==============================================================================
+# INDICATORS ON [DAY, SYMBOL] ARRAYS
+# ==============================================================================
+def align_right(closes):
+    """
+    Shift each column's valid closes to the bottom of the array, in order, so
+    the last row holds every symbol's latest close even when symbols skipped
+    different days. Missing bars become leading NaNs.
+    """
+    valid = ~np.isnan(closes)
+    if valid.all():
+        return closes
+    order = np.argsort(valid, axis=0, kind='stable')
+    return np.take_along_axis(closes, order, axis=0)
+
+def _tail_windows(values, window, rows=2):
+    """The last `rows` trailing windows of `window` bars, as a (rows, window, symbols) array."""
+    n = values.shape[0]
+    out = np.full((rows, window, values.shape[1]), np.nan)
+    for i in range(rows):
+        end = n - rows + 1 + i
+        if end >= window:
+            out[i] = values[end - window:end]
+    return out
+
+def _ema(values, span):
+    """ewm(span, adjust=False) down each column, seeded at the column's first valid value."""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(values)
+    current = np.full(values.shape[1], np.nan)
+    for i, row in enumerate(values):
+        current = np.where(np.isnan(current), row, current + alpha * (row - current))
+        out[i] = current
+    return out
+
+def snapshot(closes, config=INDICATOR_CONFIG):
+    """
+    Indicator values on the last two bars of every column of `closes`
+    ([day, symbol], oldest first). Returns {field: (2, symbols) array};
+    row 1 is the latest bar and row 0 the bar before.
+    """
+    closes = align_right(np.asarray(closes, dtype=np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = {'Close': _tail_windows(closes, 1)[:, 0]}
+        for n in config['sma']:
+            out[f'SMA_{n}'] = _tail_windows(closes, n).mean(axis=1)
+        window, num_std = config['bollinger']
+        band = _tail_windows(closes, window)
+        mid, std = band.mean(axis=1), band.std(axis=1, ddof=1)
+        out['Upper_Band'] = mid + std * num_std
+        out['Lower_Band'] = mid - std * num_std
+        out['PctB'] = (out['Close'] - out['Lower_Band']) / (out['Upper_Band'] - out['Lower_Band'])
+
+        # Gains and losses of each window; the first bar of a column counts as no change
+        rsi_window = config['rsi']
+        delta = np.diff(closes, axis=0, prepend=np.nan)
+        delta[np.isnan(delta) & ~np.isnan(closes)] = 0.0
+        deltas = _tail_windows(delta, rsi_window)
+        gain = np.where(deltas > 0, deltas, 0.0).mean(axis=1)
+        loss = np.where(deltas < 0, -deltas, 0.0).mean(axis=1)
+        # A window reaching before the column's first close has no RSI yet
+        incomplete = np.isnan(_tail_windows(closes, rsi_window)).any(axis=1)
+        rsi = 100 - 100 / (1 + gain / loss)
+        rsi[incomplete] = np.nan
+        out['RSI'] = rsi
+
+        fast, slow, signal = config['macd']
+        macd = _ema(closes, fast) - _ema(closes, slow)
+        signal_line = _ema(macd, signal)
+        out['MACD'] = macd[-2:] if len(macd) >= 2 else np.full((2, closes.shape[1]), np.nan)
+        out['Signal_Line'] = signal_line[-2:] if len(macd) >= 2 else np.full((2, closes.shape[1]), np.nan)
+        out['MACD_Hist'] = out['MACD'] - out['Signal_Line']
+    return out
+
+
+# ==============================================================================
+# QUERIES
+# ==============================================================================
+_TOKEN = re.compile(r'\s*(?:(<=|>=|==|!=|<|>|\(|\))|(-?\d+(?:\.\d+)?)|(%?[A-Za-z_][A-Za-z0-9_]*))')
+_COMPARISONS = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+                '==': np.equal, '!=': np.not_equal, 'above': np.greater, 'below': np.less}
+
+
+def tokenize(query):
+    tokens, pos = [], 0
+    query = query.strip()
+    while pos < len(query):
+        match = _TOKEN.match(query, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected text in query at: '{query[pos:].strip()}'")
+        op, number, word = match.groups()
+        tokens.append(('op', op) if op else ('number', float(number)) if number else ('word', word.lower()))
+        pos = match.end()
+    return tokens
+
+
+def _known(left, right):
+    """Where neither operand is NaN."""
+    return ~(np.isnan(left) | np.isnan(right))
+
+
+class _Parser:
+    """
+    Recursive-descent evaluation of a screen query:
+
+        expr       := term ('or' term)*
+        term       := factor ('and' factor)*
+        factor     := 'not' factor | '(' expr ')' | operand comparison operand
+        comparison := < | <= | > | >= | == | != | above | below
+                      | crosses above | crosses below
+        operand    := number | field
+
+    Each part evaluates to two boolean masks, (true, false): where it holds and
+    where it is known not to. A comparison involving NaN is in neither, so
+    'not' (which swaps them) cannot turn a missing value into a match.
+    """
+
+    def __init__(self, tokens, values):
+        self.tokens = tokens
+        self.values = values
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        """Mask of the symbols the whole query holds for."""
+        true, _ = self.expr()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.pos][1]}' in query.")
+        return true
+
+    def expr(self):
+        true, false = self.term()
+        while self.peek() == ('word', 'or'):
+            self.take()
+            other_true, other_false = self.term()
+            true, false = true | other_true, false & other_false
+        return true, false
+
+    def term(self):
+        true, false = self.factor()
+        while self.peek() == ('word', 'and'):
+            self.take()
+            other_true, other_false = self.factor()
+            true, false = true & other_true, false | other_false
+        return true, false
+
+    def factor(self):
+        if self.peek() == ('word', 'not'):
+            self.take()
+            true, false = self.factor()
+            return false, true
+        if self.peek() == ('op', '('):
+            self.take()
+            result = self.expr()
+            if self.take() != ('op', ')'):
+                raise ValueError("Missing ')' in query.")
+            return result
+        left = self.operand()
+        kind, op = self.take()
+        if op == 'crosses':
+            direction = self.take()[1]
+            if direction not in ('above', 'below'):
+                raise ValueError("Expected 'above' or 'below' after 'crosses'.")
+            right = self.operand()
+            compare = np.greater if direction == 'above' else np.less
+            known = _known(left[1], right[1]) & _known(left[0], right[0])
+            # On the side of `right` now, and not on the previous bar
+            true = compare(left[1], right[1]) & ~compare(left[0], right[0]) & known
+            return true, known & ~true
+        if op not in _COMPARISONS:
+            raise ValueError(f"Expected a comparison, found '{op}'.")
+        right = self.operand()
+        known = _known(left[1], right[1])
+        true = _COMPARISONS[op](left[1], right[1])
+        return true, known & ~true
+
+    def operand(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return (value, value)
+        if kind == 'word':
+            field = FIELD_ALIASES.get(value.replace('_', ''))
+            if field is None:
+                raise ValueError(f"Unknown field '{value}'. Fields: {', '.join(FIELDS)}")
+            return self.values[field]
+        raise ValueError("Expected a field or a number in query.")
+
+
+def evaluate(query, values):
+    """Boolean mask of the symbols in `values` (a snapshot) matching `query`; comparisons with NaN are false."""
+    tokens = tokenize(query)
+    if not tokens:
+        raise ValueError("Empty screen query.")
+    with np.errstate(invalid='ignore'):
+        mask = _Parser(tokens, values).parse()
+    # A query comparing only numbers is a scalar; spread it over every symbol,
+    # but never match a symbol without a latest close
+    return np.broadcast_to(np.asarray(mask, dtype=bool), values['Close'].shape[1:]) & ~np.isnan(values['Close'][1])
+
+
+def screen(closes, symbols, query, sectors=None):
+    """
+    Symbols whose latest indicators match `query`, as a DataFrame of Ticker
+    (and Sector, given a {ticker: sector} dict) plus every snapshot field.
+    `closes` is a [day, symbol] array with one column per symbol; symbols
+    without any close are left out.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    priced = ~np.isnan(closes).all(axis=0)
+    if not priced.all():
+        closes = closes[:, priced]
+        symbols = [s for s, keep in zip(symbols, priced) if keep]
+    values = snapshot(closes)
+    mask = evaluate(query, values)
+    rows = np.flatnonzero(mask)
+    matched = [symbols[i] for i in rows]
+    df = pd.DataFrame({'Ticker': matched})
+    if sectors is not None:
+        df['Sector'] = [sectors.get(s) for s in matched]
+    for field in FIELDS:
+        df[field] = values[field][1, rows]
+    return df
@@ -0,0 +1,23 @@
+"""
+Serves StockView with waitress, a production WSGI server that also runs on
+Windows. Start several of these behind a load balancer for more processes;
+they share state through the cache backend.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--threads 16]
+"""
+import argparse
+
+from waitress import serve
+
+from stockviewer import WARM_UP, app, warm_up
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run StockView under waitress.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+    if WARM_UP:
+        warm_up()
+    print(f"Serving StockView on http://{args.host}:{args.port} with {args.threads} threads.")
+    serve(app, host=args.host, port=args.port, threads=args.threads)
@@ -0,0 +1,55 @@
+"""
+In-flight request coalescing.
+
+When several threads ask for the same key at once, only the first runs the
+work; the rest wait for it and share its result (or its exception).
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with equal keys into a single execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {'executions': 0, 'shared': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` unless a call for `key` is already running; then wait for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters['executions'] += 1
+            else:
+                self.counters['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls))
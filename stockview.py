@@ -1,6 +1,15 @@
-import yfinance as yf
+import argparse
+import json
+import os
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
+
+# yfinance and plotly are imported by the functions that download and plot,
+# so a fresh panel, a screen or a batch report's tables never load them.
+from price_panel import DEFAULT_DIR as PANEL_DIR, PricePanel
+from risk import BENCHMARKS, RISK_WINDOW, TRADING_DAYS, risk_analytics, sector_risk
+from screener import SCREEN_BARS, screen
 
 try:
     from tabulate import tabulate
@@ -89,11 +98,63 @@ TICKERS = {
     'TMUS': 'Communication Services',
 }
 
+def load_universe(path):
+    """
+    Read a {ticker: sector} universe from a file, in place of TICKERS.
+    CSV/TSV files need a Ticker (or Symbol) column and a Sector column;
+    JSON files hold either {"AAPL": "Technology", ...} or a list of
+    {"ticker": ..., "sector": ...} records.
+    """
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            pairs = data.items()
+        else:
+            pairs = ((row.get('ticker') or row.get('symbol'), row.get('sector')) for row in data)
+    else:
+        frame = pd.read_csv(path, sep=None, engine='python', dtype=str)
+        columns = {c.strip().lower(): c for c in frame.columns}
+        ticker_col = columns.get('ticker') or columns.get('symbol')
+        if ticker_col is None or 'sector' not in columns:
+            raise ValueError(f"{path} needs a Ticker (or Symbol) column and a Sector column.")
+        pairs = zip(frame[ticker_col], frame[columns['sector']])
+    universe = {}
+    for ticker, sector in pairs:
+        if isinstance(ticker, str) and ticker.strip():
+            universe[ticker.strip().upper()] = sector.strip() if isinstance(sector, str) and sector.strip() else 'Unknown'
+    if not universe:
+        raise ValueError(f"No tickers found in {path}.")
+    return universe
+
+# Maximum number of tickers requested per yf.download call
+BATCH_SIZE = 100
+
+# Most tickers drawn in the returns bar chart; larger tables plot their extremes
+PLOT_MAX_TICKERS = 60
+
+# Most tickers drawn individually in the correlation heatmap; larger universes show sectors only
+HEATMAP_MAX_TICKERS = 500
+
+# Longest period downloaded by ReturnEngine; every other period is sliced from it
+HISTORY_PERIOD = '1y'
+
+# Calendar look-back of each selectable period, anchored on the latest bar.
+# None means "the latest bar only".
+PERIOD_OFFSETS = {
+    '1d': None,
+    '7d': pd.DateOffset(days=7),
+    '1mo': pd.DateOffset(months=1),
+    '1y': pd.DateOffset(years=1),
+}
+PERIOD_LABELS = {'1d': "Day", '7d': "Week", '1mo': "Month", '1y': "Year"}
+
 def get_returns(ticker, period):
     """
     Fetch and calculate percent return for a ticker over a given period.
     Handles empty data and missing columns robustly.
     """
+    import yfinance as yf
     try:
         data = yf.download(
             ticker,
@@ -102,6 +163,9 @@ def get_returns(ticker, period):
             progress=False,
             auto_adjust=False  # Explicit to avoid FutureWarning
         )
+        if isinstance(data.columns, pd.MultiIndex):
+            # Newer yfinance keeps a ticker level even for a single symbol
+            data = data.xs(ticker, axis=1, level=-1)
         if data.empty or 'Open' not in data.columns or 'Close' not in data.columns:
             print(f"  [!] No valid data for {ticker} in period '{period}'.")
             return None
@@ -113,8 +177,8 @@ def get_returns(ticker, period):
         print(f"  [!] Error fetching data for {ticker}: {e}")
         return None
 
-def get_all_returns(tickers, period):
-    """Get returns for all tickers."""
+def get_all_returns_serial(tickers, period):
+    """Get returns for all tickers, one yf.download call per ticker."""
     results = []
     print("\nFetching data for tickers. This may take a moment...\n")
     for i, (ticker, sector) in enumerate(tickers.items(), 1):
@@ -125,6 +189,240 @@ def get_all_returns(tickers, period):
     print(" " * 40, end="\r")  # Clear progress line
     return pd.DataFrame(results)
 
+def download_history(tickers, period, batch_size=BATCH_SIZE):
+    """
+    Download daily bars for many tickers with one yf.download call per chunk.
+    Returns a wide DataFrame with (field, ticker) columns; a chunk that fails
+    entirely is reported and skipped so the rest of the batch survives.
+    """
+    import yfinance as yf
+    symbols = list(tickers)
+    frames = []
+    for start in range(0, len(symbols), batch_size):
+        chunk = symbols[start:start + batch_size]
+        try:
+            data = yf.download(
+                chunk,
+                period=period,
+                interval='1d',
+                group_by='column',
+                progress=False,
+                auto_adjust=False,
+                threads=True
+            )
+        except Exception as e:
+            print(f"  [!] Error fetching batch {chunk[0]}..{chunk[-1]}: {e}")
+            continue
+        if data.empty:
+            continue
+        if not isinstance(data.columns, pd.MultiIndex):
+            # Older yfinance releases return flat columns for a single ticker
+            data.columns = pd.MultiIndex.from_product([data.columns, chunk])
+        frames.append(data)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
+
+def _first_valid(values):
+    """First non-NaN value of each column of a 2-D array (NaN for all-NaN columns)."""
+    if values.shape[0] == 0:
+        return np.full(values.shape[1], np.nan)
+    present = ~np.isnan(values)
+    first = values[present.argmax(axis=0), np.arange(values.shape[1])]
+    first[~present.any(axis=0)] = np.nan
+    return first
+
+def compute_returns(data, tickers):
+    """
+    Compute every ticker's Open-to-Close percent return from a wide frame.
+    Returns (Series of returns indexed by ticker, list of failed tickers).
+    """
+    tickers = list(tickers)
+    if data.empty or 'Open' not in data.columns or 'Close' not in data.columns:
+        return pd.Series(dtype=float), tickers
+    # First valid open and last valid close per column, on one array rather than per column
+    values = data.to_numpy(dtype=float)
+    fields = data.columns.get_level_values(0)
+    symbols = data.columns.get_level_values(-1)
+    opens, closes = fields == 'Open', fields == 'Close'
+    start_prices = pd.Series(_first_valid(values[:, opens]), index=symbols[opens])
+    end_prices = pd.Series(_first_valid(values[::-1, closes]), index=symbols[closes])
+    return _valid_returns(start_prices, end_prices, tickers)
+
+def panel_returns(panel, tickers, start_row=0):
+    """
+    compute_returns over a PricePanel: reads views of the open and close
+    files from `start_row` (a calendar position) to the last stored day.
+    """
+    tickers = list(tickers)
+    symbols, rows = panel.rows(tickers)
+    if not symbols:
+        return pd.Series(dtype=float), tickers
+    # [symbol, day] views; transposed they are [day, symbol] like the wide frame
+    opens = panel.field('open')[rows, start_row:].T
+    closes = panel.field('close')[rows, start_row:].T
+    start_prices = pd.Series(_first_valid(opens), index=symbols)
+    end_prices = pd.Series(_first_valid(closes[::-1]), index=symbols)
+    return _valid_returns(start_prices, end_prices, tickers)
+
+def _valid_returns(start_prices, end_prices, tickers):
+    """Percent returns reindexed to `tickers`, split into (valid returns, failed tickers)."""
+    returns = (end_prices - start_prices) / start_prices * 100
+    returns = returns.reindex(tickers)
+    valid = returns.notna() & ~returns.isin([float('inf'), float('-inf')])
+    failed = returns.index[~valid].tolist()
+    return returns[valid], failed
+
+def _returns_frame(returns, failed, tickers, period):
+    """Report failed tickers and shape returns into the Ticker/Sector/Return table."""
+    if failed:
+        print(f"  [!] No valid data for {len(failed)} ticker(s) in period '{period}': {', '.join(failed)}")
+    # Sector is categorical: filtering and grouping compare small integer codes, not strings
+    df = pd.DataFrame({
+        'Ticker': returns.index,
+        'Sector': pd.Categorical([tickers[t] for t in returns.index], categories=sorted(set(tickers.values()))),
+        'Return': returns.values
+    })
+    df.attrs['failed'] = failed
+    return df
+
+def get_all_returns(tickers, period):
+    """Get returns for all tickers using batched downloads."""
+    print("\nFetching data for tickers. This may take a moment...\n")
+    data = download_history(tickers, period)
+    returns, failed = compute_returns(data, tickers)
+    return _returns_frame(returns, failed, tickers, period)
+
+class ReturnEngine:
+    """
+    Downloads the longest period once per session and derives the returns of
+    every shorter period from that single in-memory history.
+
+    With a PricePanel the history is kept in (and read back from) the panel's
+    memory-mapped files instead, and a panel already refreshed during the
+    current trading day is used without downloading anything. With
+    download=False the panel is used as it is, however old.
+    """
+
+    def __init__(self, tickers, history_period=HISTORY_PERIOD, panel=None, download=True):
+        self.tickers = tickers
+        self.history_period = history_period
+        self.panel = panel
+        self.download = download
+        self._history = None
+        self._returns = {}
+        self._sector_index = {}
+
+    def history(self):
+        """Return the wide daily history, downloading it on first use."""
+        if self._history is None:
+            if self.panel is not None and (not self.download or self.panel.is_fresh(self.tickers)):
+                self._history = pd.DataFrame()
+                return self._history
+            print("\nFetching data for tickers. This may take a moment...\n")
+            self._history = download_history(self.tickers, self.history_period)
+            if self.panel is not None:
+                self.panel.write_wide(self._history, requested=self.tickers)
+        return self._history
+
+    def calendar(self):
+        """The trading days returns are computed over."""
+        if self.panel is not None:
+            self.history()
+            return self.panel.calendar
+        return self.history().index
+
+    def closes(self, bars=None):
+        """
+        ([day, ticker] array of closes over the newest `bars` days, tickers
+        present in it). With a panel this is a view of its close file.
+        """
+        if self.panel is not None:
+            self.history()
+            symbols, rows = self.panel.rows(list(self.tickers))
+            closes = self.panel.field('close')[rows]
+            return (closes[:, -bars:] if bars else closes).T, symbols
+        data = self.history()
+        if data.empty or 'Close' not in data.columns:
+            return np.empty((0, 0)), []
+        close = data['Close']
+        symbols = [t for t in self.tickers if t in close.columns]
+        values = close[symbols].to_numpy(dtype=float)
+        return (values[-bars:] if bars else values), symbols
+
+    def start_row(self, period):
+        """Index of the first bar inside `period`, anchored on the last bar."""
+        index = self.calendar()
+        if period not in PERIOD_OFFSETS:
+            raise ValueError(f"Unsupported period '{period}'. Choose from: {', '.join(PERIOD_OFFSETS)}")
+        offset = PERIOD_OFFSETS[period]
+        if offset is None:
+            return max(len(index) - 1, 0)
+        return int(index.searchsorted(index[-1] - offset, side='left'))
+
+    def returns(self, period):
+        """Return the Ticker/Sector/Return table for `period` without touching the network."""
+        if period not in self._returns:
+            if self.panel is not None:
+                returns, failed = panel_returns(self.panel, self.tickers, self.start_row(period))
+                self._returns[period] = _returns_frame(returns, failed, self.tickers, period)
+                return self._returns[period]
+            data = self.history()
+            if data.empty:
+                returns, failed = compute_returns(data, self.tickers)
+            else:
+                returns, failed = compute_returns(data.iloc[self.start_row(period):], self.tickers)
+            self._returns[period] = _returns_frame(returns, failed, self.tickers, period)
+        return self._returns[period]
+
+    def sector_index(self, period):
+        """{sector: row positions} of the `period` table, built once per period."""
+        if period not in self._sector_index:
+            self._sector_index[period] = sector_index(self.returns(period))
+        return self._sector_index[period]
+
+# ==============================================================================
+# RANKING AND SECTORS
+# ==============================================================================
+def sector_index(df):
+    """Map each sector present in `df` to its row positions, from one sort of the sector codes."""
+    sectors = df['Sector'].astype('category')
+    codes = sectors.cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(sectors.cat.categories) + 1))
+    return {sector: order[bounds[i]:bounds[i + 1]]
+            for i, sector in enumerate(sectors.cat.categories) if bounds[i + 1] > bounds[i]}
+
+def top_bottom(df, top_n=3, column='Return'):
+    """
+    The `top_n` highest and lowest rows by `column` (best first, worst first),
+    found by partial selection rather than sorting the whole frame.
+    """
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    k = min(top_n, len(valid))
+    if k == 0:
+        return df.iloc[:0], df.iloc[:0]
+    valid_values = values[valid]
+    top = valid[np.argpartition(-valid_values, k - 1)[:k]]
+    bottom = valid[np.argpartition(valid_values, k - 1)[:k]]
+    top = top[np.argsort(-values[top], kind='stable')]
+    bottom = bottom[np.argsort(values[bottom], kind='stable')]
+    return df.iloc[top], df.iloc[bottom]
+
+def sector_summary(df):
+    """Per-sector ticker count, mean and median return and breadth (share of gainers), in one groupby pass."""
+    returns = pd.to_numeric(df['Return'], errors='coerce')
+    frame = pd.DataFrame({'Sector': df['Sector'], 'Return': returns, 'Advancing': returns > 0})
+    summary = frame.groupby('Sector', observed=True, sort=True).agg(
+        Tickers=('Return', 'count'),
+        Mean=('Return', 'mean'),
+        Median=('Return', 'median'),
+        Breadth=('Advancing', 'mean'),
+    )
+    summary['Breadth'] *= 100
+    return summary.reset_index()
+
 def show_winners_losers(df, top_n=3):
     """Print top winners and losers."""
     print("\n" + "="*40)
@@ -133,15 +431,10 @@ def show_winners_losers(df, top_n=3):
     if df.empty:
         print("No data to display winners and losers.")
         return
-    # Ensure 'Return' is numeric and drop NaNs
-    df = df.copy()
-    df['Return'] = pd.to_numeric(df['Return'], errors='coerce')
-    df = df.dropna(subset=['Return'])
-    if df.empty:
+    winners, losers = top_bottom(df, top_n)
+    if winners.empty:
         print("No valid return data to display winners and losers.")
         return
-    winners = df.sort_values('Return', ascending=False).head(top_n)
-    losers = df.sort_values('Return').head(top_n)
     print("\nTop Winners:")
     if TABULATE_AVAILABLE:
         print(tabulate(winners, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".2f"))
@@ -153,15 +446,101 @@ def show_winners_losers(df, top_n=3):
     else:
         print(losers.to_string(index=False, float_format="%.2f"))
 
-def filter_by_sector(df, sector):
-    """Filter DataFrame by sector."""
-    return df[df['Sector'].str.lower() == sector.lower()]
+def screen_universe(engine, query):
+    """Tickers of the engine's universe whose latest indicators match `query` (see screener.py)."""
+    closes, symbols = engine.closes(SCREEN_BARS)
+    return screen(closes, symbols, query, engine.tickers)
 
-def plot_returns(df, title='Stock Returns'):
-    """Plot improved bar chart of returns by ticker and sector."""
+def show_screen(df, query):
+    """Print the tickers matched by a screen."""
+    print(f"\nScreen: {query}")
     if df.empty:
+        print("No tickers match.")
+        return
+    print(f"{len(df)} ticker(s) match:")
+    if TABULATE_AVAILABLE:
+        print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".2f"))
+    else:
+        print(df.to_string(index=False, float_format="%.2f"))
+
+def risk_universe(engine, window=RISK_WINDOW, benchmark='universe'):
+    """Rolling correlation, volatility and beta of the engine's universe over the last year (see risk.py)."""
+    closes, symbols = engine.closes(max(window, TRADING_DAYS) + 1)
+    report = risk_analytics(closes, symbols, engine.tickers, window, benchmark=benchmark)
+    # Date of the last day of each recorded window
+    calendar = engine.calendar()[-len(closes):] if len(closes) else []
+    report['dates'] = [calendar[end] for end in report['ends']]
+    return report
+
+def show_risk(report, benchmark='universe'):
+    """Print per-sector volatility, beta and correlation, and the universe's average correlation."""
+    if not report['dates']:
+        print("Not enough history for the risk window.")
+        return
+    print(f"\nRisk as of {report['dates'][-1]:%Y-%m-%d} (volatility annualized in %, beta vs {benchmark}):")
+    summary = sector_risk(report)
+    if TABULATE_AVAILABLE:
+        print(tabulate(summary, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".2f"))
+    else:
+        print(summary.to_string(index=False, float_format="%.2f"))
+    avg_corr = report['avg_corr']
+    if np.isfinite(avg_corr).any():
+        print(f"Average pairwise correlation: {avg_corr[-1]:.2f} "
+              f"(range {np.nanmin(avg_corr):.2f} to {np.nanmax(avg_corr):.2f} over {len(avg_corr)} windows)")
+
+def plot_correlation(report, title='Correlation'):
+    """Heatmaps of average correlation between sectors and, for smaller universes, between tickers."""
+    if not report['dates']:
         print("No data to plot.")
         return
+    import plotly.express as px
+    names = report['sector_names']
+    fig = px.imshow(report['sector_corr'], x=names, y=names, zmin=-1, zmax=1,
+                    color_continuous_scale='RdBu_r', text_auto='.2f',
+                    title=f"{title} - average between and within sectors")
+    fig.update_layout(plot_bgcolor='white', coloraxis_colorbar_title_text='Correlation')
+    fig.show()
+    symbols = report['symbols']
+    if len(symbols) > HEATMAP_MAX_TICKERS:
+        return
+    # Group tickers by sector so sector blocks line up on the diagonal
+    order = sorted(range(len(symbols)), key=lambda i: (report['sectors'][i], symbols[i]))
+    ordered = [symbols[i] for i in order]
+    fig = px.imshow(report['corr'][np.ix_(order, order)], x=ordered, y=ordered, zmin=-1, zmax=1,
+                    color_continuous_scale='RdBu_r', title=f"{title} - tickers by sector")
+    fig.update_layout(plot_bgcolor='white', coloraxis_colorbar_title_text='Correlation')
+    fig.show()
+
+def show_sector_summary(df):
+    """Print per-sector mean and median return and breadth."""
+    if df.empty:
+        return
+    summary = sector_summary(df)
+    print("\nSector Summary (returns in %, breadth = % of tickers up):")
+    if TABULATE_AVAILABLE:
+        print(tabulate(summary, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".2f"))
+    else:
+        print(summary.to_string(index=False, float_format="%.2f"))
+
+def filter_by_sector(df, sector):
+    """Filter DataFrame by sector."""
+    sectors = df['Sector']
+    if isinstance(sectors.dtype, pd.CategoricalDtype):
+        # Case-fold the few category labels once instead of every row
+        codes = [i for i, name in enumerate(sectors.cat.categories) if name.lower() == sector.lower()]
+        return df[np.isin(sectors.cat.codes.to_numpy(), codes)]
+    return df[sectors.str.lower() == sector.lower()]
+
+def returns_figure(df, title='Stock Returns'):
+    """Bar chart of returns by ticker and sector, or None if there is nothing to plot."""
+    if df.empty:
+        return None
+    import plotly.express as px
+    if len(df) > PLOT_MAX_TICKERS:
+        # A bar per ticker is unreadable (and slow) for large universes
+        winners, losers = top_bottom(df, PLOT_MAX_TICKERS // 2)
+        title = f"{title} (top and bottom {PLOT_MAX_TICKERS // 2} of {len(df)})"
+        df = pd.concat([winners, losers])
     df = df.copy()
     df['Return'] = pd.to_numeric(df['Return'], errors='coerce')
     df = df.dropna(subset=['Return'])
@@ -186,16 +565,19 @@ def plot_returns(df, title='Stock Returns'):
         legend_title_text='Sector',
         plot_bgcolor='white'
     )
+    return fig
+
+def plot_returns(df, title='Stock Returns'):
+    """Plot improved bar chart of returns by ticker and sector."""
+    fig = returns_figure(df, title)
+    if fig is None:
+        print("No data to plot.")
+        return
     fig.show()
 
 def select_period():
     """Ask user for period selection."""
-    options = {
-        '1': ('1d', "Day"),
-        '2': ('7d', "Week"),
-        '3': ('1mo', "Month"),
-        '4': ('1y', "Year")
-    }
+    options = {str(i): item for i, item in enumerate(PERIOD_LABELS.items(), 1)}
     print("\nSelect Period:")
     for k, v in options.items():
         print(f"  {k}: {v[1]}")
@@ -208,31 +590,80 @@ def select_period():
         else:
             print("Invalid input. Please enter a number between 1 and 4.")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="StockView - Stock Return Visualizer")
+    parser.add_argument('--universe', default=os.environ.get('STOCKVIEW_UNIVERSE'),
+                        help="CSV or JSON file of tickers and sectors (default: the built-in list)")
+    parser.add_argument('--no-panel', action='store_true',
+                        help="keep the history in memory only instead of the on-disk price panel")
+    parser.add_argument('--screen', metavar='QUERY',
+                        help="print the tickers matching a technical screen, e.g. "
+                             "\"RSI < 30 and close above SMA_200\", and exit")
+    parser.add_argument('--risk', action='store_true',
+                        help="show rolling correlation, volatility and beta of the universe, and exit")
+    parser.add_argument('--risk-window', type=int, default=RISK_WINDOW,
+                        help=f"trading days in the rolling risk window (default: {RISK_WINDOW})")
+    parser.add_argument('--benchmark', choices=BENCHMARKS, default='universe',
+                        help="equal-weighted benchmark for beta (default: universe)")
+    parser.add_argument('--report', metavar='DIR',
+                        help="write tables and charts for every period and sector to DIR, without prompts, and exit")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="table format for --report (default: csv)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes rendering --report charts (default: STOCKVIEW_REPORT_WORKERS or one per CPU)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    tickers = load_universe(args.universe) if args.universe else TICKERS
     print("="*50)
     print("        StockView - Stock Return Visualizer")
     print("="*50)
+    print(f"Universe: {len(tickers)} tickers in {len(set(tickers.values()))} sectors")
+    panel = None if args.no_panel else PricePanel(os.path.join(PANEL_DIR, 'yfinance'))
+    engine = ReturnEngine(tickers, panel=panel)
+    if args.screen:
+        try:
+            show_screen(screen_universe(engine, args.screen), args.screen)
+        except ValueError as e:
+            print(f"Invalid screen: {e}")
+        return
+    if args.report:
+        from report import REPORT_WORKERS, build_report
+        try:
+            build_report(engine, args.report, fmt=args.format, workers=args.workers or REPORT_WORKERS)
+        except ValueError as e:
+            print(f"Report failed: {e}")
+        return
+    if args.risk:
+        print(f"\nComputing {args.risk_window}-day rolling risk...\n")
+        report = risk_universe(engine, args.risk_window, args.benchmark)
+        show_risk(report, args.benchmark)
+        plot_correlation(report, f"{args.risk_window}-Day Correlation")
+        return
     while True:
         period, period_label = select_period()
-        print(f"\nFetching data for the last {period_label}...\n")
-        df = get_all_returns(TICKERS, period)
+        print(f"\nCalculating returns for the last {period_label}...\n")
+        df = engine.returns(period)
         if df.empty:
             print("No data found. Try with different tickers or period.")
             continue
         print("\nAvailable sectors:")
-        sectors = sorted(df['Sector'].unique())
+        rows_by_sector = engine.sector_index(period)
+        sectors = list(rows_by_sector)
         for i, s in enumerate(sectors, 1):
             print(f"  {i}. {s}")
         print("  0. All sectors")
         sector = input("Filter by sector (enter number or leave blank for all): ").strip()
         if sector and sector.isdigit() and 0 < int(sector) <= len(sectors):
-            df = filter_by_sector(df, sectors[int(sector)-1])
+            df = df.iloc[rows_by_sector[sectors[int(sector)-1]]]
             if df.empty:
                 print(f"No data for sector: {sectors[int(sector)-1]}")
                 continue
             sector_label = f" - {sectors[int(sector)-1]}"
         else:
             sector_label = ""
+            show_sector_summary(df)
         show_winners_losers(df)
         plot_returns(df, f"{period_label} Returns{sector_label}")
         again = input("\nWould you like to view another period or sector? (y/n): ").strip().lower()
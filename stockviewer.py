@@ -1,17 +1,119 @@
 import os
-import io
-import base64
-import requests
+import re
+import json
+import queue
+import hashlib
+import secrets
+import threading
+import time
+from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, abort, Response
 import pandas as pd
-import mplfinance as mpf
-from flask import Flask, request, render_template_string, redirect, url_for, session
+import av_client
+import metrics
+import stockview
+from av_parser import parse_daily_series
+from cache import CACHE_DIR, ChartCache, TTLCache, backend_lock, shared_backend
+from chart_data import CHART_RANGES, DEFAULT_RANGE, chart_payload, clamp_width, select_range
+from charts import CHART_DAYS, chart_key, sample_frame
+from history_store import HistoryStore
+from intraday import COMPACT_MINUTES, RESOLUTIONS, SESSIONS, IntradayStore, Resampler, fetch_intraday
+from price_panel import DEFAULT_DIR as PANEL_DIR, PricePanel
+from indicators import IncrementalIndicators, compute_pandas, history_bars
+from jobs import JobManager, render_chart, warm_up_renderers
+from singleflight import SingleFlight
+from watchlist import POLL_INTERVAL, parse_symbols, poller_for
 
 # ==============================================================================
 # FLASK APP INITIALIZATION
 # ==============================================================================
 app = Flask(__name__)
+
+def load_secret_key():
+    """
+    Returns the session signing key: STOCKVIEW_SECRET_KEY when set, otherwise a
+    key file generated once under the cache directory. Every worker process
+    must sign sessions with the same key.
+    """
+    key = os.environ.get('STOCKVIEW_SECRET_KEY')
+    if key:
+        return key
+    path = os.path.join(CACHE_DIR, 'secret_key')
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        # Exclusive creation fails if another worker created the key first; theirs wins.
+        # Unlike a hard link, this works on every filesystem.
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+    # The worker that created the file may not have written the key yet
+    for _ in range(50):
+        with open(path) as f:
+            key = f.read().strip()
+        if key:
+            return key
+        time.sleep(0.1)
+    raise RuntimeError(f"The session key file {path} is empty; delete it or set STOCKVIEW_SECRET_KEY.")
+
 # A secret key is required to use Flask sessions for storing the API key.
-app.secret_key = os.urandom(24)
+app.secret_key = load_secret_key()
+
+# Local daily-bar store; repeat analyses only download bars not seen yet.
+history_store = HistoryStore()
+
+# The same bars in memory-mapped columns; analyses and chart slices read views of it.
+price_panel = PricePanel(os.path.join(PANEL_DIR, 'alphavantage'))
+
+# OVERVIEW fundamentals, served stale-while-revalidate after the TTL (seconds).
+FUNDAMENTALS_TTL = int(os.environ.get('STOCKVIEW_FUNDAMENTALS_TTL', 7 * 24 * 3600))
+fundamentals_cache = TTLCache('fundamentals', ttl=FUNDAMENTALS_TTL, lock_ttl=av_client.QUERY_DEADLINE)
+
+# Per-symbol indicator state; only newly appended bars are computed.
+indicator_state = IncrementalIndicators()
+
+# Rendered charts: in-memory LRU in front of the cache shared by all workers.
+chart_cache = ChartCache(max_items=int(os.environ.get('STOCKVIEW_CHART_CACHE_SIZE', 64)))
+
+# 'interactive' draws charts in the browser from /chart-data; 'png' renders them on the server.
+CHART_MODE = os.environ.get('STOCKVIEW_CHART_MODE', 'interactive')
+
+# Decimated chart data (JSON bytes), keyed by symbol, last bar, range and width.
+chart_data_cache = ChartCache(max_items=256, namespace='chart_data', max_stored=5000)
+CHART_DATA_MAX_AGE = 300
+
+# Browser cache lifetime for chart images (seconds).
+CHART_MAX_AGE = 7 * 24 * 3600
+CHART_KEY_PATTERN = re.compile(r'[0-9a-f]{40}')
+
+# Background /analyze jobs; the results page polls until its job finishes.
+analysis_jobs = JobManager()
+
+# Coalesces concurrent identical fetches and renders into one execution each.
+inflight = SingleFlight()
+
+# Whether serve.py and wsgi.py warm each server process up before it takes traffic.
+WARM_UP = os.environ.get('STOCKVIEW_WARM_UP', '1') != '0'
+
+# Universe screened by /screen (STOCKVIEW_UNIVERSE or stockview's built-in list),
+# priced from yfinance into the same panel as the stockview command.
+SCREEN_TICKERS = (stockview.load_universe(os.environ['STOCKVIEW_UNIVERSE'])
+                  if os.environ.get('STOCKVIEW_UNIVERSE') else stockview.TICKERS)
+screen_panel = PricePanel(os.path.join(PANEL_DIR, 'yfinance'))
+# Lease on the universe download, below gunicorn's 120 s worker timeout. The
+# download runs in a background thread; meanwhile /screen answers from the
+# stored panel, or with a 503 and Retry-After (seconds) if nothing is stored yet.
+SCREEN_REFRESH_LEASE = 110
+SCREEN_RETRY_AFTER = 15
+_screen_refresh = threading.Lock()
+
+# One-minute intraday bars; coarser intraday and daily bars are rolled up from them.
+intraday_store = IntradayStore()
+intraday_bars = Resampler(intraday_store)
+
+# Seconds between keep-alive comments on idle watchlist streams.
+SSE_KEEPALIVE = 15
 
 # ==============================================================================
 # HTML TEMPLATES
@@ -60,7 +162,7 @@ HOME_TEMPLATE = """
                     Analyze
                 </button>
             </form>
-            <p class="text-xs text-gray-500 mt-4">Data provided by Alpha Vantage. Not financial advice.</p>
+            <p class="text-xs text-gray-500 mt-4">Data provided by Alpha Vantage. Not financial advice. <a href="{{ url_for('watchlist') }}" class="text-indigo-400 hover:underline">Live watchlist</a></p>
         </div>
     </div>
 </body>
@@ -121,9 +223,85 @@ RESULTS_TEMPLATE = """
         <div>
             <h2 class="text-2xl font-semibold text-white border-b-2 border-gray-700 pb-2 mb-4">Technical Analysis Chart</h2>
             <div class="bg-gray-800 p-2 rounded-lg shadow-lg">
-                <img src="data:image/png;base64,{{ chart_image }}" alt="Stock Chart for {{ overview.get('Symbol', 'N/A') }}" class="w-full h-auto rounded">
+                {% if chart_url %}
+                <img src="{{ chart_url }}" alt="Stock Chart for {{ overview.get('Symbol', 'N/A') }}" class="w-full h-auto rounded">
+                {% else %}
+                <div class="flex gap-2 mb-2">
+                    {% for name in ranges %}
+                    <button data-range="{{ name }}" class="range-btn px-3 py-1 rounded text-sm {{ 'bg-indigo-600' if name == default_range else 'bg-gray-700' }} hover:bg-indigo-500">{{ name }}</button>
+                    {% endfor %}
+                </div>
+                <div id="chart" class="w-full" style="height: 720px"></div>
+                {% endif %}
             </div>
         </div>
+        {% if not chart_url %}
+        <script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+        <script>
+            // Data is decimated on the server to the chart's pixel width, so any range costs the same to fetch
+            const symbol = {{ symbol|tojson }};
+            const el = document.getElementById('chart');
+            let range = {{ default_range|tojson }};
+            let zoom = null;
+
+            async function load() {
+                const params = new URLSearchParams({range, width: Math.round(el.clientWidth * (window.devicePixelRatio || 1))});
+                if (zoom) { params.set('start', zoom[0]); params.set('end', zoom[1]); }
+                const response = await fetch(`/chart-data/${encodeURIComponent(symbol)}?${params}`);
+                const data = await response.json();
+                if (!response.ok) { el.textContent = data.error; return; }
+                draw(data);
+            }
+
+            const day = t => new Date(t * 86400000);  // payload times are days since 1970-01-01
+
+            function line(lines, name, yaxis, color) {
+                const series = lines[name];
+                if (!series || !series.t.length) return null;
+                return {x: series.t.map(day), y: series.v, name, yaxis, type: 'scatter', mode: 'lines',
+                        line: {width: 1, color}, hoverinfo: 'skip'};
+            }
+
+            function draw(data) {
+                const c = data.candles, dates = c.t.map(day);
+                const traces = [
+                    {x: dates, open: c.open, high: c.high, low: c.low, close: c.close, type: 'candlestick', name: symbol, yaxis: 'y'},
+                    line(data.lines, 'SMA_50', 'y', '#60A5FA'), line(data.lines, 'SMA_200', 'y', '#F472B6'),
+                    line(data.lines, 'Upper_Band', 'y', '#9CA3AF'), line(data.lines, 'Lower_Band', 'y', '#9CA3AF'),
+                    {x: dates, y: c.volume, type: 'bar', name: 'Volume', yaxis: 'y2', marker: {color: '#4B5563'}},
+                    line(data.lines, 'RSI', 'y3', 'orange'),
+                    line(data.lines, 'MACD', 'y4', '#34D399'), line(data.lines, 'Signal_Line', 'y4', '#F87171'),
+                ].filter(Boolean);
+                const layout = {
+                    paper_bgcolor: '#1F2937', plot_bgcolor: '#1F2937', font: {color: '#D1D5DB'},
+                    showlegend: false, margin: {l: 60, r: 20, t: 10, b: 30}, uirevision: range,
+                    xaxis: {type: 'date', rangeslider: {visible: false}, gridcolor: '#374151'},
+                    yaxis: {domain: [0.45, 1], title: 'Price ($)', gridcolor: '#374151'},
+                    yaxis2: {domain: [0.32, 0.43], title: 'Volume', gridcolor: '#374151'},
+                    yaxis3: {domain: [0.17, 0.30], title: 'RSI', range: [0, 100], gridcolor: '#374151'},
+                    yaxis4: {domain: [0, 0.15], title: 'MACD', gridcolor: '#374151'},
+                };
+                Plotly.react(el, traces, layout, {responsive: true, displaylogo: false});
+            }
+
+            let timer = null;
+            function reload() { clearTimeout(timer); timer = setTimeout(load, 250); }
+
+            load().then(() => el.on('plotly_relayout', event => {
+                // Zooming refetches the visible span at full resolution; double-click resets it
+                if (event['xaxis.range[0]']) { zoom = [event['xaxis.range[0]'], event['xaxis.range[1]']]; reload(); }
+                else if (event['xaxis.autorange']) { zoom = null; reload(); }
+            }));
+            window.addEventListener('resize', reload);
+            document.querySelectorAll('.range-btn').forEach(button => button.addEventListener('click', () => {
+                document.querySelectorAll('.range-btn').forEach(b => b.classList.replace('bg-indigo-600', 'bg-gray-700'));
+                button.classList.replace('bg-gray-700', 'bg-indigo-600');
+                range = button.dataset.range;
+                zoom = null;
+                load();
+            }));
+        </script>
+        {% endif %}
         
         <div class="text-center mt-8 text-gray-500 text-xs">
             <p>StockView | Data provided by Alpha Vantage. Not financial advice.</p>
@@ -134,55 +312,275 @@ RESULTS_TEMPLATE = """
 </html>
 """
 
+PENDING_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>StockView - Analyzing...</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
+    <style>
+        body { font-family: 'Inter', sans-serif; }
+    </style>
+</head>
+<body class="bg-gray-900 text-gray-200">
+    <div class="container mx-auto px-4 py-8 md:py-12">
+        <div class="max-w-xl mx-auto text-center">
+            <h1 class="text-4xl md:text-5xl font-bold text-white mb-2">StockView</h1>
+            <p class="text-lg text-gray-400 mb-8">Fetching data and building your analysis...</p>
+            <div class="mx-auto h-12 w-12 rounded-full border-4 border-gray-700 border-t-indigo-500 animate-spin"></div>
+        </div>
+    </div>
+    <script>
+        // Poll the job and reload into the results page once it has finished
+        function poll() {
+            fetch("{{ url_for('job_status', job_id=job_id) }}")
+                .then(function (r) { return r.json(); })
+                .then(function (job) {
+                    if (job.state === 'running') { setTimeout(poll, 750); }
+                    else { window.location.reload(); }
+                })
+                .catch(function () { setTimeout(poll, 2000); });
+        }
+        poll();
+    </script>
+</body>
+</html>
+"""
+
+WATCHLIST_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>StockView - Watchlist</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
+    <style>
+        body { font-family: 'Inter', sans-serif; }
+    </style>
+</head>
+<body class="bg-gray-900 text-gray-200">
+    <div class="container mx-auto px-4 py-8 md:py-12">
+        <div class="max-w-3xl mx-auto">
+            <div class="flex justify-between items-center mb-8">
+                <h1 class="text-3xl md:text-4xl font-bold text-white">Watchlist</h1>
+                <a href="/" class="inline-block bg-gray-700 hover:bg-gray-600 text-white font-bold px-6 py-3 rounded-lg transition duration-300">Analysis</a>
+            </div>
+
+            <form action="{{ url_for('watchlist') }}" method="post" class="space-y-4 mb-8">
+                <input type="text" name="symbols" placeholder="e.g., AAPL, MSFT, NVDA" value="{{ symbols|join(', ') }}"
+                       class="w-full px-5 py-3 text-lg text-gray-200 bg-gray-800 border-2 border-gray-700 rounded-lg focus:outline-none focus:border-indigo-500 transition duration-300">
+                <input type="text" name="api_key" placeholder="Enter your Alpha Vantage API Key" value="{{ session.get('api_key', '') }}"
+                       class="w-full px-5 py-3 text-lg text-gray-200 bg-gray-800 border-2 border-gray-700 rounded-lg focus:outline-none focus:border-indigo-500 transition duration-300">
+                <button type="submit" class="w-full bg-indigo-600 hover:bg-indigo-700 text-white font-bold px-8 py-3 text-lg rounded-lg transition duration-300 shadow-lg">Watch</button>
+            </form>
+
+            {% if symbols %}
+            <table class="w-full text-left bg-gray-800 rounded-lg shadow-lg">
+                <thead class="text-sm text-gray-400">
+                    <tr><th class="p-3">Symbol</th><th class="p-3">Price</th><th class="p-3">Change</th><th class="p-3">Change %</th><th class="p-3">Volume</th><th class="p-3">Trading Day</th></tr>
+                </thead>
+                <tbody>
+                {% for symbol in symbols %}
+                    <tr id="row-{{ symbol }}" class="border-t border-gray-700">
+                        <td class="p-3 font-bold text-white">{{ symbol }}</td>
+                        <td class="p-3" data-field="price">&hellip;</td>
+                        <td class="p-3" data-field="change"></td>
+                        <td class="p-3" data-field="change_percent"></td>
+                        <td class="p-3" data-field="volume"></td>
+                        <td class="p-3" data-field="latest_trading_day"></td>
+                    </tr>
+                {% endfor %}
+                </tbody>
+            </table>
+            <script>
+                // Quotes are pushed by the server only when they change
+                var source = new EventSource("{{ url_for('watchlist_stream', symbols=symbols|join(',')) }}");
+                source.addEventListener('quote', function (event) {
+                    var q = JSON.parse(event.data);
+                    var row = document.getElementById('row-' + q.symbol);
+                    if (!row) { return; }
+                    var color = q.change >= 0 ? 'text-green-400' : 'text-red-400';
+                    row.querySelector('[data-field=price]').textContent = q.price.toFixed(2);
+                    row.querySelector('[data-field=change]').textContent = q.change.toFixed(2);
+                    row.querySelector('[data-field=change]').className = 'p-3 ' + color;
+                    row.querySelector('[data-field=change_percent]').textContent = q.change_percent.toFixed(2) + '%';
+                    row.querySelector('[data-field=change_percent]').className = 'p-3 ' + color;
+                    row.querySelector('[data-field=volume]').textContent = q.volume.toLocaleString();
+                    row.querySelector('[data-field=latest_trading_day]').textContent = q.latest_trading_day;
+                });
+            </script>
+            {% endif %}
+            <p class="text-xs text-gray-500 mt-4">Quotes refresh every {{ interval|int }} seconds. Data provided by Alpha Vantage. Not financial advice.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
 
 # ==============================================================================
 # DATA FETCHING (Corresponds to Section 1 of the Plan)
 # ==============================================================================
-def get_stock_data(symbol, api_key):
-    """Fetches historical and fundamental data. Returns (DataFrame, dict, error_message)."""
-    print(f"Fetching data for {symbol}...")
-    
-    # 1. Fetch Historical Price Data
-    price_url = f'https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol={symbol}&outputsize=full&apikey={api_key}'
+def fetch_price_history(symbol, api_key, outputsize='full'):
+    """Downloads daily bars from Alpha Vantage. Returns (DataFrame, error_message)."""
+    # FIX: verify=False bypasses SSL verification errors in some local environments.
+    # WARNING: This disables security checks and should not be used in a production application.
+    price_data, error = av_client.query(
+        'TIME_SERIES_DAILY_ADJUSTED', api_key, verify=False,
+        symbol=symbol, outputsize=outputsize
+    )
+    if error:
+        return None, error
     try:
-        # FIX: Added verify=False to bypass SSL verification errors in some local environments.
-        # WARNING: This disables security checks and should not be used in a production application.
-        r_price = requests.get(price_url, verify=False)
-        r_price.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-        price_data = r_price.json()
-        
         # FIX: Check for the main data key's existence before trying to access it.
         # This provides a more specific error if the API response is unusual (e.g., due to a bad key or API limits).
         if 'Time Series (Daily)' not in price_data:
             error_detail = price_data.get("Note") or price_data.get("Error Message") or str(price_data)
-            return None, None, f"Alpha Vantage did not return valid price data for '{symbol}'. API response: {error_detail}"
+            return None, f"Alpha Vantage did not return valid price data for '{symbol}'. API response: {error_detail}"
             
-        df = pd.DataFrame.from_dict(price_data['Time Series (Daily)'], orient='index')
-        df = df.astype(float)
-        df.rename(columns={'1. open': 'Open', '2. high': 'High', '3. low': 'Low', '4. close': 'Close', '6. volume': 'Volume'}, inplace=True)
-        df.index = pd.to_datetime(df.index)
-        df = df.iloc[::-1]
+        with metrics.span('series_parse'):
+            return parse_daily_series(price_data), None
         
-    except requests.exceptions.RequestException as e:
-        return None, None, f"Network error fetching price data: {e}"
     except Exception as e:
         # Catch any other unexpected errors during data processing.
-        return None, None, f"An unexpected error occurred while parsing price data for '{symbol}': {e}"
+        return None, f"An unexpected error occurred while parsing price data for '{symbol}': {e}"
 
-    # 2. Fetch Fundamental Data
-    overview_url = f'https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={api_key}'
-    try:
-        # FIX: Added verify=False to bypass SSL verification errors.
-        r_overview = requests.get(overview_url, verify=False)
-        r_overview.raise_for_status()
-        overview_data = r_overview.json()
-        if not overview_data or overview_data.get('Symbol') is None:
-             # Handle cases where fundamentals don't exist (e.g., ETFs) or API limit hit.
-             note = overview_data.get("Note", "Fundamental data not available for this symbol (it may be an ETF/Index).")
-             return df, {}, note
+def get_price_history(symbol, api_key, bars=None):
+    """
+    Returns (DataFrame, error_message) for the daily bars of `symbol`,
+    limited to the newest `bars` bars when given.
+    Served from the local history store when it was already refreshed this
+    trading day; otherwise only the missing bars are downloaded and appended.
+    """
+    if history_store.is_fresh(symbol):
+        print(f"Using stored history for {symbol}.")
+        return stored_history(symbol, bars), None
+
+    # Only one worker process downloads a symbol; the rest wait and reuse its bars
+    with backend_lock(shared_backend(), f'history:{symbol}', ttl=av_client.QUERY_DEADLINE,
+                      timeout=av_client.QUERY_DEADLINE) as acquired:
+        if history_store.is_fresh(symbol):
+            return stored_history(symbol, bars), None
+        if not acquired:
+            # The download holding the lock is stuck; the stored bars beat a second download
+            stored = stored_history(symbol, bars)
+            if stored is not None:
+                print(f"History of {symbol} is still being refreshed; using stored history.")
+                return stored, None
+        return _refresh_price_history(symbol, api_key, bars)
+
+def stored_history(symbol, bars=None):
+    """
+    The stored bars of `symbol` as views of the price panel, or None. The
+    panel is filled from the history store when it lacks the symbol or its
+    newest bars (a panel write that could not get the lock); if that write
+    fails too, the history store's own bars are returned.
+    """
+    last = history_store.last_bar_date(symbol)
+    if last is None:
+        return None
+    if price_panel.last_day(symbol) != last:
+        stored = history_store.load(symbol)
+        if not price_panel.write(symbol, stored):
+            print(f"Price panel busy; using the history store's bars for {symbol}.")
+            return stored.iloc[-bars:] if bars else stored
+    return price_panel.frame(symbol, bars)
+
+def _refresh_price_history(symbol, api_key, bars):
+    outputsize = history_store.outputsize_for(symbol)
+    df, error = fetch_price_history(symbol, api_key, outputsize)
+    if error:
+        # Fall back to the last-known bars rather than failing outright
+        stored = stored_history(symbol, bars)
+        if stored is None:
+            return None, error
+        print(f"{error} Using stored history for {symbol}.")
+        return stored, None
+
+    history_store.append(symbol, df)
+    if symbol in price_panel or outputsize == 'full':
+        # Only the downloaded days are written; the panel's older days stay as they are
+        if not price_panel.write(symbol, df):
+            # The next read copies the bars into the panel from the history store
+            return history_store.load(symbol, bars), None
+    return stored_history(symbol, bars), None
+
+def get_intraday_bars(symbol, api_key, interval='5min', trading_session='regular'):
+    """
+    Returns (DataFrame, error_message) for the intraday bars of `symbol` at
+    `interval`, rolled up from the stored one-minute bars. Minute bars are
+    refreshed after INTRADAY_TTL; 'compact' (the latest 100 minutes) is
+    downloaded when the previous refresh is recent enough to close the gap.
+    """
+    if not intraday_store.is_fresh(symbol):
+        with backend_lock(shared_backend(), f'intraday:{symbol}', ttl=av_client.QUERY_DEADLINE,
+                          timeout=av_client.QUERY_DEADLINE) as acquired:
+            # Without the lock, a stuck refresh holds it: serve the stored bars if there are any
+            stale_ok = not acquired and intraday_store.last_minute(symbol) is not None
+            if not intraday_store.is_fresh(symbol) and not stale_ok:
+                fetched = intraday_store.fetched_at(symbol)
+                recent = fetched is not None and time.time() - fetched < COMPACT_MINUTES * 60
+                df, error = fetch_intraday(symbol, api_key, 'compact' if recent else 'full')
+                if error:
+                    if intraday_store.last_minute(symbol) is None:
+                        return None, error
+                    print(f"{error} Using stored intraday bars for {symbol}.")
+                else:
+                    intraday_store.append(symbol, df)
+                    intraday_store.mark_fetched(symbol)
+    bars = intraday_bars.bars(symbol, interval, trading_session)
+    if bars is None:
+        return None, f"No intraday bars are stored for '{symbol}'."
+    return bars, None
+
+def fetch_overview(symbol, api_key):
+    """Downloads the OVERVIEW fundamentals for `symbol`. Returns (dict, error_message)."""
+    # FIX: verify=False bypasses SSL verification errors.
+    overview_data, error = av_client.query('OVERVIEW', api_key, verify=False, symbol=symbol)
+    if error:
+        return {}, error
+    # API limit messages must not be cached as if they were fundamentals
+    note = overview_data.get("Note") or overview_data.get("Information") or overview_data.get("Error Message")
+    if note:
+        return {}, note
+    return overview_data, None
+
+def get_stock_data(symbol, api_key, bars=None):
+    """
+    Fetches historical and fundamental data. Returns (DataFrame, dict, error_message).
+    `bars` limits the returned history to the newest bars needed downstream.
+    """
+    print(f"Fetching data for {symbol}...")
     
-    except requests.exceptions.RequestException as e:
-        return df, {}, f"Network error fetching overview data: {e}"
+    # Price history and fundamentals are independent, so fetch them concurrently.
+    # Fundamentals are cached since they change at most quarterly.
+    overview_future = av_client.submit(
+        fundamentals_cache.get, symbol,
+        lambda: inflight.do(('overview', symbol, av_client.key_id(api_key)), fetch_overview, symbol, api_key)
+    )
+
+    # 1. Fetch Historical Price Data
+    df, error = inflight.do(('price', symbol, bars, av_client.key_id(api_key)),
+                            get_price_history, symbol, api_key, bars)
+    if df is not None:
+        # Coalesced callers share the frame; the analysis adds columns to it,
+        # which a shallow copy keeps off the shared frame without copying the bars
+        df = df.copy(deep=False)
+    overview_data, overview_error = overview_future.result()
+    if error:
+        return None, None, error
+
+    # 2. Fundamental Data
+    if overview_error:
+        return df, {}, overview_error
+    if not overview_data or overview_data.get('Symbol') is None:
+        # Handle cases where fundamentals don't exist (e.g., ETFs).
+        return df, {}, "Fundamental data not available for this symbol (it may be an ETF/Index)."
 
     print("Data fetching complete.")
     return df, overview_data, None
@@ -206,25 +604,22 @@ def run_fundamental_analysis(overview_data):
             
     return fundamentals
 
-def run_technical_analysis(df):
-    """Calculates technical indicators and returns the DataFrame."""
+def run_technical_analysis(df, symbol=None):
+    """
+    Calculates technical indicators and returns the DataFrame.
+    With a symbol, indicator state is kept between calls so only bars
+    appended since the last analysis are computed; without one, the whole
+    frame is computed once with vectorized pandas.
+    """
     if df is None: return None
     print("Calculating technical indicators...")
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['StdDev_20'] = df['Close'].rolling(window=20).std()
-    df['Upper_Band'] = df['SMA_20'] + (df['StdDev_20'] * 2)
-    df['Lower_Band'] = df['SMA_20'] - (df['StdDev_20'] * 2)
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    with metrics.span('indicators'):
+        if symbol:
+            indicators = indicator_state.compute(symbol, df)
+        else:
+            indicators = compute_pandas(df)
+        for column in indicators.columns:
+            df[column] = indicators[column]
     print("Indicators calculated.")
     return df
 
@@ -232,39 +627,45 @@ def run_technical_analysis(df):
 # THE VIEWER (Corresponds to Section 3 of the Plan)
 # ==============================================================================
 def create_chart(df, symbol, overview_data):
-    """Creates a financial chart and returns it as a base64 encoded string."""
+    """Creates a financial chart (or reuses a cached render) and returns its cache key."""
     if df is None: return None
-    print("Generating chart...")
-    df_chart = df.tail(365) # Chart last year of data
+    company_name = overview_data.get('Name', symbol)
+    key = chart_key(df, symbol, company_name)
+    if chart_cache.get(key) is None:
+        inflight.do(('chart', key), _render_and_store, key, df, symbol, company_name)
+    else:
+        print("Using cached chart.")
+    return key
 
-    ap = [
-        mpf.make_addplot(df_chart[['SMA_50', 'SMA_200']]),
-        mpf.make_addplot(df_chart[['Upper_Band', 'Lower_Band']], color='grey', alpha=0.3),
-        mpf.make_addplot(df_chart['RSI'], panel=2, color='orange', ylabel='RSI'),
-        mpf.make_addplot(df_chart[['MACD', 'Signal_Line']], panel=3, ylabel='MACD'),
-    ]
+def _render_and_store(key, df, symbol, company_name):
+    # A concurrent identical request, here or in another worker, may have
+    # finished the render meanwhile
+    with backend_lock(shared_backend(), f'chart:{key}', ttl=120, timeout=120) as acquired:
+        if chart_cache.get(key) is None:
+            if not acquired:
+                print(f"Chart {key} is still being rendered elsewhere; rendering it here too.")
+            # Rendered in the process pool so matplotlib never blocks the web process
+            with metrics.span('chart_render'):
+                png = render_chart(df, symbol, company_name)
+            chart_cache.put(key, png)
 
-    company_name = overview_data.get('Name', symbol)
-    
-    # Create custom style for dark theme
-    mc = mpf.make_marketcolors(up='#22c55e', down='#ef4444', inherit=True)
-    s = mpf.make_mpf_style(base_mpf_style='nightclouds', marketcolors=mc)
-
-    # Save chart to a memory buffer
-    buf = io.BytesIO()
-    mpf.plot(
-        df_chart, type='candle', style=s,
-        title=f'\nTechnical Analysis for {company_name} ({symbol})',
-        ylabel='Price ($)', volume=True, ylabel_lower='Volume',
-        addplot=ap, panel_ratios=(6, 2, 2, 2), figratio=(12, 8),
-        savefig=dict(fname=buf, dpi=100, format='png')
-    )
-    buf.seek(0)
-    chart_image = base64.b64encode(buf.getvalue()).decode('utf-8')
-    buf.close()
-    
-    print("Chart generated.")
-    return chart_image
+def warm_up():
+    """
+    Does the one-off work of a process's first request before it serves any:
+    the indicator and chart-data code paths on sample bars and, in png chart
+    mode, starting the render processes, which load matplotlib's fonts and
+    the mplfinance style and draw one throwaway chart. Returns the seconds taken.
+    """
+    start = time.perf_counter()
+    with metrics.span('warm_up'):
+        sample = sample_frame()[['Open', 'High', 'Low', 'Close', 'Volume']]
+        analyzed = run_technical_analysis(sample)
+        json.dumps(chart_payload(select_range(analyzed, DEFAULT_RANGE), 1000))
+        if CHART_MODE == 'png':
+            warm_up_renderers()
+    elapsed = time.perf_counter() - start
+    print(f"Warm-up finished in {elapsed:.2f}s.")
+    return elapsed
 
 # ==============================================================================
 # FLASK ROUTES
@@ -275,9 +676,27 @@ def home():
     error = request.args.get('error')
     return render_template_string(HOME_TEMPLATE, error=error)
 
+def analyze_symbol(symbol, api_key):
+    """Runs the full analysis pipeline. Returns (dict for RESULTS_TEMPLATE, error_message)."""
+    with metrics.span('pipeline'):
+        # 1. Fetch data
+        # Only the charted window plus each indicator's warmup is loaded and analyzed
+        with metrics.span('data_fetch'):
+            price_df, overview, error = get_stock_data(symbol, api_key, bars=history_bars(CHART_DAYS))
+        if error:
+            return None, error
+
+        # 2. Run analysis
+        fundamentals = run_fundamental_analysis(overview)
+        analyzed_df = run_technical_analysis(price_df, symbol)
+
+        # 3. Create the viewer output; interactive charts are drawn by the browser instead
+        chart = create_chart(analyzed_df, symbol, overview) if CHART_MODE == 'png' else None
+        return {'symbol': symbol, 'overview': overview, 'fundamentals': fundamentals, 'chart_key': chart}, None
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    """Handles the form submission and displays the analysis results."""
+    """Handles the form submission and starts the analysis in the background."""
     symbol = request.form.get('symbol', '').strip().upper()
     api_key = request.form.get('api_key', '').strip()
 
@@ -289,19 +708,248 @@ def analyze():
     if not api_key:
         return redirect(url_for('home', error="API Key cannot be empty."))
 
-    # 1. Fetch data
-    price_df, overview, error = get_stock_data(symbol, api_key)
+    # Concurrent requests for the same symbol and API key share one running job;
+    # another key's quota or rejection is never handed to this user
+    job_id = analysis_jobs.submit(analyze_symbol, symbol, api_key,
+                                  key=(symbol, CHART_DAYS, av_client.key_id(api_key)))
+    return redirect(url_for('results', job_id=job_id))
+
+@app.route('/results/<job_id>')
+def results(job_id):
+    """Displays the analysis results, or a waiting page while the job runs."""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return redirect(url_for('home', error="This analysis has expired. Please run it again."))
+    if job['state'] == 'error':
+        return redirect(url_for('home', error=job['error']))
+    if job['state'] != 'done':
+        return render_template_string(PENDING_TEMPLATE, job_id=job_id)
+
+    result = job['result']
+    chart_url = url_for('chart_image', key=result['chart_key']) if result['chart_key'] else ''
+    with metrics.span('template_render'):
+        return render_template_string(RESULTS_TEMPLATE, overview=result['overview'],
+                                      fundamentals=result['fundamentals'], chart_url=chart_url,
+                                      symbol=result['symbol'], ranges=list(CHART_RANGES),
+                                      default_range=DEFAULT_RANGE)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Reports a background analysis job's state for the waiting page to poll."""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify(state='unknown'), 404
+    return jsonify(state=job['state'], error=job['error'])
+
+@app.route('/chart/<key>.png')
+def chart_image(key):
+    """Serves a rendered chart. Keys are content-addressed, so images are cacheable for good."""
+    png = chart_cache.get(key) if CHART_KEY_PATTERN.fullmatch(key) else None
+    if png is None:
+        abort(404)
+    response = app.response_class(png, mimetype='image/png')
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = CHART_MAX_AGE
+    return response.make_conditional(request)
+
+def get_chart_data(symbol, api_key, range_name, width, start=None, end=None):
+    """
+    Returns (JSON bytes, cache key, error_message) with the decimated chart
+    data for one range of `symbol`, from the cache when already built.
+    """
+    display_bars = CHART_RANGES[range_name]
+    # Load each indicator's warmup too, so the first shown bar carries full-history values
+    bars = history_bars(display_bars) if display_bars else None
+    df, error = inflight.do(('price', symbol, bars, av_client.key_id(api_key)),
+                            get_price_history, symbol, api_key, bars)
+    if error:
+        return None, None, error
+    if df is None or df.empty:
+        return None, None, f"No price history available for '{symbol}'."
+    raw_key = f"{symbol}:{df.index[-1]:%Y-%m-%d}:{len(df)}:{range_name}:{start}:{end}:{width}"
+    key = hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+    data = chart_data_cache.get(key)
+    if data is None:
+        data = inflight.do(('chart_data', key), _build_chart_data, key, df, range_name, width, start, end)
+    return data, key, None
+
+def _build_chart_data(key, df, range_name, width, start, end):
+    data = chart_data_cache.get(key)
+    if data is None:
+        with metrics.span('chart_data'):
+            analyzed = run_technical_analysis(df.copy(deep=False))
+            payload = chart_payload(select_range(analyzed, range_name, start, end), width)
+            data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        chart_data_cache.put(key, data)
+    return data
+
+def _iso_date(value):
+    """Normalizes a client-supplied date to YYYY-MM-DD; raises ValueError if it isn't one."""
+    return pd.Timestamp(value).strftime('%Y-%m-%d') if value else None
+
+@app.route('/chart-data/<symbol>')
+def chart_data(symbol):
+    """
+    OHLCV and indicator series for the interactive chart, decimated to the
+    client's pixel width. Query: range (see CHART_RANGES), width in pixels,
+    and optional start/end dates to zoom in.
+    """
+    api_key = session.get('api_key')
+    if not api_key:
+        return jsonify(error="Run an analysis first so the API key is known."), 401
+    symbol = symbol.strip().upper()
+    range_name = request.args.get('range', DEFAULT_RANGE)
+    if range_name not in CHART_RANGES:
+        return jsonify(error=f"Unknown range '{range_name}'. Choose from: {', '.join(CHART_RANGES)}"), 400
+    width = clamp_width(request.args.get('width', 1000, type=int))
+    try:
+        start, end = _iso_date(request.args.get('start')), _iso_date(request.args.get('end'))
+    except ValueError:
+        return jsonify(error="start and end must be dates."), 400
+
+    data, key, error = get_chart_data(symbol, api_key, range_name, width, start, end)
+    if error:
+        return jsonify(error=error), 404
+    response = app.response_class(data, mimetype='application/json')
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.max_age = CHART_DATA_MAX_AGE
+    return response.make_conditional(request)
+
+@app.route('/intraday/<symbol>')
+def intraday(symbol):
+    """
+    Intraday OHLCV bars as columns. Query: interval (1min, 5min, 15min, 30min,
+    1h or daily), session (regular or extended) and bars (the newest N).
+    """
+    api_key = session.get('api_key')
+    if not api_key:
+        return jsonify(error="Run an analysis first so the API key is known."), 401
+    symbol = symbol.strip().upper()
+    interval = request.args.get('interval', '5min')
+    trading_session = request.args.get('session', 'regular')
+    limit = request.args.get('bars', type=int)
+    if 'bars' in request.args and (limit is None or limit <= 0):
+        return jsonify(error="'bars' must be a positive whole number."), 400
+    if interval not in RESOLUTIONS:
+        return jsonify(error=f"Unknown interval '{interval}'. Choose from: {', '.join(RESOLUTIONS)}"), 400
+    if trading_session not in SESSIONS:
+        return jsonify(error=f"Unknown session '{trading_session}'. Choose from: {', '.join(SESSIONS)}"), 400
+    df, error = get_intraday_bars(symbol, api_key, interval, trading_session)
     if error:
-        return redirect(url_for('home', error=error))
+        return jsonify(error=error), 404
+    if limit:
+        df = df.iloc[-limit:]
+    stamp = '%Y-%m-%d' if interval == 'daily' else '%Y-%m-%d %H:%M'
+    return jsonify(symbol=symbol, interval=interval, session=trading_session,
+                   t=df.index.strftime(stamp).tolist(),
+                   **{column.lower(): df[column].round(4).tolist() for column in df.columns})
+
+@app.route('/watchlist', methods=['GET', 'POST'])
+def watchlist():
+    """Shows live quotes for a list of symbols."""
+    if request.method == 'POST':
+        api_key = request.form.get('api_key', '').strip()
+        if api_key:
+            session['api_key'] = api_key
+        symbols = parse_symbols(request.form.get('symbols', ''))
+        return redirect(url_for('watchlist', symbols=','.join(symbols)))
+    symbols = parse_symbols(request.args.get('symbols', ''))
+    if not session.get('api_key'):
+        symbols = []
+    return render_template_string(WATCHLIST_TEMPLATE, symbols=symbols, interval=POLL_INTERVAL)
+
+@app.route('/watchlist/stream')
+def watchlist_stream():
+    """Server-Sent Events stream of changed quotes for the requested symbols."""
+    symbols = parse_symbols(request.args.get('symbols', ''))
+    api_key = session.get('api_key')
+    if not symbols or not api_key:
+        return jsonify(error="Symbols and an API key are required."), 400
 
-    # 2. Run analysis
-    fundamentals = run_fundamental_analysis(overview)
-    analyzed_df = run_technical_analysis(price_df)
+    poller = poller_for(api_key)
+    subscription = poller.subscribe(symbols)
+
+    def events():
+        try:
+            while True:
+                try:
+                    quote = subscription.queue.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: quote\ndata: {json.dumps(quote._asdict())}\n\n"
+        finally:
+            # Runs when the browser disconnects and the generator is closed
+            poller.unsubscribe(subscription)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def refresh_screen_panel():
+    """Download the screen universe into its panel, unless another worker is already doing so."""
+    with backend_lock(shared_backend(), 'screen:history', ttl=SCREEN_REFRESH_LEASE, timeout=0) as acquired:
+        if acquired and not screen_panel.is_fresh(SCREEN_TICKERS):
+            stockview.ReturnEngine(SCREEN_TICKERS, panel=screen_panel).history()
+
+def _refresh_screen_in_background():
+    if not _screen_refresh.acquire(blocking=False):
+        return  # This process is already refreshing it
+    def run():
+        try:
+            refresh_screen_panel()
+        except Exception as e:
+            print(f"Could not refresh the screen universe: {e}")
+        finally:
+            _screen_refresh.release()
+    threading.Thread(target=run, name='screen-refresh', daemon=True).start()
+
+def screen_engine():
+    """
+    (ReturnEngine over the screen universe as the panel holds it, whether a
+    refresh is running). A panel not refreshed this trading day is refreshed
+    in the background; requests never wait for the download.
+    """
+    refreshing = not screen_panel.is_fresh(SCREEN_TICKERS)
+    if refreshing:
+        _refresh_screen_in_background()
+    return stockview.ReturnEngine(SCREEN_TICKERS, panel=screen_panel, download=False), refreshing
+
+@app.route('/screen')
+def screen():
+    """
+    Tickers of the screen universe whose latest indicators match the query in
+    `q`, e.g. /screen?q=RSI < 30 and close above SMA_200 (see screener.py).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify(error="Pass a screen query in 'q', e.g. 'RSI < 30 and close above SMA_200'."), 400
+    engine, refreshing = screen_engine()
+    if refreshing and not screen_panel.rows(list(SCREEN_TICKERS))[0]:
+        # Nothing stored yet to screen; the first download is under way
+        response = jsonify(error="The screen universe is being downloaded; try again shortly.", refreshing=True)
+        response.headers['Retry-After'] = str(SCREEN_RETRY_AFTER)
+        return response, 503
+    try:
+        with metrics.span('screen'):
+            matches = stockview.screen_universe(engine, query)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    calendar = screen_panel.calendar
+    rows = matches.round(4).astype(object).where(matches.notna(), None).to_dict(orient='records')
+    return jsonify(query=query, universe=len(SCREEN_TICKERS), matched=len(rows), refreshing=refreshing,
+                   as_of=calendar[-1].strftime('%Y-%m-%d') if len(calendar) else None, results=rows)
 
-    # 3. Create the viewer output
-    chart = create_chart(analyzed_df, symbol, overview)
+@app.route('/cache/stats')
+def cache_stats():
+    """Reports counters for the fundamentals and chart caches and request coalescing."""
+    return jsonify(fundamentals=fundamentals_cache.stats(), charts=chart_cache.stats(), inflight=inflight.stats())
 
-    return render_template_string(RESULTS_TEMPLATE, overview=overview, fundamentals=fundamentals, chart_image=chart)
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage latency histograms and event counters for all workers, in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # ==============================================================================
 # MAIN EXECUTION
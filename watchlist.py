@@ -0,0 +1,158 @@
+"""
+Live watchlist quotes.
+
+One background poller per API key fetches each watched symbol once per
+interval, however many browsers are watching it, and fans changed quotes
+out to subscriber queues (served to browsers as Server-Sent Events).
+Upstream load therefore scales with the number of symbols, not viewers.
+Fetched quotes are kept in the shared cache backend, so when several worker
+processes serve viewers only one of them fetches a symbol per interval.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+from cache import backend_lock, shared_backend
+from data_fetcher import Quote, get_quote
+
+# Seconds between polls of the same symbol.
+POLL_INTERVAL = float(os.environ.get('STOCKVIEW_WATCHLIST_INTERVAL', 60))
+
+# Most symbols a single watchlist may follow.
+MAX_SYMBOLS = 25
+
+
+class Subscription:
+    """One viewer's interest in a set of symbols, with its own update queue."""
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self.queue = queue.Queue(maxsize=1000)
+
+    def push(self, quote):
+        try:
+            self.queue.put_nowait(quote)
+        except queue.Full:
+            pass  # A stalled viewer drops updates rather than blocking the poller
+
+
+class QuotePoller:
+    """Polls the union of all subscribers' symbols and publishes only changed quotes."""
+
+    def __init__(self, api_key, interval=POLL_INTERVAL, fetch=get_quote, backend=None):
+        self.api_key = api_key
+        self.interval = interval
+        self.fetch = fetch
+        self.backend = backend or shared_backend()
+        self._subscriptions = set()
+        self._latest = {}        # symbol -> last published Quote
+        self._last_polled = {}   # symbol -> monotonic time of last poll
+        self._lock = threading.Lock()
+        self._thread = None
+        self.counters = {'polls': 0, 'fetches': 0, 'published': 0, 'unchanged': 0, 'errors': 0}
+
+    def watched(self):
+        with self._lock:
+            return set().union(*(s.symbols for s in self._subscriptions)) if self._subscriptions else set()
+
+    def subscribe(self, symbols):
+        """Register a viewer; it immediately receives the last known quote of each symbol."""
+        sub = Subscription(symbols)
+        with self._lock:
+            self._subscriptions.add(sub)
+            for symbol in sub.symbols:
+                if symbol in self._latest:
+                    sub.push(self._latest[symbol])
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='watchlist-poller', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def _due(self):
+        now = time.monotonic()
+        return [s for s in sorted(self.watched())
+                if now - self._last_polled.get(s, float('-inf')) >= self.interval]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            for symbol in self._due():
+                self.poll(symbol)
+            time.sleep(min(1.0, self.interval))
+
+    def _shared_quote(self, symbol, max_age=None):
+        """The quote another worker (or this one) stored, if it is recent enough."""
+        entry = self.backend.get('quotes', symbol)
+        if entry is None or (max_age is not None and time.time() - entry[1] >= max_age):
+            return None
+        return Quote(**json.loads(entry[0]))
+
+    def _fetch_shared(self, symbol):
+        """Fetch `symbol` unless a worker already did this interval; only one worker fetches at a time."""
+        quote = self._shared_quote(symbol, self.interval)
+        if quote is not None:
+            return quote
+        with backend_lock(self.backend, f'quotes:{symbol}', ttl=30, timeout=0) as acquired:
+            if not acquired:
+                # Another worker is fetching it right now; use whatever it had before
+                return self._shared_quote(symbol)
+            quote = self._shared_quote(symbol, self.interval)
+            if quote is None:
+                quote = self.fetch(symbol, self.api_key)
+                with self._lock:
+                    self.counters['fetches'] += 1
+                if quote is not None:
+                    self.backend.set('quotes', symbol, json.dumps(quote._asdict()).encode('utf-8'))
+        return quote
+
+    def poll(self, symbol):
+        """Refresh one symbol and publish it if it changed since the last publication."""
+        self._last_polled[symbol] = time.monotonic()
+        quote = self._fetch_shared(symbol)
+        with self._lock:
+            self.counters['polls'] += 1
+            if quote is None:
+                self.counters['errors'] += 1
+                return
+            if self._latest.get(symbol) == quote:
+                self.counters['unchanged'] += 1
+                return
+            self._latest[symbol] = quote
+            self.counters['published'] += 1
+            subscribers = [s for s in self._subscriptions if symbol in s.symbols]
+        for sub in subscribers:
+            sub.push(quote)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, subscribers=len(self._subscriptions))
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def poller_for(api_key):
+    """The shared poller for one API key."""
+    with _pollers_lock:
+        if api_key not in _pollers:
+            _pollers[api_key] = QuotePoller(api_key)
+        return _pollers[api_key]
+
+def parse_symbols(text):
+    """Split a comma/space separated symbol list into unique upper-case tickers."""
+    symbols = []
+    for part in text.replace(',', ' ').split():
+        symbol = part.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols[:MAX_SYMBOLS]
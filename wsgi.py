@@ -0,0 +1,14 @@
+"""
+WSGI entry point for running StockView under a production server, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker imports this module before it accepts connections, so the
+warm-up runs once per worker (STOCKVIEW_WARM_UP=0 skips it).
+"""
+from stockviewer import WARM_UP, app, warm_up
+
+if WARM_UP:
+    warm_up()
+
+__all__ = ['app']